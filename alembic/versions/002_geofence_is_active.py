@@ -0,0 +1,29 @@
+"""Add is_active flag to geofence boundaries
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'geofence_boundaries',
+        sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('geofence_boundaries', 'is_active')
@@ -0,0 +1,129 @@
+"""Partition animal_locations by month
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 10:00:00.000000
+
+Converts animal_locations into a natively range-partitioned table (one
+partition per calendar month plus a default partition). PostgreSQL requires
+the partition key in the primary key, so the primary key becomes
+(id, timestamp). Ongoing partition creation and retention are handled by
+app.services.partition_service.
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE_MONTHS = 3
+
+INDEXES = [
+    ('idx_animal_id', ['animal_id']),
+    ('idx_timestamp', ['timestamp']),
+    ('ix_animal_locations_id', ['id']),
+    ('ix_animal_locations_animal_id', ['animal_id']),
+    ('ix_animal_locations_timestamp', ['timestamp']),
+]
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"animal_locations_y{month.year:04d}m{month.month:02d}"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Declarative partitioning is PostgreSQL-only; other databases keep
+        # the plain table.
+        return
+
+    # Move the old table (and its index names) out of the way, keeping the id sequence
+    op.execute("ALTER SEQUENCE animal_locations_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE animal_locations RENAME TO animal_locations_unpartitioned")
+    op.execute("ALTER TABLE animal_locations_unpartitioned RENAME CONSTRAINT animal_locations_pkey TO animal_locations_unpartitioned_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+
+    op.execute("""
+        CREATE TABLE animal_locations (
+            id INTEGER NOT NULL DEFAULT nextval('animal_locations_id_seq'),
+            animal_id VARCHAR NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT animal_locations_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE animal_locations_id_seq OWNED BY animal_locations.id")
+    op.execute("CREATE TABLE animal_locations_default PARTITION OF animal_locations DEFAULT")
+
+    first = bind.execute(sa.text(
+        "SELECT min(timestamp) FROM animal_locations_unpartitioned"
+    )).scalar()
+    today = date.today()
+    month = date(first.year, first.month, 1) if first else date(today.year, today.month, 1)
+    last = _add_months(date(today.year, today.month, 1), PREMAKE_MONTHS)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {_partition_name(month)} PARTITION OF animal_locations "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'animal_locations', columns, unique=False)
+
+    op.execute("""
+        INSERT INTO animal_locations (id, animal_id, latitude, longitude, timestamp)
+        SELECT id, animal_id, latitude, longitude, timestamp
+        FROM animal_locations_unpartitioned
+    """)
+    op.execute("DROP TABLE animal_locations_unpartitioned")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER SEQUENCE animal_locations_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE animal_locations RENAME TO animal_locations_partitioned")
+    op.execute("ALTER TABLE animal_locations_partitioned RENAME CONSTRAINT animal_locations_pkey TO animal_locations_partitioned_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+
+    op.execute("""
+        CREATE TABLE animal_locations (
+            id INTEGER NOT NULL DEFAULT nextval('animal_locations_id_seq'),
+            animal_id VARCHAR NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT animal_locations_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE animal_locations_id_seq OWNED BY animal_locations.id")
+    op.execute("""
+        INSERT INTO animal_locations (id, animal_id, latitude, longitude, timestamp)
+        SELECT id, animal_id, latitude, longitude, timestamp
+        FROM animal_locations_partitioned
+    """)
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE animal_locations_partitioned")
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'animal_locations', columns, unique=False)
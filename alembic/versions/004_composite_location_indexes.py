@@ -0,0 +1,69 @@
+"""Replace single-column indexes with composite (animal_id, timestamp DESC)
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 11:00:00.000000
+
+animal_locations had two identical indexes on animal_id, two on timestamp
+and one on id duplicating the primary key. The access pattern everywhere is
+"WHERE animal_id = ? ORDER BY timestamp DESC", so they are replaced by one
+composite index plus a BRIN index on timestamp for time-range scans (BRIN
+is PostgreSQL-only; other databases get a plain index). alerts gets the
+same composite index; ix_alerts_timestamp stays for GET /alerts.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_animal_locations_timestamp', table_name='animal_locations')
+    op.drop_index('ix_animal_locations_animal_id', table_name='animal_locations')
+    op.drop_index('ix_animal_locations_id', table_name='animal_locations')
+    op.drop_index('idx_timestamp', table_name='animal_locations')
+    op.drop_index('idx_animal_id', table_name='animal_locations')
+    op.create_index(
+        'ix_animal_locations_animal_id_timestamp',
+        'animal_locations',
+        ['animal_id', sa.text('timestamp DESC')],
+        unique=False
+    )
+    op.create_index(
+        'brin_animal_locations_timestamp',
+        'animal_locations',
+        ['timestamp'],
+        unique=False,
+        postgresql_using='brin'
+    )
+
+    op.drop_index('ix_alerts_animal_id', table_name='alerts')
+    op.drop_index('ix_alerts_id', table_name='alerts')
+    op.create_index(
+        'ix_alerts_animal_id_timestamp',
+        'alerts',
+        ['animal_id', sa.text('timestamp DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_animal_id_timestamp', table_name='alerts')
+    op.create_index('ix_alerts_id', 'alerts', ['id'], unique=False)
+    op.create_index('ix_alerts_animal_id', 'alerts', ['animal_id'], unique=False)
+
+    op.drop_index('brin_animal_locations_timestamp', table_name='animal_locations')
+    op.drop_index('ix_animal_locations_animal_id_timestamp', table_name='animal_locations')
+    op.create_index('idx_animal_id', 'animal_locations', ['animal_id'], unique=False)
+    op.create_index('idx_timestamp', 'animal_locations', ['timestamp'], unique=False)
+    op.create_index('ix_animal_locations_id', 'animal_locations', ['id'], unique=False)
+    op.create_index('ix_animal_locations_animal_id', 'animal_locations', ['animal_id'], unique=False)
+    op.create_index('ix_animal_locations_timestamp', 'animal_locations', ['timestamp'], unique=False)
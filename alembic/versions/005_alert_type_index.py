@@ -0,0 +1,34 @@
+"""Add composite (alert_type, timestamp DESC) index on alerts
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 14:00:00.000000
+
+GET /alerts can filter by alert_type and pages newest first; this index
+serves that filter the way ix_alerts_animal_id_timestamp serves animal_id.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_alerts_alert_type_timestamp',
+        'alerts',
+        ['alert_type', sa.text('timestamp DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_alert_type_timestamp', table_name='alerts')
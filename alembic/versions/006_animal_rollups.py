@@ -0,0 +1,44 @@
+"""Add animal_rollups table for hourly/daily per-animal stats
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 15:00:00.000000
+
+Rows are upserted by the ingest pipeline; the unique constraint is the
+ON CONFLICT target and also serves per-animal reads by period.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'animal_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('animal_id', sa.String(), nullable=False),
+        sa.Column('period', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('fix_count', sa.Integer(), nullable=False),
+        sa.Column('distance_m', sa.Float(), nullable=False),
+        sa.Column('active_seconds', sa.Float(), nullable=False),
+        sa.Column('inside_seconds', sa.Float(), nullable=False),
+        sa.Column('outside_seconds', sa.Float(), nullable=False),
+        sa.Column('first_timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('animal_id', 'period', 'bucket_start', name='uq_animal_rollups_animal_period_bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('animal_rollups')
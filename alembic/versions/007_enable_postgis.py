@@ -0,0 +1,33 @@
+"""Enable PostGIS
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 16:00:00.000000
+
+GET /animals/nearby and /animals/within run on PostGIS geography on
+PostgreSQL (see 009). Other databases use the in-memory grid index
+instead and are left as is.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+
+def downgrade() -> None:
+    # The extension may be used outside this schema, so it is left installed
+    pass
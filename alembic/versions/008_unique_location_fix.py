@@ -0,0 +1,64 @@
+"""Make (animal_id, timestamp) unique on animal_locations
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 17:00:00.000000
+
+Collars replay buffered fixes after a coverage gap, so the same fix can
+arrive several times. Existing duplicates are deleted (keeping the lowest
+id) and the composite index from 004 becomes a unique index, which the
+bulk insert uses as its ON CONFLICT DO NOTHING target. The index includes
+the partition key, so it is allowed on the partitioned PostgreSQL table.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            """
+            DELETE FROM animal_locations a
+            USING animal_locations b
+            WHERE a.animal_id = b.animal_id
+              AND a.timestamp = b.timestamp
+              AND a.id > b.id
+            """
+        )
+    else:
+        op.execute(
+            """
+            DELETE FROM animal_locations
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM animal_locations GROUP BY animal_id, timestamp
+            )
+            """
+        )
+
+    op.drop_index('ix_animal_locations_animal_id_timestamp', table_name='animal_locations')
+    op.create_index(
+        'uq_animal_locations_animal_id_timestamp',
+        'animal_locations',
+        ['animal_id', sa.text('timestamp DESC')],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_animal_locations_animal_id_timestamp', table_name='animal_locations')
+    op.create_index(
+        'ix_animal_locations_animal_id_timestamp',
+        'animal_locations',
+        ['animal_id', sa.text('timestamp DESC')],
+        unique=False
+    )
@@ -0,0 +1,97 @@
+"""Add trigger-maintained latest_positions table with its own GiST index
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 18:00:00.000000
+
+GET /animals/nearby and /animals/within ask where animals are now, so a
+spatial index over every stored fix would make their cost grow with the
+location history in the searched area. latest_positions holds one
+row per animal, kept current by a statement-level trigger on
+animal_locations (one upsert per INSERT statement, so batched writers
+pay once per batch and need no changes), and the spatial queries use its
+GiST index instead. A fix only replaces an animal's row if it is newer,
+so late replayed fixes leave it alone.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        """
+        CREATE TABLE latest_positions (
+            animal_id VARCHAR PRIMARY KEY,
+            location_id INTEGER NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            geog geography(Point, 4326)
+                GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO latest_positions (animal_id, location_id, latitude, longitude, timestamp)
+        SELECT DISTINCT ON (animal_id) animal_id, id, latitude, longitude, timestamp
+        FROM animal_locations
+        ORDER BY animal_id, timestamp DESC, id DESC
+        """
+    )
+    op.create_index(
+        'gist_latest_positions_geog',
+        'latest_positions',
+        ['geog'],
+        unique=False,
+        postgresql_using='gist'
+    )
+    op.execute(
+        """
+        CREATE FUNCTION latest_positions_upsert() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO latest_positions (animal_id, location_id, latitude, longitude, timestamp)
+            SELECT DISTINCT ON (animal_id) animal_id, id, latitude, longitude, timestamp
+            FROM new_rows
+            ORDER BY animal_id, timestamp DESC, id DESC
+            ON CONFLICT (animal_id) DO UPDATE SET
+                location_id = EXCLUDED.location_id,
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude,
+                timestamp = EXCLUDED.timestamp
+            WHERE latest_positions.timestamp < EXCLUDED.timestamp;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER animal_locations_latest_positions
+        AFTER INSERT ON animal_locations
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION latest_positions_upsert()
+        """
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER animal_locations_latest_positions ON animal_locations")
+    op.execute("DROP FUNCTION latest_positions_upsert()")
+    op.drop_table('latest_positions')
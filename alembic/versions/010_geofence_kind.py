@@ -0,0 +1,33 @@
+"""Add kind to geofence boundaries
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 20:00:00.000000
+
+Fences are containment (paddocks an animal should stay in), exclusion
+(areas it must not enter) or zone (tracked for membership only, e.g.
+water points). Existing boundaries are containment fences.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'geofence_boundaries',
+        sa.Column('kind', sa.String(), server_default='containment', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('geofence_boundaries', 'kind')
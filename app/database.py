@@ -1,6 +1,11 @@
+import time
+from typing import Any, Dict
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.utils.metrics import DB_POOL_WAIT, instrument_engine
 
 # Base class for models
 Base = declarative_base()
@@ -10,16 +15,64 @@ engine = None
 AsyncSessionLocal = None
 
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT.observe(waited)
+            self.acquisitions += 1
+            self.total_wait += waited
+            if waited > self.max_wait:
+                self.max_wait = waited
+
+
+def _engine_options() -> Dict[str, Any]:
+    url = make_url(settings.DATABASE_URL)
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "future": True,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    # SQLite uses its own single-connection pools
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+
+    return options
+
+
 def init_db():
     """Initialize database engine and session factory."""
     global engine, AsyncSessionLocal
     
     if engine is None:
-        engine = create_async_engine(
-            settings.DATABASE_URL,
-            echo=True,
-            future=True
-        )
+        engine = create_async_engine(settings.DATABASE_URL, **_engine_options())
+        if settings.METRICS_ENABLED:
+            instrument_engine(engine)
         
         AsyncSessionLocal = async_sessionmaker(
             engine,
@@ -32,6 +85,30 @@ def init_db():
     return engine, AsyncSessionLocal
 
 
+def get_pool_stats() -> Dict[str, Any]:
+    """Snapshot of connection pool usage for sizing the pool."""
+    if engine is None:
+        return {"initialized": False}
+    
+    pool = engine.pool
+    stats: Dict[str, Any] = {"initialized": True, "pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            acquisitions=pool.acquisitions,
+            total_wait_seconds=round(pool.total_wait, 6),
+            max_wait_seconds=round(pool.max_wait, 6),
+            avg_wait_ms=round(pool.total_wait * 1000 / pool.acquisitions, 3) if pool.acquisitions else 0.0,
+        )
+    return stats
+
+
 # Initialize on import (but handle errors gracefully)
 try:
     init_db()
@@ -52,4 +129,3 @@ async def get_db():
             yield session
         finally:
             await session.close()
-
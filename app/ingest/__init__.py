@@ -0,0 +1 @@
+# GPS Ingestion
@@ -0,0 +1,36 @@
+"""
+Run the MQTT GPS ingestion service:
+
+    python -m app.ingest
+"""
+import asyncio
+import logging
+import signal
+from app.ingest.mqtt_consumer import MQTTConsumer
+from app.ingest.pipeline import ingest_pipeline
+
+logger = logging.getLogger("app.ingest")
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    consumer = MQTTConsumer(ingest_pipeline)
+    await ingest_pipeline.start()
+    await consumer.start()
+    logger.info("Ingesting from %s with %d workers", consumer.topic, ingest_pipeline.num_workers)
+
+    await stop.wait()
+
+    logger.info("Shutting down, flushing queued fixes")
+    await consumer.stop()
+    await ingest_pipeline.stop()
+    logger.info("Ingest stats: %s", ingest_pipeline.stats.snapshot())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""
+Compact binary wire format for GPS fixes.
+
+A record is 28 bytes, little-endian, no padding:
+
+    offset  size  field
+    0       16    animal_id   UTF-8, NUL-padded
+    16      4     latitude    int32, degrees * 1e7
+    20      4     longitude   int32, degrees * 1e7
+    24      4     timestamp   uint32, Unix epoch seconds (UTC)
+
+A frame batches records behind an 8-byte header:
+
+    0       4     magic       b"LVGP"
+    4       1     version     1
+    5       1     reserved    0
+    6       2     count       uint16, number of records that follow
+
+A payload is either a frame or a single bare record.
+"""
+import struct
+from datetime import datetime, timezone
+from typing import Iterable, List, Tuple
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+from app.schemas import GPSData
+
+MAGIC = b"LVGP"
+VERSION = 1
+COORD_SCALE = 10_000_000
+ANIMAL_ID_SIZE = 16
+
+HEADER = struct.Struct("<4sBBH")
+RECORD = struct.Struct(f"<{ANIMAL_ID_SIZE}siiI")
+RECORD_DTYPE = np.dtype([
+    ("animal_id", f"S{ANIMAL_ID_SIZE}"),
+    ("latitude", "<i4"),
+    ("longitude", "<i4"),
+    ("timestamp", "<u4"),
+])
+MAX_FRAME_RECORDS = 0xFFFF
+
+_gps_list = TypeAdapter(List[GPSData])
+
+# (raw record, error message) for every record that failed validation
+DecodeErrors = List[Tuple[object, str]]
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Fixes without an offset are taken to be UTC, not local time
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+def _pack_record(fix: GPSData) -> bytes:
+    animal_id = fix.animal_id.encode()
+    if len(animal_id) > ANIMAL_ID_SIZE:
+        raise ValueError(f"animal_id {fix.animal_id!r} is longer than {ANIMAL_ID_SIZE} bytes")
+    return RECORD.pack(
+        animal_id,
+        round(fix.latitude * COORD_SCALE),
+        round(fix.longitude * COORD_SCALE),
+        int(_utc(fix.timestamp).timestamp()),
+    )
+
+
+def encode_gps_record(fix: GPSData) -> bytes:
+    """Encode one fix as a bare 28-byte record."""
+    return _pack_record(fix)
+
+
+def encode_gps_frame(fixes: Iterable[GPSData]) -> bytes:
+    """Encode fixes as a frame (header followed by records)."""
+    records = [_pack_record(fix) for fix in fixes]
+    if len(records) > MAX_FRAME_RECORDS:
+        raise ValueError(f"A frame holds at most {MAX_FRAME_RECORDS} records")
+    return HEADER.pack(MAGIC, VERSION, 0, len(records)) + b"".join(records)
+
+
+def is_binary_frame(payload: bytes) -> bool:
+    # A frame is never one record long, so a bare record whose animal_id
+    # happens to start with the magic is still read as a record
+    return payload[:len(MAGIC)] == MAGIC and len(payload) != RECORD.size
+
+
+def _frame_records(payload: bytes) -> np.ndarray:
+    """View the records of a frame as a structured array without copying."""
+    if len(payload) < HEADER.size:
+        raise ValueError("Truncated frame header")
+    _, version, _, count = HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+    expected = HEADER.size + count * RECORD.size
+    if len(payload) != expected:
+        raise ValueError(f"Frame of {count} records should be {expected} bytes, got {len(payload)}")
+    return np.frombuffer(payload, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+
+
+def _items(payload: bytes) -> List[dict]:
+    if not is_binary_frame(payload):
+        # A bare record is too small for NumPy's per-call overhead to pay off
+        if len(payload) != RECORD.size:
+            raise ValueError(f"Bare record should be {RECORD.size} bytes, got {len(payload)}")
+        animal_id, lat, lon, epoch = RECORD.unpack(payload)
+        return [{
+            "animal_id": animal_id.rstrip(b"\0"),
+            "latitude": lat / COORD_SCALE,
+            "longitude": lon / COORD_SCALE,
+            "timestamp": epoch,
+        }]
+
+    records = _frame_records(payload)
+    return [
+        {"animal_id": animal_id, "latitude": lat, "longitude": lon, "timestamp": epoch}
+        for animal_id, lat, lon, epoch in zip(
+            records["animal_id"].tolist(),
+            (records["latitude"] / COORD_SCALE).tolist(),
+            (records["longitude"] / COORD_SCALE).tolist(),
+            records["timestamp"].tolist(),
+        )
+    ]
+
+
+def decode_gps_binary(payload: bytes) -> Tuple[List[GPSData], DecodeErrors]:
+    """
+    Decode a binary frame or bare record.
+
+    Frame records are viewed in place with ``np.frombuffer`` and their
+    coordinates unscaled in one vectorized step; the fixes are then
+    validated in a single pydantic-core call (epoch seconds are accepted as
+    UTC datetimes). Only when that fails are the records validated one by
+    one so the good ones are kept.
+
+    Returns:
+        Tuple of (valid fixes, errors)
+    """
+    try:
+        items = _items(payload)
+    except ValueError as e:
+        return [], [(payload, str(e))]
+
+    try:
+        return _gps_list.validate_python(items), []
+    except ValidationError:
+        pass
+
+    fixes: List[GPSData] = []
+    errors: DecodeErrors = []
+    for item in items:
+        try:
+            fixes.append(GPSData.model_validate(item))
+        except ValidationError as e:
+            errors.append((item, str(e)))
+    return fixes, errors
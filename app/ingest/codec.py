@@ -0,0 +1,80 @@
+from typing import Any, List, Optional, Tuple
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from app.ingest.binary import decode_gps_binary, is_binary_frame
+from app.schemas import GPSData
+
+# (raw item, error message) for every fix that failed validation
+DecodeErrors = List[Tuple[Any, str]]
+
+_gps_list = TypeAdapter(List[GPSData])
+
+
+def _is_array(payload: bytes) -> bool:
+    return payload.lstrip()[:1] == b"["
+
+
+def decode_gps_json(payload: bytes) -> Tuple[List[GPSData], DecodeErrors]:
+    """
+    Decode a JSON payload holding one GPS fix or an array of fixes.
+
+    The fast path parses and validates the whole payload in one pass inside
+    pydantic-core, without building intermediate dicts. Only when that fails
+    is the payload parsed with orjson and validated fix by fix, so the valid
+    fixes of a partly bad array are kept and every reject gets its GPSData
+    error message.
+
+    Returns:
+        Tuple of (valid fixes, errors)
+    """
+    try:
+        if _is_array(payload):
+            return _gps_list.validate_json(payload), []
+        return [GPSData.model_validate_json(payload)], []
+    except ValidationError:
+        pass
+
+    try:
+        data = orjson.loads(payload)
+    except orjson.JSONDecodeError as e:
+        return [], [(payload, f"Invalid JSON: {e}")]
+
+    items = data if type(data) is list else [data]
+    fixes: List[GPSData] = []
+    errors: DecodeErrors = []
+    for item in items:
+        try:
+            fixes.append(GPSData.model_validate(item))
+        except ValidationError as e:
+            errors.append((item, str(e)))
+    return fixes, errors
+
+
+BINARY_CONTENT_TYPES = ("application/octet-stream", "application/vnd.livestock.gps")
+BINARY_CONTENT_TYPE = BINARY_CONTENT_TYPES[1]
+
+
+def is_binary_content_type(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in BINARY_CONTENT_TYPES
+
+
+def decode_gps_payload(
+    payload: bytes,
+    content_type: Optional[str] = None
+) -> Tuple[List[GPSData], DecodeErrors]:
+    """
+    Decode a GPS payload in either wire format.
+
+    The content type picks the decoder when known (HTTP, or the MQTT topic
+    the payload arrived on). Without one only an ``LVGP`` frame is taken as
+    binary: a bare record can start with any bytes, including ``{`` or
+    ``[``, so it is never guessed and is decoded as JSON (and rejected).
+    """
+    if content_type:
+        binary = is_binary_content_type(content_type)
+    else:
+        binary = is_binary_frame(payload)
+
+    if binary:
+        return decode_gps_binary(payload)
+    return decode_gps_json(payload)
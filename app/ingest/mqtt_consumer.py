@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import paho.mqtt.client as mqtt
+from typing import Callable, Optional
+from app.config import settings
+from app.ingest.codec import BINARY_CONTENT_TYPE
+from app.ingest.pipeline import IngestPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class MQTTConsumer:
+    """
+    Subscribe to the GPS topics and feed payloads into an IngestPipeline.
+
+    MQTT 3.1.1 carries no content type, so the format is chosen by topic:
+    payloads on ``binary_topic`` are decoded as the binary format, those on
+    ``topic`` as JSON (or as binary if they are an ``LVGP`` frame).
+
+    paho delivers messages on its network thread. Each payload is handed to
+    the event loop and the network thread waits until it has been queued, so
+    a saturated pipeline slows down reads from the broker instead of
+    buffering without limit. Decoding happens on the event loop.
+    """
+
+    def __init__(
+        self,
+        pipeline: IngestPipeline,
+        topic: Optional[str] = None,
+        binary_topic: Optional[str] = None,
+        qos: int = 1,
+        client_factory: Callable[[], mqtt.Client] = mqtt.Client,
+    ):
+        self.pipeline = pipeline
+        self.topic = topic or settings.MQTT_TOPIC_GPS
+        self.binary_topic = binary_topic or settings.MQTT_TOPIC_GPS_BINARY
+        self.qos = qos
+        self._client_factory = client_factory
+        self.client: Optional[mqtt.Client] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.messages = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_MAXSIZE)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="mqtt-gps-consumer")
+
+        client = self._client_factory()
+        if settings.MQTT_USERNAME and settings.MQTT_PASSWORD:
+            client.username_pw_set(settings.MQTT_USERNAME, settings.MQTT_PASSWORD)
+        client.reconnect_delay_set(settings.MQTT_RECONNECT_MIN_DELAY, settings.MQTT_RECONNECT_MAX_DELAY)
+        client.on_connect = self._on_connect
+        client.on_message = self._on_message
+        client.connect_async(settings.MQTT_BROKER_HOST, settings.MQTT_BROKER_PORT, settings.MQTT_KEEPALIVE)
+        client.loop_start()
+        self.client = client
+
+    async def stop(self) -> None:
+        """Stop reading from the broker and drain payloads already received."""
+        if not self.running:
+            return
+        self._stopping = True
+        self.client.disconnect()
+        # loop_stop joins the network thread, which may be waiting on this loop
+        await self._loop.run_in_executor(None, self.client.loop_stop)
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            payload, content_type = await self._queue.get()
+            try:
+                await self.pipeline.submit_payload(payload, content_type)
+            except Exception:
+                logger.exception("Failed to ingest GPS payload")
+            finally:
+                self._queue.task_done()
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            logger.warning("MQTT connection refused (rc=%s)", rc)
+            return
+        # (Re)subscribe on every connect so subscriptions survive reconnects
+        client.subscribe([(self.topic, self.qos), (self.binary_topic, self.qos)])
+        logger.info("Subscribed to %s and %s", self.topic, self.binary_topic)
+
+    def _on_message(self, client, userdata, message):
+        if self._stopping:
+            return
+        self.messages += 1
+        content_type = BINARY_CONTENT_TYPE if message.topic == self.binary_topic else None
+        future = asyncio.run_coroutine_threadsafe(
+            self._queue.put((message.payload, content_type)), self._loop
+        )
+        future.result()
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import init_db
+from app.ingest.codec import DecodeErrors, decode_gps_payload
+from app.schemas import GPSData
+from app.services.batch_writer import BatchWriter, create_alert_writer
+from app.services.breach_tracker import BreachTracker, breach_tracker
+from app.services.fix_deduplicator import FixDeduplicator, fix_deduplicator
+from app.services.geofence_engine import as_coordinate_arrays, geofence_engine
+from app.services.live_broadcaster import live_broadcaster
+from app.services.location_service import LocationService
+from app.services.rollup_service import RollupAggregator, rollup_aggregator
+from app.utils.mqtt_publisher import AsyncMQTTPublisher
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# What a worker hands its location writer: the fix and whether it is in bounds
+StoredFix = Tuple[GPSData, bool]
+
+
+async def _store_locations(session: AsyncSession, items: Sequence[StoredFix]) -> int:
+    return await LocationService.create_locations_bulk(session, [fix for fix, _ in items])
+
+
+class IngestStats:
+    """Counters for fixes flowing through an IngestPipeline."""
+
+    __slots__ = (
+        "received", "rejected", "accepted", "duplicates", "processed", "alerts", "fence_transitions"
+    )
+
+    def __init__(self):
+        self.received = 0
+        self.rejected = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.alerts = 0
+        self.fence_transitions = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class IngestPipeline:
+    """
+    Validate GPS fixes, geofence them and persist them in batches.
+
+    Fixes are routed to one of ``workers`` tasks by a stable hash of
+    ``animal_id``, so all fixes of one animal are handled in arrival order
+    by the same worker. Each worker drains its queue in batches, drops fixes
+    it has already seen (collars replay them after coverage gaps), checks the
+    whole batch against the STRtree of every active geofence in one
+    vectorized query and hands the rows to its own BatchWriter, so database
+    flushes of different workers run concurrently. Whether a fix is in
+    bounds (inside a containment fence and outside every exclusion fence)
+    feeds a BreachTracker, and only its state transitions become
+    breach/return alerts. The newest fix of each animal also updates its
+    per-fence membership, and every named fence entered or left becomes a
+    ``geofence_enter``/``geofence_exit`` alert. Alerts are written through
+    a shared BatchWriter and published to MQTT. Positions
+    and alerts are also pushed to live dashboard clients. Once its location
+    writer has stored a batch, the fixes are recorded as seen and folded into
+    the hourly/daily per-animal rollups, so fixes that are never stored are
+    neither.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        publisher: Optional[AsyncMQTTPublisher] = None,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        tracker: Optional[BreachTracker] = None,
+        rollups: Optional[RollupAggregator] = None,
+        deduplicator: Optional[FixDeduplicator] = None,
+    ):
+        self.num_workers = workers or settings.INGEST_WORKERS
+        self.max_queue_size = max_queue_size or settings.INGEST_QUEUE_MAXSIZE
+        self.publisher = publisher
+        self._session_factory = session_factory
+        self.tracker = breach_tracker if tracker is None else tracker
+        if rollups is None and settings.ROLLUP_ENABLED:
+            rollups = rollup_aggregator
+        self.rollups = rollups
+        self.deduplicator = fix_deduplicator if deduplicator is None else deduplicator
+        self.stats = IngestStats()
+        self.location_writers: List[BatchWriter] = []
+        self.alert_writer: Optional[BatchWriter] = None
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the worker tasks, writers and alert publisher (idempotent)."""
+        if self.running:
+            return
+        if self._session_factory is None:
+            self._session_factory = init_db()[1]
+        if self.publisher is None:
+            self.publisher = AsyncMQTTPublisher()
+        await self.publisher.start()
+        await self.tracker.start()
+        if self.rollups is not None and not await self.rollups.start(self._session_factory):
+            self.rollups = None
+
+        self.alert_writer = create_alert_writer(session_factory=self._session_factory)
+        await self.alert_writer.start()
+        self.location_writers = [self.create_location_writer(f"locations-{i}") for i in range(self.num_workers)]
+        self._queues = [asyncio.Queue(maxsize=self.max_queue_size) for _ in range(self.num_workers)]
+        for i in range(self.num_workers):
+            await self.location_writers[i].start()
+            self._tasks.append(asyncio.create_task(self._worker(i), name=f"ingest-worker-{i}"))
+
+    async def stop(self) -> None:
+        """Process everything already queued, flush the writers and stop."""
+        if not self.running:
+            return
+        for queue in self._queues:
+            await queue.put(_STOP)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+
+        for writer in self.location_writers:
+            await writer.stop()
+        await self.alert_writer.stop()
+        await self.publisher.stop()
+        await self.tracker.stop()
+        if self.rollups is not None:
+            await self.rollups.stop()
+
+    def create_location_writer(self, name: str) -> BatchWriter:
+        """A writer for ``StoredFix`` items that reports back what it stored."""
+        return BatchWriter(
+            _store_locations,
+            name=name,
+            session_factory=self._session_factory,
+            on_flushed=self._locations_stored,
+            on_failed=self._locations_dropped,
+        )
+
+    def _locations_stored(self, items: List[StoredFix]) -> None:
+        fixes = [fix for fix, _ in items]
+        self.deduplicator.record(fixes)
+        if self.rollups is not None:
+            self.rollups.add(fixes, [inside for _, inside in items])
+
+    def _locations_dropped(self, items: List[StoredFix]) -> None:
+        self.deduplicator.forget([fix for fix, _ in items])
+
+    def partition(self, animal_id: str) -> int:
+        """Worker index for an animal; stable across processes and restarts."""
+        return zlib.crc32(animal_id.encode()) % self.num_workers
+
+    async def submit(self, fix: GPSData) -> None:
+        """Queue a validated fix, waiting if its worker's queue is full."""
+        self.stats.accepted += 1
+        await self._queues[self.partition(fix.animal_id)].put(fix)
+
+    async def submit_many(self, fixes: Sequence[GPSData]) -> None:
+        for fix in fixes:
+            await self.submit(fix)
+
+    def decode(
+        self,
+        payload: bytes,
+        content_type: Optional[str] = None
+    ) -> Tuple[List[GPSData], DecodeErrors]:
+        """
+        Decode a JSON or binary payload holding one fix or many.
+
+        Invalid fixes are counted and logged; they are returned separately.
+        """
+        fixes, errors = decode_gps_payload(payload, content_type)
+        self.stats.received += len(fixes) + len(errors)
+        self.stats.rejected += len(errors)
+        for item, error in errors:
+            logger.warning("Rejected GPS fix %r: %s", item, error)
+        return fixes, errors
+
+    async def submit_payload(
+        self,
+        payload: bytes,
+        content_type: Optional[str] = None
+    ) -> Tuple[int, DecodeErrors]:
+        """
+        Decode, validate and queue a raw GPS payload.
+
+        Returns:
+            Tuple of (number of fixes accepted, errors for rejected fixes)
+        """
+        fixes, errors = self.decode(payload, content_type)
+        await self.submit_many(fixes)
+        return len(fixes), errors
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.num_workers,
+            "queue_depths": [queue.qsize() for queue in self._queues],
+            **self.stats.snapshot(),
+            "location_writers": [writer.metrics.snapshot() for writer in self.location_writers],
+            "alert_writer": self.alert_writer.metrics.snapshot() if self.alert_writer else None,
+            "publisher": self.publisher.stats.snapshot() if self.publisher else None,
+            "dedup": self.deduplicator.snapshot(),
+            "breaches": {"tracked_animals": len(self.tracker), **self.tracker.stats.snapshot()},
+            "rollups": (
+                {"pending": self.rollups.pending, "dirty": self.rollups.dirty, **self.rollups.stats.snapshot()}
+                if self.rollups is not None else None
+            ),
+        }
+
+    async def _worker(self, index: int) -> None:
+        queue = self._queues[index]
+        writer = self.location_writers[index]
+
+        while True:
+            fix = await queue.get()
+            if fix is _STOP:
+                return
+
+            batch = [fix]
+            stopping = False
+            while len(batch) < writer.batch_size:
+                try:
+                    fix = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if fix is _STOP:
+                    stopping = True
+                    break
+                batch.append(fix)
+
+            try:
+                await self._process(batch, writer)
+            except Exception:
+                logger.exception("Ingest worker %d failed to process %d fixes", index, len(batch))
+            if stopping:
+                return
+
+    async def _process(self, batch: List[GPSData], writer: BatchWriter) -> None:
+        # Only touches the database when the cached index needs revalidating.
+        # Fetched first so a failure here leaves the deduplicator untouched.
+        async with self._session_factory() as session:
+            index = await geofence_engine.get_index(session)
+
+        received = len(batch)
+        batch, newest = self.deduplicator.filter(batch)
+        self.stats.duplicates += received - len(batch)
+        if not batch:
+            return
+
+        try:
+            lats, lons = as_coordinate_arrays(batch)
+            inside, fences = index.containing_each(lats, lons)
+            inside = inside.tolist()
+            await writer.submit_many(list(zip(batch, inside)))
+        except BaseException:
+            # The writer never took these, so nothing will record or forget them
+            self.deduplicator.forget(batch)
+            raise
+        self.stats.processed += len(batch)
+        # Late fixes are stored but must not move the animal's live position back
+        live_broadcaster.publish_positions(
+            batch if all(newest) else [fix for fix, is_newest in zip(batch, newest) if is_newest]
+        )
+
+        alerts = self.tracker.observe_many(batch, inside)
+        if settings.GEOFENCE_TRANSITION_ALERTS:
+            # Late fixes would diff against a newer membership and flap it
+            for fix, containing, is_newest in zip(batch, fences, newest):
+                if is_newest:
+                    transitions = geofence_engine.update_membership(fix.animal_id, containing).alerts(fix)
+                    self.stats.fence_transitions += len(transitions)
+                    alerts.extend(transitions)
+        if not alerts:
+            return
+
+        self.stats.alerts += len(alerts)
+        await self.alert_writer.submit_many(alerts)
+        live_broadcaster.publish_alerts(alerts)
+        for alert in alerts:
+            self.publisher.publish_alert(alert.model_dump(mode="json"))
+
+
+ingest_pipeline = IngestPipeline()
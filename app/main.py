@@ -1,11 +1,24 @@
-from fastapi import FastAPI
+import asyncio
+from typing import List
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import animals, alerts, geofence
+from app.config import settings
+from app.database import get_pool_stats
+from app.ingest.mqtt_consumer import MQTTConsumer
+from app.ingest.pipeline import ingest_pipeline
+from app.schemas import AlertCreate
+from app.services.live_bridge import LiveMQTTBridge
+from app.services.live_broadcaster import live_broadcaster
+from app.services.response_cache import response_cache
+from app.routers import animals, alerts, geofence, export, ingest, live
+from app.utils.metrics import MetricsMiddleware, MetricsRegistry, registry
 
 app = FastAPI(
     title="Livestock Tracking System API",
     description="IoT GPS-based livestock tracking system with geofencing",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -15,12 +28,83 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination hands out the next page's cursor in this header
+    expose_headers=["X-Next-Cursor"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(animals.router)
 app.include_router(alerts.router)
 app.include_router(geofence.router)
+app.include_router(export.router)
+app.include_router(ingest.router)
+app.include_router(live.router)
+
+
+def invalidate_alert_pages(alerts: List[AlertCreate]) -> None:
+    """Drop cached alert pages when the ingest process reports new alerts."""
+    response_cache.invalidate("alerts")
+    # It publishes alerts before its batch writer stores them, so a page
+    # rendered in between misses them; drop the pages again once stored
+    asyncio.get_running_loop().call_later(
+        settings.INGEST_FLUSH_INTERVAL * 2, response_cache.invalidate, "alerts"
+    )
+
+
+mqtt_consumer = MQTTConsumer(ingest_pipeline)
+live_bridge = LiveMQTTBridge(live_broadcaster, on_alerts=invalidate_alert_pages)
+
+# Read from counters the pipeline and pool already keep, at scrape time only
+registry.callback(
+    "ingest_fixes_total",
+    "GPS fixes seen by the ingest pipeline, by stage (received, rejected, accepted, duplicates, processed)",
+    "counter",
+    lambda: {
+        (stage,): getattr(ingest_pipeline.stats, stage)
+        for stage in ("received", "rejected", "accepted", "duplicates", "processed")
+    },
+    ("stage",),
+)
+registry.callback(
+    "ingest_alerts_total",
+    "Geofence alerts raised by the ingest pipeline",
+    "counter",
+    lambda: ingest_pipeline.stats.alerts,
+)
+registry.callback(
+    "db_pool_connections",
+    "Pooled database connections, by state",
+    "gauge",
+    lambda: {
+        (state,): value for state, value in get_pool_stats().items()
+        if state in ("size", "checked_in", "checked_out", "overflow")
+    },
+    ("state",),
+)
+
+
+@app.on_event("startup")
+async def start_ingestion():
+    """
+    Optionally run the MQTT GPS consumer inside the API process; otherwise
+    relay the separate ingest process's traffic to live clients.
+    """
+    if settings.INGEST_MQTT_ENABLED:
+        await ingest_pipeline.start()
+        await mqtt_consumer.start()
+    elif settings.LIVE_MQTT_BRIDGE:
+        await live_bridge.start()
+
+
+@app.on_event("shutdown")
+async def stop_ingestion():
+    """Flush any buffered locations and alerts before the process exits."""
+    await live_bridge.stop()
+    await mqtt_consumer.stop()
+    await ingest_pipeline.stop()
 
 
 @app.get("/")
@@ -38,3 +122,34 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+
+@app.get("/health/ingest")
+async def ingest_health():
+    """Ingestion pipeline counters and per-batch writer metrics."""
+    return {"running": ingest_pipeline.running, **ingest_pipeline.snapshot()}
+
+
+@app.get("/health/db")
+async def database_health():
+    """Connection pool statistics (checked out, overflow, wait time)."""
+    return get_pool_stats()
+
+
+@app.get("/health/live")
+async def live_health():
+    """Connected live-stream clients and broadcast counters."""
+    return {**live_broadcaster.snapshot(), "mqtt_bridge": live_bridge.snapshot()}
+
+
+@app.get("/health/cache")
+async def cache_health():
+    """Response cache size, hit/miss and invalidation counters."""
+    return response_cache.snapshot()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(content=registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index, UniqueConstraint, true
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -6,16 +6,26 @@ from app.database import Base
 class AnimalLocation(Base):
     __tablename__ = "animal_locations"
     
-    id = Column(Integer, primary_key=True, index=True)
-    animal_id = Column(String, nullable=False, index=True)
+    # On PostgreSQL this table is range-partitioned by month on timestamp
+    # (migration 003) and its primary key is (id, timestamp); id alone is
+    # still unique, so the ORM keeps it as the identity.
+    id = Column(Integer, primary_key=True)
+    animal_id = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    timestamp = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    # On PostgreSQL an insert trigger keeps one row per animal in the
+    # latest_positions table, which has a generated geography column with a
+    # GiST index (migration 009). It is not mapped here; only the raw
+    # spatial queries in app.services.spatial_service read it.
     
-    # Indexes
+    # Indexes (migrations 004, 008): the unique composite index serves
+    # "WHERE animal_id = ? ORDER BY timestamp DESC" and makes replayed fixes
+    # (same animal and timestamp) no-ops on insert; BRIN covers time-range scans
     __table_args__ = (
-        Index('idx_animal_id', 'animal_id'),
-        Index('idx_timestamp', 'timestamp'),
+        Index('uq_animal_locations_animal_id_timestamp', animal_id, timestamp.desc(), unique=True),
+        Index('brin_animal_locations_timestamp', timestamp, postgresql_using='brin'),
     )
 
 
@@ -25,6 +35,9 @@ class GeofenceBoundary(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, default="default")
     boundary_points = Column(String, nullable=False)  # JSON string of coordinates
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true())
+    # containment, exclusion or zone (see geofence_engine)
+    kind = Column(String, nullable=False, default="containment", server_default="containment")
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
@@ -32,11 +45,38 @@ class GeofenceBoundary(Base):
 class Alert(Base):
     __tablename__ = "alerts"
     
-    id = Column(Integer, primary_key=True, index=True)
-    animal_id = Column(String, nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    animal_id = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     timestamp = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
     alert_type = Column(String, nullable=False, default="geofence_breach")
     message = Column(String, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_alerts_animal_id_timestamp', animal_id, timestamp.desc()),
+        Index('ix_alerts_alert_type_timestamp', alert_type, timestamp.desc()),
+    )
+
 
+class AnimalRollup(Base):
+    __tablename__ = "animal_rollups"
+    
+    # One row per animal per hour or day, maintained incrementally by the
+    # ingest pipeline (app.services.rollup_service)
+    id = Column(Integer, primary_key=True)
+    animal_id = Column(String, nullable=False)
+    period = Column(String, nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    fix_count = Column(Integer, nullable=False, default=0)
+    distance_m = Column(Float, nullable=False, default=0.0)
+    active_seconds = Column(Float, nullable=False, default=0.0)
+    inside_seconds = Column(Float, nullable=False, default=0.0)
+    outside_seconds = Column(Float, nullable=False, default=0.0)
+    first_timestamp = Column(DateTime(timezone=True), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    
+    # Upsert target; also serves "WHERE animal_id = ? AND period = ? ORDER BY bucket_start"
+    __table_args__ = (
+        UniqueConstraint('animal_id', 'period', 'bucket_start', name='uq_animal_rollups_animal_period_bucket'),
+    )
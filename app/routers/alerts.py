@@ -1,19 +1,91 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional
 from app.database import get_db
-from app.schemas import AlertResponse
+from app.schemas import AlertCount, AlertResponse
 from app.services.alert_service import AlertService
+from app.services.response_cache import cached_response, encode_json
+from app.utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
+_alerts_adapter = TypeAdapter(List[AlertResponse])
+
+
+async def _alerts_page(
+    db: AsyncSession,
+    request: Request,
+    animal_id: Optional[str],
+    alert_type: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int,
+    cursor: Optional[str]
+):
+    try:
+        position = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def produce():
+        alerts, next_position = await AlertService.get_alerts_page(
+            db, animal_id, alert_type, start_date, end_date, limit, position
+        )
+        headers = {}
+        if next_position is not None:
+            headers["X-Next-Cursor"] = encode_cursor(*next_position)
+        return encode_json(_alerts_adapter, alerts), headers
+    
+    # Any new alert may belong on any page, so all pages share one tag
+    return await cached_response(request, ["alerts"], produce)
+
 
 @router.get("", response_model=List[AlertResponse])
 async def get_all_alerts(
+    request: Request,
+    animal_id: Optional[str] = Query(None, description="Only alerts for this animal"),
+    alert_type: Optional[str] = Query(None, description="Only alerts of this type, e.g. geofence_breach"),
+    start_date: Optional[datetime] = Query(None, description="Start date for filtering (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="End date for filtering (ISO format)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of alerts to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get alerts, ordered by most recent.
+    
+    When more alerts match, the X-Next-Cursor response header holds the
+    cursor for the next page. Pages are cached with an ETag until new
+    alerts are written.
+    """
+    return await _alerts_page(db, request, animal_id, alert_type, start_date, end_date, limit, cursor)
+
+
+@router.get("/count", response_model=List[AlertCount])
+async def count_alerts(
+    animal_id: Optional[str] = Query(None, description="Only alerts for this animal"),
+    alert_type: Optional[str] = Query(None, description="Only alerts of this type"),
+    start_date: Optional[datetime] = Query(None, description="Start date for filtering (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="End date for filtering (ISO format)"),
+    group_by: Optional[Literal["animal_id", "alert_type"]] = Query(None, description="Count per animal or per alert type"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all alerts, ordered by most recent."""
-    alerts = await AlertService.get_all_alerts(db, limit)
-    return alerts
+    """Count matching alerts, with first and last alert time, optionally per group."""
+    return await AlertService.count_alerts(db, animal_id, alert_type, start_date, end_date, group_by)
+
 
+@router.get("/animal/{animal_id}", response_model=List[AlertResponse])
+async def get_alerts_by_animal(
+    animal_id: str,
+    request: Request,
+    alert_type: Optional[str] = Query(None, description="Only alerts of this type"),
+    start_date: Optional[datetime] = Query(None, description="Start date for filtering (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="End date for filtering (ISO format)"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of alerts to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get alerts for one animal, ordered by most recent."""
+    return await _alerts_page(db, request, animal_id, alert_type, start_date, end_date, limit, cursor)
@@ -1,13 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
-from typing import Optional
-from app.database import get_db
-from app.schemas import AnimalLocationResponse
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
+from app.config import settings
+from app.database import get_db, init_db
+from app.schemas import AnimalLocationResponse, AnimalRollupResponse, NearbyAnimalResponse
 from app.services.location_service import LocationService
+from app.services.response_cache import cached_response, encode_json
+from app.services.rollup_service import RollupService
+from app.services.spatial_index import parse_bbox
+from app.services.spatial_service import SpatialService
+from app.utils.pagination import decode_cursor, encode_cursor
+import csv
+import io
+import orjson
 
 router = APIRouter(prefix="/animals", tags=["animals"])
 
+MAX_BULK_LATEST_IDS = 10000
+MAX_SPATIAL_RESULTS = 10000
+
+_locations_adapter = TypeAdapter(List[AnimalLocationResponse])
+
+
+@router.get("/latest", response_model=List[AnimalLocationResponse])
+async def get_latest_locations(
+    ids: str = Query(..., description="Comma-separated animal IDs"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the latest GPS location for many animals in one request."""
+    animal_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    
+    if len(animal_ids) > MAX_BULK_LATEST_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_LATEST_IDS} animal IDs can be requested at once"
+        )
+    
+    return await LocationService.get_latest_locations(db, animal_ids)
+
+
+@router.get("/nearby", response_model=List[NearbyAnimalResponse])
+async def get_nearby_animals(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius: float = Query(..., gt=0, le=100000, description="Search radius in meters"),
+    limit: int = Query(1000, ge=1, le=MAX_SPATIAL_RESULTS, description="Maximum number of animals"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Animals whose latest position is within radius meters of a point, closest first."""
+    matches = await SpatialService.find_nearby(db, latitude, longitude, radius, limit)
+    return [
+        {
+            "id": position.id,
+            "animal_id": position.animal_id,
+            "latitude": position.latitude,
+            "longitude": position.longitude,
+            "timestamp": position.timestamp,
+            "distance_m": distance,
+        }
+        for position, distance in matches
+    ]
+
+
+@router.get("/within", response_model=List[AnimalLocationResponse])
+async def get_animals_within(
+    bbox: str = Query(..., description="Bounding box: min_lat,min_lon,max_lat,max_lon"),
+    limit: int = Query(1000, ge=1, le=MAX_SPATIAL_RESULTS, description="Maximum number of animals"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Animals whose latest position is inside a bounding box."""
+    try:
+        box = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await SpatialService.find_within(db, box, limit)
+
 
 @router.get("/{animal_id}/latest", response_model=AnimalLocationResponse)
 async def get_latest_location(
@@ -26,23 +97,191 @@ async def get_latest_location(
     return location
 
 
+async def _history(
+    db: AsyncSession,
+    animal_id: str,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int,
+    cursor: Optional[str],
+    tolerance: Optional[float],
+    resolution: Optional[float]
+):
+    """Fetch one history page (or simplified track) and its response headers."""
+    if tolerance or resolution:
+        locations = await LocationService.get_simplified_history(
+            db, animal_id, start_date, end_date, tolerance, resolution
+        )
+        if not locations:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No location history found for animal {animal_id}"
+            )
+        return locations, {}
+    
+    try:
+        position = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    locations, next_position = await LocationService.get_location_history_page(
+        db, animal_id, start_date, end_date, limit, position
+    )
+    
+    if not locations and position is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No location history found for animal {animal_id}"
+        )
+    
+    headers = {}
+    if next_position is not None:
+        headers["X-Next-Cursor"] = encode_cursor(*next_position)
+    
+    return locations, headers
+
+
+def _is_closed_range(end_date: Optional[datetime]) -> bool:
+    # Collars replay buffered fixes after a coverage gap, through an ingest
+    # process whose writes do not invalidate this cache; a range only stops
+    # changing once it ends further back than any replay reaches
+    if end_date is None:
+        return False
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    horizon = timedelta(seconds=settings.RESPONSE_CACHE_REPLAY_HORIZON)
+    return end_date < datetime.now(timezone.utc) - horizon
+
+
 @router.get("/{animal_id}/history", response_model=list[AnimalLocationResponse])
 async def get_location_history(
     animal_id: str,
+    request: Request,
+    response: Response,
     start_date: Optional[datetime] = Query(None, description="Start date for filtering (ISO format)"),
     end_date: Optional[datetime] = Query(None, description="End date for filtering (ISO format)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of locations per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Simplify the track with Douglas-Peucker (meters)"),
+    resolution: Optional[float] = Query(None, gt=0, description="Average the track into time buckets (seconds)"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get location history for an animal with optional date range filtering."""
-    locations = await LocationService.get_location_history(
-        db, animal_id, start_date, end_date
-    )
+    """
+    Get location history for an animal with optional date range filtering.
+    
+    Results are newest first and paginated; when more rows exist the
+    X-Next-Cursor response header holds the cursor for the next page.
+    When tolerance or resolution is given, the whole range is returned as
+    a simplified track instead and pagination does not apply.
+    
+    Ranges that end before the replay horizon are cached with an ETag
+    until new locations are ingested for the animal.
+    """
+    args = (db, animal_id, start_date, end_date, limit, cursor, tolerance, resolution)
+    
+    if _is_closed_range(end_date):
+        async def produce():
+            locations, headers = await _history(*args)
+            return encode_json(_locations_adapter, locations), headers
+        
+        return await cached_response(
+            request,
+            [f"locations:{animal_id}"],
+            produce,
+            ttl=settings.RESPONSE_CACHE_CLOSED_RANGE_TTL
+        )
     
-    if not locations:
+    locations, headers = await _history(*args)
+    response.headers.update(headers)
+    return locations
+
+
+async def _get_stats(
+    db: AsyncSession,
+    animal_id: str,
+    period: str,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int
+):
+    rollups = await RollupService.get_rollups(db, animal_id, period, start_date, end_date, limit)
+    if not rollups:
         raise HTTPException(
             status_code=404,
-            detail=f"No location history found for animal {animal_id}"
+            detail=f"No stats found for animal {animal_id}"
         )
+    return rollups
+
+
+@router.get("/{animal_id}/stats/hourly", response_model=List[AnimalRollupResponse])
+async def get_hourly_stats(
+    animal_id: str,
+    start_date: Optional[datetime] = Query(None, description="Earliest hour to include (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="Latest hour to include (ISO format)"),
+    limit: int = Query(168, ge=1, le=8784, description="Maximum number of hours"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Hourly distance, activity and inside/outside time for an animal, newest first."""
+    return await _get_stats(db, animal_id, "hour", start_date, end_date, limit)
+
+
+@router.get("/{animal_id}/stats/daily", response_model=List[AnimalRollupResponse])
+async def get_daily_stats(
+    animal_id: str,
+    start_date: Optional[datetime] = Query(None, description="Earliest day to include (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="Latest day to include (ISO format)"),
+    limit: int = Query(31, ge=1, le=3660, description="Maximum number of days"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Daily distance, activity and inside/outside time for an animal, newest first."""
+    return await _get_stats(db, animal_id, "day", start_date, end_date, limit)
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return b"".join(
+        orjson.dumps({
+            "id": row.id,
+            "animal_id": row.animal_id,
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "timestamp": row.timestamp,
+        }, option=orjson.OPT_APPEND_NEWLINE)
+        for row in rows
+    )
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (row.id, row.animal_id, row.latitude, row.longitude, row.timestamp.isoformat())
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+@router.get("/{animal_id}/history/stream")
+async def stream_location_history(
+    animal_id: str,
+    start_date: Optional[datetime] = Query(None, description="Start date for filtering (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="End date for filtering (ISO format)"),
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Output format"),
+):
+    """Stream the full location history for an animal, oldest first, as NDJSON or CSV."""
+    encode = _ndjson_chunk if format == "ndjson" else _csv_chunk
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
     
-    return locations
+    async def generate():
+        # The request-scoped session is closed before the body is sent,
+        # so the stream owns its own session.
+        _, session_factory = init_db()
+        async with session_factory() as session:
+            if format == "csv":
+                yield b"id,animal_id,latitude,longitude,timestamp\r\n"
+            async for rows in LocationService.stream_location_history(
+                session, animal_id, start_date, end_date
+            ):
+                yield encode(rows)
+    
+    return StreamingResponse(generate(), media_type=media_type)
 
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.database import init_db
+from app.services.export_service import (
+    ARROW_STREAM_MEDIA_TYPE,
+    ExportService,
+    ExportUnavailable,
+    require_pyarrow,
+)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+MAX_EXPORT_IDS = 10000
+
+
+@router.get("/locations")
+async def export_locations(
+    ids: Optional[str] = Query(None, description="Comma-separated animal IDs (default: all animals)"),
+    start_date: Optional[datetime] = Query(None, description="Start date for filtering (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="End date for filtering (ISO format)"),
+):
+    """
+    Stream the location history of many animals as an Arrow IPC stream, oldest first.
+
+    Columns: id, animal_id, latitude, longitude, timestamp (UTC).
+    """
+    animal_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip())) if ids else None
+    if animal_ids and len(animal_ids) > MAX_EXPORT_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_EXPORT_IDS} animal IDs can be exported at once"
+        )
+    try:
+        require_pyarrow()
+    except ExportUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+
+    async def generate():
+        # The request-scoped session is closed before the body is sent,
+        # so the stream owns its own session.
+        _, session_factory = init_db()
+        async with session_factory() as session:
+            async for chunk in ExportService.stream_arrow_ipc(session, animal_ids, start_date, end_date):
+                yield chunk
+
+    return StreamingResponse(generate(), media_type=ARROW_STREAM_MEDIA_TYPE)
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database import get_db
-from app.schemas import GeofenceBoundaryCreate, GeofenceBoundaryResponse, GeofencePoint
+from app.schemas import (
+    GeofenceBoundaryCreate,
+    GeofenceBoundaryResponse,
+    GeofenceMembershipResponse,
+    GeofencePoint,
+)
 from app.models import GeofenceBoundary
 from app.services.geofence_service import GeofenceService
+from app.services.geofence_engine import CONTAINMENT, geofence_engine
+from app.services.response_cache import cached_response, encode_json, response_cache
+from typing import Optional
 import json
 
 router = APIRouter(prefix="/geofence", tags=["geofence"])
 
+_boundary_adapter = TypeAdapter(GeofenceBoundaryResponse)
+
 
 @router.post("", response_model=GeofenceBoundaryResponse)
 async def update_geofence(
@@ -31,8 +42,15 @@ async def update_geofence(
     if existing_boundary:
         # Update existing
         existing_boundary.boundary_points = json.dumps(points_json)
+        # Fields the client left out keep their stored values
+        if boundary_data.is_active is not None:
+            existing_boundary.is_active = boundary_data.is_active
+        if boundary_data.kind is not None:
+            existing_boundary.kind = boundary_data.kind
         await db.commit()
         await db.refresh(existing_boundary)
+        geofence_engine.invalidate(existing_boundary.id)
+        response_cache.invalidate("geofence")
         
         # Parse for response
         points_data = json.loads(existing_boundary.boundary_points)
@@ -45,6 +63,8 @@ async def update_geofence(
             "id": existing_boundary.id,
             "name": existing_boundary.name,
             "boundary_points": boundary_points,
+            "is_active": existing_boundary.is_active,
+            "kind": existing_boundary.kind,
             "created_at": existing_boundary.created_at,
             "updated_at": existing_boundary.updated_at
         }
@@ -52,11 +72,15 @@ async def update_geofence(
         # Create new
         new_boundary = GeofenceBoundary(
             name=boundary_data.name,
-            boundary_points=json.dumps(points_json)
+            boundary_points=json.dumps(points_json),
+            is_active=True if boundary_data.is_active is None else boundary_data.is_active,
+            kind=boundary_data.kind or CONTAINMENT
         )
         db.add(new_boundary)
         await db.commit()
         await db.refresh(new_boundary)
+        geofence_engine.invalidate(new_boundary.id)
+        response_cache.invalidate("geofence")
         
         # Parse for response
         points_data = json.loads(new_boundary.boundary_points)
@@ -69,16 +93,14 @@ async def update_geofence(
             "id": new_boundary.id,
             "name": new_boundary.name,
             "boundary_points": boundary_points,
+            "is_active": new_boundary.is_active,
+            "kind": new_boundary.kind,
             "created_at": new_boundary.created_at,
             "updated_at": new_boundary.updated_at
         }
 
 
-@router.get("", response_model=GeofenceBoundaryResponse)
-async def get_geofence(
-    db: AsyncSession = Depends(get_db)
-):
-    """Get the current geofence boundary."""
+async def _current_geofence(db: AsyncSession):
     boundary = await GeofenceService.get_current_boundary(db)
     
     if not boundary:
@@ -103,7 +125,40 @@ async def get_geofence(
         "id": boundary.id,
         "name": boundary.name,
         "boundary_points": boundary_points,
+        "is_active": boundary.is_active,
+        "kind": boundary.kind,
         "created_at": boundary.created_at,
         "updated_at": boundary.updated_at
     }
 
+
+@router.get("", response_model=GeofenceBoundaryResponse)
+async def get_geofence(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the current geofence boundary.
+    
+    Served from the response cache with an ETag until the boundary is updated.
+    """
+    async def produce():
+        return encode_json(_boundary_adapter, await _current_geofence(db)), {}
+    
+    return await cached_response(request, ["geofence"], produce)
+
+
+@router.get("/containing", response_model=GeofenceMembershipResponse)
+async def get_containing_geofences(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    animal_id: Optional[str] = Query(None, description="Also report fences entered/left since this animal's last ingested fix"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get every active geofence that contains the given point."""
+    membership = await GeofenceService.check_location_all(db, latitude, longitude, animal_id)
+    return {
+        "inside": [{"id": fence.id, "name": fence.name, "kind": fence.kind} for fence in membership.inside],
+        "entered": [{"id": fence.id, "name": fence.name, "kind": fence.kind} for fence in membership.entered],
+        "left": [{"id": fence_id, "name": name} for fence_id, name in membership.left.items()],
+    }
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Request
+from app.ingest.pipeline import ingest_pipeline
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+# Rejected fixes echoed back in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 10
+
+
+async def _ingest(request: Request, default_content_type: str):
+    payload = await request.body()
+    if not payload:
+        raise HTTPException(status_code=400, detail="Empty payload")
+
+    # The pipeline is started lazily so the API only runs workers when used
+    await ingest_pipeline.start()
+    content_type = request.headers.get("content-type") or default_content_type
+    accepted, errors = await ingest_pipeline.submit_payload(payload, content_type)
+    if not accepted and errors:
+        raise HTTPException(
+            status_code=422,
+            detail=[error for _, error in errors[:MAX_REPORTED_ERRORS]]
+        )
+    return {
+        "accepted": accepted,
+        "rejected": len(errors),
+        "errors": [error for _, error in errors[:MAX_REPORTED_ERRORS]]
+    }
+
+
+@router.post("", status_code=202)
+async def ingest(request: Request):
+    """
+    Ingest GPS fixes over HTTP.
+
+    ``application/json`` bodies hold one fix or an array of fixes;
+    ``application/octet-stream`` (or ``application/vnd.livestock.gps``)
+    bodies use the compact binary format.
+    """
+    return await _ingest(request, "application/json")
+
+
+@router.post("/binary", status_code=202)
+async def ingest_binary(request: Request):
+    """
+    Ingest GPS fixes in the compact binary format.
+
+    The body is a frame (header followed by records) or one bare record;
+    see ``app.ingest.binary`` for the layout. A JSON content type is still
+    honoured.
+    """
+    return await _ingest(request, "application/octet-stream")
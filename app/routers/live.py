@@ -0,0 +1,102 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.services.live_broadcaster import LiveFilter, live_broadcaster
+from app.services.spatial_index import parse_bbox
+import orjson
+
+router = APIRouter(prefix="/live", tags=["live"])
+
+ANIMAL_IDS_QUERY = Query(None, description="Comma-separated animal IDs to follow")
+BBOX_QUERY = Query(None, description="Bounding box: min_lat,min_lon,max_lat,max_lon")
+
+
+def _parse_filter(animal_ids: Optional[str], bbox: Optional[str]) -> LiveFilter:
+    ids = [i.strip() for i in animal_ids.split(",") if i.strip()] if animal_ids else None
+    box = parse_bbox(bbox) if bbox else None
+    return LiveFilter(ids, box)
+
+
+@router.get("/events")
+async def live_events(
+    request: Request,
+    animal_ids: Optional[str] = ANIMAL_IDS_QUERY,
+    bbox: Optional[str] = BBOX_QUERY
+):
+    """
+    Server-Sent Events stream of ingested positions and alerts.
+
+    Emits ``position`` and ``alert`` events whose data is the JSON fix or
+    alert. Positions are coalesced per animal for clients that fall behind.
+    """
+    try:
+        live_filter = _parse_filter(animal_ids, bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    subscriber = live_broadcaster.subscribe(live_filter)
+
+    async def generate():
+        try:
+            while not await request.is_disconnected():
+                events = await subscriber.get(timeout=settings.LIVE_KEEPALIVE_INTERVAL)
+                if not events:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"".join(
+                    b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+                    for event, payload in events
+                )
+        finally:
+            live_broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def live_websocket(
+    websocket: WebSocket,
+    animal_ids: Optional[str] = ANIMAL_IDS_QUERY,
+    bbox: Optional[str] = BBOX_QUERY
+):
+    """
+    WebSocket stream of ingested positions and alerts.
+
+    Each message is a JSON object ``{"type": "position" | "alert", "data": {...}}``.
+    """
+    try:
+        live_filter = _parse_filter(animal_ids, bbox)
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = live_broadcaster.subscribe(live_filter)
+
+    async def send():
+        while True:
+            for event, payload in await subscriber.get():
+                await websocket.send_text(orjson.dumps({"type": event, "data": payload}).decode())
+
+    async def receive():
+        # Nothing is expected from the client; this only notices the disconnect
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        live_broadcaster.unsubscribe(subscriber)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import List, Literal, Optional, Tuple
 
 
 class GPSData(BaseModel):
@@ -21,6 +21,10 @@ class AnimalLocationResponse(BaseModel):
         from_attributes = True
 
 
+class NearbyAnimalResponse(AnimalLocationResponse):
+    distance_m: float
+
+
 class AnimalLocationCreate(BaseModel):
     animal_id: str
     latitude: float
@@ -36,12 +40,17 @@ class GeofencePoint(BaseModel):
 class GeofenceBoundaryCreate(BaseModel):
     name: Optional[str] = "default"
     boundary_points: List[GeofencePoint] = Field(..., min_items=3, description="At least 3 points required for polygon")
+    # None keeps the stored value on update; new boundaries default to active containment
+    is_active: Optional[bool] = None
+    kind: Optional[Literal["containment", "exclusion", "zone"]] = None
 
 
 class GeofenceBoundaryResponse(BaseModel):
     id: int
     name: str
     boundary_points: List[GeofencePoint]
+    is_active: bool = True
+    kind: str = "containment"
     created_at: datetime
     updated_at: datetime
     
@@ -49,6 +58,18 @@ class GeofenceBoundaryResponse(BaseModel):
         from_attributes = True
 
 
+class GeofenceSummary(BaseModel):
+    id: Optional[int]
+    name: str
+    kind: Optional[str] = None
+
+
+class GeofenceMembershipResponse(BaseModel):
+    inside: List[GeofenceSummary]
+    entered: List[GeofenceSummary] = []
+    left: List[GeofenceSummary] = []
+
+
 class AlertResponse(BaseModel):
     id: int
     animal_id: str
@@ -62,6 +83,29 @@ class AlertResponse(BaseModel):
         from_attributes = True
 
 
+class AnimalRollupResponse(BaseModel):
+    animal_id: str
+    period: str
+    bucket_start: datetime
+    fix_count: int
+    distance_m: float
+    active_seconds: float
+    inside_seconds: float
+    outside_seconds: float
+    first_timestamp: datetime
+    last_timestamp: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class AlertCount(BaseModel):
+    key: Optional[str] = None
+    count: int
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+
+
 class AlertCreate(BaseModel):
     animal_id: str
     latitude: float
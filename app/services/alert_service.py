@@ -1,8 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from typing import List, Optional
+from sqlalchemy import select, desc, insert, or_, func
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from app.models import Alert
 from app.schemas import AlertCreate, AlertResponse
+from app.services.response_cache import response_cache
+from app.utils.pagination import Cursor
 
 
 class AlertService:
@@ -23,20 +26,135 @@ class AlertService:
         session.add(alert)
         await session.commit()
         await session.refresh(alert)
+        response_cache.invalidate("alerts")
         return alert
-    
+
+    @staticmethod
+    async def create_alerts_bulk(
+        session: AsyncSession,
+        alerts: Sequence[AlertCreate]
+    ) -> int:
+        """Insert many alert records with a single multi-row INSERT."""
+        if not alerts:
+            return 0
+
+        await session.execute(
+            insert(Alert).values([
+                {
+                    "animal_id": alert.animal_id,
+                    "latitude": alert.latitude,
+                    "longitude": alert.longitude,
+                    "timestamp": alert.timestamp,
+                    "alert_type": alert.alert_type,
+                    "message": alert.message,
+                }
+                for alert in alerts
+            ])
+        )
+        await session.commit()
+        response_cache.invalidate("alerts")
+        return len(alerts)
+
+    @staticmethod
+    def _filtered(
+        query,
+        animal_id: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ):
+        if animal_id:
+            query = query.where(Alert.animal_id == animal_id)
+        if alert_type:
+            query = query.where(Alert.alert_type == alert_type)
+        if start_date:
+            query = query.where(Alert.timestamp >= start_date)
+        if end_date:
+            query = query.where(Alert.timestamp <= end_date)
+        return query
+
+    @staticmethod
+    async def get_alerts_page(
+        session: AsyncSession,
+        animal_id: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None
+    ) -> Tuple[List[Alert], Optional[Cursor]]:
+        """
+        Get one page of alerts matching the filters, newest first.
+        
+        Pages are keyed on (timestamp, id). With animal_id or alert_type set
+        the query walks the matching (column, timestamp) index, otherwise
+        ix_alerts_timestamp.
+        
+        Returns:
+            Tuple of (alerts, cursor for the next page or None)
+        """
+        query = AlertService._filtered(select(Alert), animal_id, alert_type, start_date, end_date)
+        
+        if cursor:
+            last_timestamp, last_id = cursor
+            query = query.where(
+                Alert.timestamp <= last_timestamp,
+                or_(Alert.timestamp < last_timestamp, Alert.id < last_id)
+            )
+        
+        query = query.order_by(desc(Alert.timestamp), desc(Alert.id)).limit(limit + 1)
+        
+        result = await session.execute(query)
+        alerts = list(result.scalars().all())
+        
+        if len(alerts) <= limit:
+            return alerts, None
+        
+        alerts = alerts[:limit]
+        return alerts, (alerts[-1].timestamp, alerts[-1].id)
+
+    @staticmethod
+    async def count_alerts(
+        session: AsyncSession,
+        animal_id: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        group_by: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Count alerts matching the filters, optionally per animal or per type.
+        
+        Args:
+            group_by: None, "animal_id" or "alert_type"
+            
+        Returns:
+            One dict per group (a single one without group_by) with key,
+            count, first_timestamp and last_timestamp; largest groups first
+        """
+        columns = [
+            func.count().label("count"),
+            func.min(Alert.timestamp).label("first_timestamp"),
+            func.max(Alert.timestamp).label("last_timestamp"),
+        ]
+        if group_by:
+            key = getattr(Alert, group_by)
+            query = select(key.label("key"), *columns).group_by(key).order_by(desc("count"), key)
+        else:
+            query = select(*columns)
+        
+        query = AlertService._filtered(query, animal_id, alert_type, start_date, end_date)
+        result = await session.execute(query)
+        return [{"key": None, **row._mapping} for row in result]
+
     @staticmethod
     async def get_all_alerts(
         session: AsyncSession,
         limit: int = 100
     ) -> List[Alert]:
         """Get all alerts, ordered by most recent."""
-        result = await session.execute(
-            select(Alert)
-            .order_by(desc(Alert.timestamp))
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+        alerts, _ = await AlertService.get_alerts_page(session, limit=limit)
+        return alerts
     
     @staticmethod
     async def get_alerts_by_animal(
@@ -45,11 +163,5 @@ class AlertService:
         limit: int = 100
     ) -> List[Alert]:
         """Get alerts for a specific animal."""
-        result = await session.execute(
-            select(Alert)
-            .where(Alert.animal_id == animal_id)
-            .order_by(desc(Alert.timestamp))
-            .limit(limit)
-        )
-        return list(result.scalars().all())
-
+        alerts, _ = await AlertService.get_alerts_page(session, animal_id=animal_id, limit=limit)
+        return alerts
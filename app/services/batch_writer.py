@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import init_db
+from app.services.alert_service import AlertService
+from app.services.location_service import LocationService
+
+logger = logging.getLogger(__name__)
+
+FlushFunc = Callable[[AsyncSession, Sequence[Any]], Awaitable[int]]
+BatchCallback = Callable[[List[Any]], None]
+
+_STOP = object()
+
+
+class BatchMetrics:
+    """Running counters for the batches flushed by a BatchWriter."""
+
+    __slots__ = (
+        "batches", "rows", "retries", "failed_batches", "failed_rows",
+        "last_batch_size", "last_flush_seconds", "total_flush_seconds",
+    )
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.retries = 0
+        self.failed_batches = 0
+        self.failed_rows = 0
+        self.last_batch_size = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def record(self, size: int, seconds: float, ok: bool = True) -> None:
+        self.last_batch_size = size
+        self.last_flush_seconds = seconds
+        self.total_flush_seconds += seconds
+        if ok:
+            self.batches += 1
+            self.rows += size
+        else:
+            self.failed_batches += 1
+            self.failed_rows += size
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BatchWriter:
+    """
+    Collect items in a bounded in-memory queue and persist them in batches.
+
+    A batch is flushed when it reaches ``batch_size`` items or when
+    ``flush_interval`` seconds have passed since its first item arrived,
+    whichever comes first. ``submit`` blocks while the queue is full, which
+    pushes back on producers instead of growing memory without limit.
+
+    A failed flush is retried up to ``retries`` times with exponential
+    backoff, so a failover or pool timeout does not lose the batch; while it
+    retries, new items wait in the queue. ``on_flushed`` is called with each
+    batch once it is stored and ``on_failed`` with each batch that is dropped.
+    """
+
+    def __init__(
+        self,
+        flush_func: FlushFunc,
+        name: str = "batch",
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue_size: Optional[int] = None,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+        retry_max_delay: Optional[float] = None,
+        on_flushed: Optional[BatchCallback] = None,
+        on_failed: Optional[BatchCallback] = None,
+    ):
+        self.flush_func = flush_func
+        self.name = name
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.INGEST_FLUSH_INTERVAL
+        self.max_queue_size = max_queue_size or settings.INGEST_QUEUE_MAXSIZE
+        self.retries = settings.INGEST_FLUSH_RETRIES if retries is None else retries
+        self.retry_delay = settings.INGEST_FLUSH_RETRY_DELAY if retry_delay is None else retry_delay
+        self.retry_max_delay = (
+            settings.INGEST_FLUSH_RETRY_MAX_DELAY if retry_max_delay is None else retry_max_delay
+        )
+        self.on_flushed = on_flushed
+        self.on_failed = on_failed
+        self._session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = BatchMetrics()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Start the background flush task (idempotent)."""
+        if self.running:
+            return
+        if self._session_factory is None:
+            self._session_factory = init_db()[1]
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run(), name=f"{self.name}-writer")
+
+    async def submit(self, item: Any) -> None:
+        """Queue an item for the next batch, waiting if the queue is full."""
+        if not self.running:
+            await self.start()
+        await self._queue.put(item)
+
+    async def submit_many(self, items: Sequence[Any]) -> None:
+        for item in items:
+            await self.submit(item)
+
+    async def stop(self) -> None:
+        """Flush everything queued so far and stop the background task."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+
+            batch: List[Any] = [item]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+
+            while len(batch) < self.batch_size:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Any]) -> None:
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                async with self._session_factory() as session:
+                    await self.flush_func(session, batch)
+                break
+            except Exception:
+                if attempt >= self.retries:
+                    elapsed = time.perf_counter() - started
+                    self.metrics.record(len(batch), elapsed, ok=False)
+                    logger.exception(
+                        "%s writer failed to flush %d rows after %d attempts; dropping them",
+                        self.name, len(batch), attempt + 1,
+                    )
+                    if self.on_failed is not None:
+                        self.on_failed(batch)
+                    return
+                delay = min(self.retry_delay * 2 ** attempt, self.retry_max_delay)
+                attempt += 1
+                self.metrics.retries += 1
+                logger.warning(
+                    "%s writer failed to flush %d rows (attempt %d), retrying in %.1f s",
+                    self.name, len(batch), attempt, delay, exc_info=True,
+                )
+                await asyncio.sleep(delay)
+
+        elapsed = time.perf_counter() - started
+        self.metrics.record(len(batch), elapsed)
+        logger.debug(
+            "%s writer flushed %d rows in %.1f ms (queue depth %d)",
+            self.name, len(batch), elapsed * 1000, self.pending,
+        )
+        if self.on_flushed is not None:
+            self.on_flushed(batch)
+
+
+def create_location_writer(name: str = "locations", **kwargs) -> BatchWriter:
+    return BatchWriter(LocationService.create_locations_bulk, name=name, **kwargs)
+
+
+def create_alert_writer(name: str = "alerts", **kwargs) -> BatchWriter:
+    return BatchWriter(AlertService.create_alerts_bulk, name=name, **kwargs)
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+import orjson
+from app.config import settings
+from app.schemas import AlertCreate, GPSData
+
+logger = logging.getLogger(__name__)
+
+INSIDE = "inside"
+OUTSIDE = "outside"
+
+BREACH_ALERT = "geofence_breach"
+RETURN_ALERT = "geofence_return"
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Fixes without an offset are taken to be UTC
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class BreachState:
+    """Geofence state of one animal."""
+
+    __slots__ = ("state", "streak", "last_timestamp", "last_breach_alert", "last_return_alert")
+
+    def __init__(
+        self,
+        state: str = INSIDE,
+        streak: int = 0,
+        last_timestamp: Optional[datetime] = None,
+        last_breach_alert: Optional[datetime] = None,
+        last_return_alert: Optional[datetime] = None
+    ):
+        self.state = state
+        # Consecutive fixes disagreeing with ``state``
+        self.streak = streak
+        self.last_timestamp = last_timestamp
+        self.last_breach_alert = last_breach_alert
+        self.last_return_alert = last_return_alert
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in ((name, getattr(self, name)) for name in self.__slots__)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BreachState":
+        return cls(**{
+            name: datetime.fromisoformat(value) if name.startswith("last_") and value else value
+            for name, value in data.items()
+            if name in cls.__slots__
+        })
+
+
+class BreachStats:
+    """Counters for BreachTracker."""
+
+    __slots__ = ("observed", "late", "breaches", "returns", "suppressed")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BreachTracker:
+    """
+    Per-animal inside/outside state machine for geofence alerting.
+
+    Alerts are raised only on transitions: ``geofence_breach`` when an animal
+    that was inside is seen outside for ``exit_fixes`` consecutive fixes, and
+    ``geofence_return`` once it is back inside for ``return_fixes`` fixes.
+    The hysteresis keeps GPS jitter along the fence from flapping the state.
+    A transition within ``cooldown`` seconds (fix time) of the previous alert
+    of the same type still changes the state but raises no alert.
+
+    Fixes older than the newest one seen for the animal are ignored, so late
+    deliveries cannot flip the state. Animals start out inside. State lives
+    in memory and is written to ``snapshot_path`` periodically and on stop,
+    so a restart does not re-alert every animal that is already out.
+    """
+
+    def __init__(
+        self,
+        exit_fixes: Optional[int] = None,
+        return_fixes: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        snapshot_path: Optional[str] = None
+    ):
+        self.exit_fixes = exit_fixes or settings.BREACH_EXIT_FIXES
+        self.return_fixes = return_fixes or settings.BREACH_RETURN_FIXES
+        self.cooldown = timedelta(
+            seconds=settings.BREACH_ALERT_COOLDOWN if cooldown is None else cooldown
+        )
+        self.snapshot_path = snapshot_path or settings.BREACH_SNAPSHOT_PATH
+        self.stats = BreachStats()
+        self._states: Dict[str, BreachState] = {}
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def state(self, animal_id: str) -> Optional[str]:
+        """Current state of an animal, or None if it has not been seen."""
+        entry = self._states.get(animal_id)
+        return entry.state if entry else None
+
+    def forget(self, animal_id: str) -> None:
+        """Drop an animal's state; its next fix starts it out inside again."""
+        self._states.pop(animal_id, None)
+
+    def observe(self, animal_id: str, inside: bool, timestamp: datetime) -> Optional[str]:
+        """
+        Feed one geofence result into the state machine.
+
+        Returns:
+            The alert type to raise, or None
+        """
+        timestamp = _utc(timestamp)
+        entry = self._states.get(animal_id)
+        if entry is None:
+            entry = self._states[animal_id] = BreachState()
+        elif entry.last_timestamp is not None and timestamp <= entry.last_timestamp:
+            self.stats.late += 1
+            return None
+        entry.last_timestamp = timestamp
+        self.stats.observed += 1
+
+        observed = INSIDE if inside else OUTSIDE
+        if observed == entry.state:
+            entry.streak = 0
+            return None
+
+        entry.streak += 1
+        if entry.streak < (self.exit_fixes if observed == OUTSIDE else self.return_fixes):
+            return None
+
+        entry.state = observed
+        entry.streak = 0
+        if observed == OUTSIDE:
+            self.stats.breaches += 1
+            alert_type, last_alert = BREACH_ALERT, entry.last_breach_alert
+        else:
+            self.stats.returns += 1
+            alert_type, last_alert = RETURN_ALERT, entry.last_return_alert
+
+        if last_alert is not None and timestamp - last_alert < self.cooldown:
+            self.stats.suppressed += 1
+            return None
+        if observed == OUTSIDE:
+            entry.last_breach_alert = timestamp
+        else:
+            entry.last_return_alert = timestamp
+        return alert_type
+
+    def observe_many(self, fixes: Sequence[GPSData], inside: Sequence[bool]) -> List[AlertCreate]:
+        """Feed a batch of fixes in order; returns the alerts to raise."""
+        alerts = []
+        for fix, is_inside in zip(fixes, inside):
+            alert_type = self.observe(fix.animal_id, is_inside, fix.timestamp)
+            if alert_type is None:
+                continue
+            if alert_type == BREACH_ALERT:
+                message = f"Animal {fix.animal_id} is outside the geofence boundary"
+            else:
+                message = f"Animal {fix.animal_id} is back inside the geofence boundary"
+            alerts.append(AlertCreate(
+                animal_id=fix.animal_id,
+                latitude=fix.latitude,
+                longitude=fix.longitude,
+                timestamp=fix.timestamp,
+                alert_type=alert_type,
+                message=message
+            ))
+        return alerts
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {animal_id: entry.to_dict() for animal_id, entry in self._states.items()}
+
+    def restore(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        self._states = {
+            animal_id: BreachState.from_dict(data) for animal_id, data in snapshot.items()
+        }
+
+    def save(self, snapshot: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """Atomically write the state to ``snapshot_path`` (no-op without one)."""
+        if not self.snapshot_path:
+            return
+        if snapshot is None:
+            snapshot = self.snapshot()
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(snapshot))
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load(self) -> bool:
+        """Restore state from ``snapshot_path``; returns False if there is none."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                self.restore(orjson.loads(f.read()))
+        except (OSError, ValueError, TypeError):
+            logger.exception("Ignoring unreadable breach state snapshot %s", self.snapshot_path)
+            return False
+        return True
+
+    async def start(self, interval: Optional[float] = None) -> None:
+        """Load the last snapshot and start periodic snapshots (idempotent)."""
+        if self._snapshot_task is not None or not self.snapshot_path:
+            return
+        self.load()
+        interval = interval or settings.BREACH_SNAPSHOT_INTERVAL
+        self._snapshot_task = asyncio.create_task(self._run(interval), name="breach-snapshots")
+
+    async def stop(self) -> None:
+        """Stop periodic snapshots and write a final one."""
+        if self._snapshot_task is None:
+            return
+        self._snapshot_task.cancel()
+        try:
+            await self._snapshot_task
+        except asyncio.CancelledError:
+            pass
+        self._snapshot_task = None
+        self.save()
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            # Copy on the loop so workers never mutate state mid-serialisation
+            snapshot = self.snapshot()
+            try:
+                await asyncio.to_thread(self.save, snapshot)
+            except OSError:
+                logger.exception("Failed to write breach state snapshot %s", self.snapshot_path)
+
+
+breach_tracker = BreachTracker()
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import functools
+import io
+import logging
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import init_db
+from app.models import AnimalLocation
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when pyarrow, which the columnar export needs, is not installed."""
+
+
+def require_pyarrow():
+    """Import pyarrow on first use; nothing else in the app needs it."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ExportUnavailable("Columnar export requires pyarrow (pip install pyarrow)") from exc
+    return pyarrow
+
+
+@functools.lru_cache(maxsize=None)
+def location_schema():
+    """Arrow schema of exported ``animal_locations`` rows."""
+    pa = require_pyarrow()
+    return pa.schema([
+        ("id", pa.int64()),
+        ("animal_id", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+class ExportService:
+    """
+    Columnar export of location history.
+
+    Rows are read through a server-side cursor in ``chunk_size`` chunks and
+    each chunk is transposed straight into an Arrow record batch, so memory
+    is bounded by one chunk and no ORM objects are built.
+    """
+
+    @staticmethod
+    def to_record_batch(rows: Sequence[Any]):
+        """Build a record batch from (id, animal_id, latitude, longitude, timestamp) rows."""
+        pa = require_pyarrow()
+        schema = location_schema()
+        # Naive timestamps (SQLite) are taken to be UTC
+        columns = zip(*rows) if rows else ((),) * len(schema)
+        return pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+
+    @staticmethod
+    async def stream_record_batches(
+        session: AsyncSession,
+        animal_ids: Optional[Sequence[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Stream locations of ``animal_ids`` (default: every animal) in the range
+        as Arrow record batches, ordered by timestamp.
+        """
+        chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        query = select(
+            AnimalLocation.id,
+            AnimalLocation.animal_id,
+            AnimalLocation.latitude,
+            AnimalLocation.longitude,
+            AnimalLocation.timestamp,
+        )
+        if animal_ids:
+            query = query.where(AnimalLocation.animal_id.in_(animal_ids))
+        if start_date:
+            query = query.where(AnimalLocation.timestamp >= start_date)
+        if end_date:
+            query = query.where(AnimalLocation.timestamp <= end_date)
+        query = query.order_by(AnimalLocation.timestamp, AnimalLocation.id)
+
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            yield ExportService.to_record_batch(rows)
+
+    @staticmethod
+    async def stream_arrow_ipc(
+        session: AsyncSession,
+        animal_ids: Optional[Sequence[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Encode the exported batches as an Arrow IPC stream, one message at a time."""
+        pa = require_pyarrow()
+        sink = io.BytesIO()
+        writer = pa.ipc.new_stream(sink, location_schema())
+        async for batch in ExportService.stream_record_batches(
+            session, animal_ids, start_date, end_date, chunk_size
+        ):
+            writer.write_batch(batch)
+            yield _drain(sink)
+        writer.close()
+        yield _drain(sink)
+
+    @staticmethod
+    async def write_parquet(
+        session: AsyncSession,
+        directory: str,
+        animal_ids: Optional[Sequence[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+        compression: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Write the export as a Parquet dataset partitioned by UTC date.
+
+        Each day goes to ``directory/date=YYYY-MM-DD/part-0.parquet`` (Hive
+        style, so pyarrow, pandas, DuckDB and Spark read the directory as one
+        dataset), one row group per chunk. A day that was already exported
+        to ``directory`` is replaced.
+
+        Returns:
+            Rows written and the files created
+        """
+        pq = require_pyarrow().parquet
+        compression = compression or settings.EXPORT_PARQUET_COMPRESSION
+        writer = None
+        current_day = None
+        files: List[str] = []
+        rows = 0
+        try:
+            async for batch in ExportService.stream_record_batches(
+                session, animal_ids, start_date, end_date, chunk_size
+            ):
+                days = batch.column("timestamp").to_numpy().astype("datetime64[D]")
+                # Batches are in timestamp order, so each day is one contiguous run
+                bounds = [0, *(np.flatnonzero(days[1:] != days[:-1]) + 1).tolist(), len(days)]
+                for begin, end in zip(bounds, bounds[1:]):
+                    day = str(days[begin])
+                    if day != current_day:
+                        if writer is not None:
+                            writer.close()
+                        path = os.path.join(directory, f"date={day}", "part-0.parquet")
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        writer = pq.ParquetWriter(path, location_schema(), compression=compression)
+                        files.append(path)
+                        current_day = day
+                    writer.write_batch(batch.slice(begin, end - begin))
+                rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        return {"rows": rows, "files": files}
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Export location history to Parquet, partitioned by date")
+    parser.add_argument("directory")
+    parser.add_argument("--ids", default=None, help="Comma-separated animal IDs (default: all animals)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--compression", default=None)
+    args = parser.parse_args()
+
+    animal_ids = [i.strip() for i in args.ids.split(",") if i.strip()] if args.ids else None
+    _, session_factory = init_db()
+    async with session_factory() as session:
+        result = await ExportService.write_parquet(
+            session, args.directory, animal_ids, args.start, args.end, args.chunk_size, args.compression
+        )
+    print(f"Exported {result['rows']} locations to {len(result['files'])} files under {args.directory}")
+
+
+if __name__ == "__main__":
+    # e.g. python -m app.services.export_service exports/ --start 2026-09-01T00:00:00Z
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
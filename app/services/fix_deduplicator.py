@@ -0,0 +1,144 @@
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.config import settings
+from app.schemas import GPSData
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Naive timestamps are UTC; normalising keeps them equal to their aware form
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class DedupStats:
+    """Counters for FixDeduplicator."""
+
+    __slots__ = ("passed", "duplicates", "out_of_order")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _RecentFixes:
+    """
+    The last few timestamps stored for one animal, those still being written,
+    plus the newest seen and the newest stored.
+    """
+
+    __slots__ = ("ring", "members", "pending", "latest", "stored_latest")
+
+    def __init__(self):
+        self.ring: deque = deque()
+        self.members = set()
+        self.pending = set()
+        self.latest: Optional[datetime] = None
+        self.stored_latest: Optional[datetime] = None
+
+
+class FixDeduplicator:
+    """
+    Drop GPS fixes already seen for the same animal and timestamp.
+
+    Collars replay buffered fixes after a coverage gap, so the same fix can
+    arrive more than once and out of order. The last ``window`` timestamps
+    of each animal are kept in a ring with a set alongside for constant-time
+    lookups, so a replayed fix within that window is dropped before it
+    reaches geofencing, rollups and the database. Older duplicates are left
+    to the unique (animal_id, timestamp) index, where the insert skips them.
+    Unlike a Bloom filter the ring never drops a fix it has not seen.
+
+    A fix only enters the ring once ``record`` confirms it was written. Until
+    then it is pending: copies arriving meanwhile are still dropped, but if
+    the write fails, or the batch never reaches the writer, ``forget``
+    releases it so a later replay gets through and rolls the animal's newest
+    timestamp back to what is stored or still pending.
+
+    Each fix is also flagged as newest-so-far for its animal or not, so late
+    fixes can be stored without being shown as the animal's live position.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = settings.INGEST_DEDUP_WINDOW if window is None else window
+        self.stats = DedupStats()
+        self._animals: Dict[str, _RecentFixes] = {}
+
+    def __len__(self) -> int:
+        return len(self._animals)
+
+    def filter(self, fixes: Sequence[GPSData]) -> Tuple[List[GPSData], List[bool]]:
+        """
+        Remove fixes seen before and mark the rest pending.
+
+        Returns:
+            Tuple of (new fixes in arrival order, whether each one is the
+            newest fix seen so far for its animal)
+        """
+        fresh: List[GPSData] = []
+        newest: List[bool] = []
+        window = self.window
+
+        for fix in fixes:
+            recent = self._animals.get(fix.animal_id)
+            if recent is None:
+                recent = self._animals[fix.animal_id] = _RecentFixes()
+            timestamp = _utc(fix.timestamp)
+
+            if window and (timestamp in recent.members or timestamp in recent.pending):
+                self.stats.duplicates += 1
+                continue
+            recent.pending.add(timestamp)
+
+            if recent.latest is None or timestamp > recent.latest:
+                recent.latest = timestamp
+                newest.append(True)
+            else:
+                self.stats.out_of_order += 1
+                newest.append(False)
+            fresh.append(fix)
+
+        self.stats.passed += len(fresh)
+        return fresh, newest
+
+    def record(self, fixes: Sequence[GPSData]) -> None:
+        """Move written fixes from pending into the ring of stored timestamps."""
+        window = self.window
+        for fix in fixes:
+            recent = self._animals.get(fix.animal_id)
+            if recent is None:
+                continue
+            timestamp = _utc(fix.timestamp)
+            recent.pending.discard(timestamp)
+            if recent.stored_latest is None or timestamp > recent.stored_latest:
+                recent.stored_latest = timestamp
+            if not window or timestamp in recent.members:
+                continue
+            recent.ring.append(timestamp)
+            recent.members.add(timestamp)
+            if len(recent.ring) > window:
+                recent.members.discard(recent.ring.popleft())
+
+    def forget(self, fixes: Sequence[GPSData]) -> None:
+        """Release pending fixes that were not written, so replays are accepted."""
+        touched = set()
+        for fix in fixes:
+            recent = self._animals.get(fix.animal_id)
+            if recent is not None:
+                recent.pending.discard(_utc(fix.timestamp))
+                touched.add(fix.animal_id)
+        for animal_id in touched:
+            recent = self._animals[animal_id]
+            candidates = [*recent.pending, recent.stored_latest]
+            recent.latest = max((t for t in candidates if t is not None), default=None)
+
+    def clear(self) -> None:
+        self._animals.clear()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"tracked_animals": len(self._animals), "window": self.window, **self.stats.snapshot()}
+
+
+fix_deduplicator = FixDeduplicator()
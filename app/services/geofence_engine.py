@@ -0,0 +1,360 @@
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import shapely
+from shapely.geometry import Point, Polygon
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import GeofenceBoundary
+from app.schemas import AlertCreate, GPSData
+
+# Used when no boundary is configured or the stored one cannot be parsed
+DEFAULT_BOUNDARY: List[Tuple[float, float]] = [
+    (12.9710, 77.5940),
+    (12.9720, 77.5945),
+    (12.9730, 77.5930),
+    (12.9715, 77.5920)
+]
+
+ENTER_ALERT = "geofence_enter"
+EXIT_ALERT = "geofence_exit"
+
+# An animal should stay inside a containment fence, must stay out of an
+# exclusion fence and may come and go from a zone (e.g. a water point)
+CONTAINMENT = "containment"
+EXCLUSION = "exclusion"
+ZONE = "zone"
+
+
+def parse_points(raw: str) -> List[Tuple[float, float]]:
+    """Parse a boundary_points JSON string into (lat, lon) tuples."""
+    try:
+        points_data = json.loads(raw)
+        return [(point["latitude"], point["longitude"]) for point in points_data]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return []
+
+
+def as_coordinate_arrays(lats: Any, lons: Any = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normalise bulk coordinates to float64 latitude/longitude arrays.
+
+    ``lats`` is either an array-like of latitudes (with ``lons`` alongside it)
+    or a sequence of objects with ``latitude``/``longitude`` attributes such as
+    ``GPSData``, in which case ``lons`` is omitted.
+    """
+    if lons is None:
+        fixes: Sequence[Any] = lats
+        lat_array = np.fromiter((fix.latitude for fix in fixes), dtype=np.float64, count=len(fixes))
+        lon_array = np.fromiter((fix.longitude for fix in fixes), dtype=np.float64, count=len(fixes))
+        return lat_array, lon_array
+
+    lat_array = np.asarray(lats, dtype=np.float64)
+    lon_array = np.asarray(lons, dtype=np.float64)
+    if lat_array.shape != lon_array.shape:
+        raise ValueError("lats and lons must have the same shape")
+    return lat_array, lon_array
+
+
+class CompiledGeofence:
+    """A geofence polygon built once and prepared for repeated containment checks."""
+
+    __slots__ = ("id", "name", "updated_at", "points", "kind", "polygon", "prepared")
+
+    def __init__(
+        self,
+        boundary_id: Optional[int],
+        name: str,
+        updated_at: Optional[datetime],
+        points: List[Tuple[float, float]],
+        kind: str = CONTAINMENT
+    ):
+        self.id = boundary_id
+        self.name = name
+        self.updated_at = updated_at
+        self.points = points
+        self.kind = kind
+        # Shapely expects (x, y) = (lon, lat)
+        self.polygon = Polygon([(lon, lat) for lat, lon in points])
+        self.prepared = prep(self.polygon)
+        # Prepares the polygon in place for the vectorized predicates
+        shapely.prepare(self.polygon)
+
+    @property
+    def key(self) -> Tuple[Optional[int], Optional[datetime]]:
+        return self.id, self.updated_at
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        return self.prepared.contains(Point(longitude, latitude))
+
+    def contains_many(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Vectorized containment check returning a boolean mask."""
+        return shapely.contains_xy(self.polygon, lons, lats)
+
+
+class GeofenceIndex:
+    """
+    STRtree over a set of compiled geofences.
+
+    A point is in bounds when it is inside a containment fence (or there are
+    none) and outside every exclusion fence; zones do not affect it.
+    """
+
+    __slots__ = ("source_key", "fences", "tree", "_kinds", "_has_containment")
+
+    def __init__(self, fences: List[CompiledGeofence], source_key: Tuple = ()):
+        self.source_key = source_key
+        self.fences = fences
+        self.tree = STRtree([fence.polygon for fence in fences])
+        self._kinds = np.array([fence.kind for fence in fences], dtype=object)
+        self._has_containment = any(fence.kind == CONTAINMENT for fence in fences)
+
+    def in_bounds(self, containing: List[CompiledGeofence]) -> bool:
+        """Whether a point inside exactly ``containing`` is in bounds."""
+        kinds = {fence.kind for fence in containing}
+        return (
+            (CONTAINMENT in kinds or not self._has_containment)
+            and EXCLUSION not in kinds
+        )
+
+    def in_bounds_many(self, pairs: np.ndarray, count: int) -> np.ndarray:
+        """Bounds mask for ``count`` points from ``containing_many`` pairs."""
+        kinds = self._kinds[pairs[1]]
+        if self._has_containment:
+            inside = np.zeros(count, dtype=bool)
+            inside[pairs[0][kinds == CONTAINMENT]] = True
+        else:
+            inside = np.ones(count, dtype=bool)
+        inside[pairs[0][kinds == EXCLUSION]] = False
+        return inside
+
+    def containing(self, latitude: float, longitude: float) -> List[CompiledGeofence]:
+        """Fences containing the point; only nearby fences are tested exactly."""
+        if not self.fences:
+            return []
+        indices = self.tree.query(Point(longitude, latitude), predicate="within")
+        return [self.fences[i] for i in sorted(indices)]
+
+    def containing_many(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Bulk containment against every fence.
+
+        Returns:
+            Array of shape (2, n) with (point index, fence index) pairs
+        """
+        if not self.fences:
+            return np.empty((2, 0), dtype=np.intp)
+        return self.tree.query(shapely.points(lons, lats), predicate="within")
+
+    def containing_each(
+        self,
+        lats: np.ndarray,
+        lons: np.ndarray
+    ) -> Tuple[np.ndarray, List[List[CompiledGeofence]]]:
+        """
+        Bulk containment grouped by point.
+
+        Returns:
+            Tuple of (mask of points in bounds, fences containing each point)
+        """
+        pairs = self.containing_many(lats, lons)
+        inside = self.in_bounds_many(pairs, len(lats))
+        fences: List[List[CompiledGeofence]] = [[] for _ in range(len(lats))]
+        for point, fence in zip(*pairs[:, np.lexsort(pairs[::-1])].tolist()):
+            fences[point].append(self.fences[fence])
+        return inside, fences
+
+
+class FenceMembership:
+    """Fences a point is inside, plus the changes since the animal's previous fix."""
+
+    __slots__ = ("inside", "entered", "left")
+
+    def __init__(
+        self,
+        inside: List[CompiledGeofence],
+        entered: List[CompiledGeofence],
+        left: Dict[int, str]
+    ):
+        self.inside = inside
+        self.entered = entered
+        # Fences that were left may no longer be in the index, so keep id -> name
+        self.left = left
+
+    def alerts(self, fix: GPSData) -> List[AlertCreate]:
+        """``geofence_enter``/``geofence_exit`` alerts for the named fences that changed."""
+        alerts = [
+            AlertCreate(
+                animal_id=fix.animal_id,
+                latitude=fix.latitude,
+                longitude=fix.longitude,
+                timestamp=fix.timestamp,
+                alert_type=ENTER_ALERT,
+                message=f"Animal {fix.animal_id} entered geofence {fence.name}"
+            )
+            for fence in self.entered
+            if fence.id is not None
+        ]
+        alerts.extend(
+            AlertCreate(
+                animal_id=fix.animal_id,
+                latitude=fix.latitude,
+                longitude=fix.longitude,
+                timestamp=fix.timestamp,
+                alert_type=EXIT_ALERT,
+                message=f"Animal {fix.animal_id} left geofence {name}"
+            )
+            for fence_id, name in self.left.items()
+            if fence_id is not None
+        )
+        return alerts
+
+
+class GeofenceEngine:
+    """
+    Cache of compiled geofences keyed on ``(id, updated_at)``.
+
+    The id/updated_at of the current boundary is re-read at most once every
+    ``ttl`` seconds, so processes that do not see ``invalidate`` calls (e.g. a
+    separate MQTT listener) still pick up edits. The polygon itself is only
+    rebuilt when that key changes.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.GEOFENCE_CACHE_TTL if ttl is None else ttl
+        self._compiled: Dict[Tuple[int, datetime], CompiledGeofence] = {}
+        self._current: Optional[CompiledGeofence] = None
+        self._checked_at = 0.0
+        self.default = CompiledGeofence(None, "default", None, DEFAULT_BOUNDARY)
+        self._index: Optional[GeofenceIndex] = None
+        self._index_checked_at = 0.0
+        self._memberships: Dict[str, Dict[Optional[int], str]] = {}
+
+    def compile(self, boundary: GeofenceBoundary) -> CompiledGeofence:
+        """Return the compiled form of a boundary row, building it on first use."""
+        key = (boundary.id, boundary.updated_at)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        points = parse_points(boundary.boundary_points)
+        if len(points) < 3:
+            # Cached too, so a bad row is not refetched on every revalidation
+            compiled = self.default
+        else:
+            compiled = CompiledGeofence(
+                boundary.id, boundary.name, boundary.updated_at, points, boundary.kind or CONTAINMENT
+            )
+        # Older versions of the same boundary are no longer reachable
+        for stale_key in [k for k in self._compiled if k[0] == boundary.id]:
+            del self._compiled[stale_key]
+        self._compiled[key] = compiled
+        return compiled
+
+    async def get_current(self, session: AsyncSession) -> CompiledGeofence:
+        """Get the compiled most-recently-updated boundary (or the default)."""
+        now = time.monotonic()
+        if self._current is not None and now - self._checked_at < self.ttl:
+            return self._current
+
+        result = await session.execute(
+            select(GeofenceBoundary.id, GeofenceBoundary.updated_at)
+            .where(GeofenceBoundary.is_active.is_(True))
+            .order_by(GeofenceBoundary.updated_at.desc())
+            .limit(1)
+        )
+        row = result.first()
+
+        if row is None:
+            current = self.default
+        else:
+            current = self._compiled.get((row.id, row.updated_at))
+            if current is None:
+                boundary = await session.get(GeofenceBoundary, row.id)
+                current = self.compile(boundary) if boundary else self.default
+
+        self._current = current
+        self._checked_at = now
+        return current
+
+    async def get_index(self, session: AsyncSession) -> GeofenceIndex:
+        """
+        Get a spatial index over every active boundary.
+
+        Boundaries with fewer than 3 valid points are left out; the default
+        boundary stands in when no usable containment fence remains.
+        """
+        now = time.monotonic()
+        if self._index is not None and now - self._index_checked_at < self.ttl:
+            return self._index
+
+        result = await session.execute(
+            select(GeofenceBoundary.id, GeofenceBoundary.updated_at)
+            .where(GeofenceBoundary.is_active.is_(True))
+            .order_by(GeofenceBoundary.id)
+        )
+        keys = tuple((row.id, row.updated_at) for row in result)
+
+        if self._index is None or self._index.source_key != keys:
+            missing = [boundary_id for boundary_id, updated_at in keys
+                       if (boundary_id, updated_at) not in self._compiled]
+            if missing:
+                result = await session.execute(
+                    select(GeofenceBoundary).where(GeofenceBoundary.id.in_(missing))
+                )
+                for boundary in result.scalars():
+                    self.compile(boundary)
+
+            fences = [
+                self._compiled[key] for key in keys
+                if key in self._compiled and self._compiled[key] is not self.default
+            ]
+            # Without a usable containment fence every fix would be in bounds
+            if not any(fence.kind == CONTAINMENT for fence in fences):
+                fences.insert(0, self.default)
+            self._index = GeofenceIndex(fences, keys)
+
+        self._index_checked_at = now
+        return self._index
+
+    def update_membership(
+        self,
+        animal_id: str,
+        inside: List[CompiledGeofence],
+        record: bool = True
+    ) -> FenceMembership:
+        """
+        Diff the fences an animal is in against those recorded for it and,
+        unless ``record`` is False, record the new set. An animal's first
+        recorded set is its baseline and reports nothing entered or left.
+        """
+        current = {fence.id: fence.name for fence in inside}
+        previous = self._memberships.get(animal_id)
+        if record:
+            self._memberships[animal_id] = current
+        if previous is None:
+            return FenceMembership(inside, [], {})
+
+        entered = [fence for fence in inside if fence.id not in previous]
+        left = {fence_id: name for fence_id, name in previous.items() if fence_id not in current}
+        return FenceMembership(inside, entered, left)
+
+    def invalidate(self, boundary_id: Optional[int] = None) -> None:
+        """Drop cached geometry after a boundary is created or updated."""
+        if boundary_id is None:
+            self._compiled.clear()
+        else:
+            for key in [k for k in self._compiled if k[0] == boundary_id]:
+                del self._compiled[key]
+        self._current = None
+        self._checked_at = 0.0
+        self._index = None
+        self._index_checked_at = 0.0
+
+
+geofence_engine = GeofenceEngine()
@@ -0,0 +1,463 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import orjson
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import settings
+from app.database import init_db
+from app.models import AnimalLocation, GeofenceBoundary
+from app.schemas import AlertCreate
+from app.services.alert_service import AlertService
+from app.services.breach_tracker import BREACH_ALERT, BreachTracker
+from app.services.geofence_engine import (
+    CONTAINMENT,
+    EXCLUSION,
+    CompiledGeofence,
+    as_coordinate_arrays,
+    parse_points,
+)
+
+logger = logging.getLogger(__name__)
+
+# Distinct from the live alert types, so a replay can be filtered, reviewed or deleted on its own
+REPLAY_BREACH_ALERT = "geofence_breach_replay"
+REPLAY_RETURN_ALERT = "geofence_return_replay"
+
+# Animals per query; keeps the IN list well under driver bind-parameter limits
+ANIMAL_BATCH = 1000
+
+# (animal_id, timestamp, id) of the last replayed fix
+Position = Tuple[str, datetime, int]
+
+
+def animal_partition(animal_id: str, partitions: int) -> int:
+    """Partition of an animal; the same crc32 split IngestPipeline uses for its workers."""
+    return zlib.crc32(animal_id.encode()) % partitions
+
+
+def partition_checkpoint(path: Optional[str], partition: int, partitions: int) -> Optional[str]:
+    """Checkpoint file of one partition when a job is split across processes."""
+    if path is None or partitions == 1:
+        return path
+    return f"{path}.{partition}-of-{partitions}"
+
+
+class ReplayStats:
+    """Counters for GeofenceReplay; carried over in the checkpoint when a job resumes."""
+
+    __slots__ = ("fixes", "outside", "alerts", "chunks")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def restore(self, snapshot: Dict[str, int]) -> None:
+        for name in self.__slots__:
+            setattr(self, name, snapshot.get(name, 0))
+
+
+class GeofenceReplay:
+    """
+    Replay stored fixes against one geofence boundary and backfill the alerts.
+
+    Fixes in ``[start, end]`` are streamed in ``chunk_size`` chunks ordered by
+    ``(animal_id, timestamp, id)``, checked against the boundary with the
+    vectorized containment test and fed through a BreachTracker, so the
+    replay raises the same transition alerts (with the same hysteresis and
+    cooldown) the live path would have raised had the boundary been in
+    place. They are written as ``geofence_breach_replay`` /
+    ``geofence_return_replay`` alerts, one multi-row INSERT per chunk.
+
+    On PostgreSQL each batch of animals is read through a single server-side
+    cursor. SQLite cannot commit the alerts while a read cursor is open on
+    the file, so there every chunk is its own keyset query.
+
+    With ``checkpoint_path`` the position, tracker state and counters are
+    written atomically after every chunk, and a job started again with the
+    same parameters continues after the last completed chunk. A job killed
+    between writing a chunk's alerts and its checkpoint writes that chunk's
+    alerts again on resume.
+
+    ``partition``/``partitions`` restrict the job to the animals with
+    ``crc32(animal_id) % partitions == partition``; every animal's fixes are
+    replayed by exactly one partition, so partitions can run in parallel
+    processes (or on different hosts) against the same database.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        boundary_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        partition: int = 0,
+        partitions: int = 1,
+        chunk_size: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        dry_run: bool = False,
+        progress_interval: float = 10.0
+    ):
+        if not 0 <= partition < partitions:
+            raise ValueError(f"Partition {partition} is not in 0..{partitions - 1}")
+        self.session_factory = session_factory
+        self.boundary_id = boundary_id
+        self.start = start
+        self.end = end
+        self.partition = partition
+        self.partitions = partitions
+        self.chunk_size = chunk_size or settings.GEOFENCE_REPLAY_CHUNK_SIZE
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self.progress_interval = progress_interval
+        self.stats = ReplayStats()
+        self.tracker = BreachTracker()
+        self.geofence: Optional[CompiledGeofence] = None
+        self._position: Optional[Position] = None
+        self._done = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.partition}/{self.partitions}"
+
+    async def load_boundary(self, session: AsyncSession) -> CompiledGeofence:
+        boundary = await session.get(GeofenceBoundary, self.boundary_id)
+        if boundary is None:
+            raise ValueError(f"Geofence boundary {self.boundary_id} does not exist")
+        points = parse_points(boundary.boundary_points)
+        if len(points) < 3:
+            raise ValueError(f"Geofence boundary {self.boundary_id} has fewer than 3 valid points")
+        if boundary.kind not in (CONTAINMENT, EXCLUSION):
+            raise ValueError(f"Geofence boundary {self.boundary_id} is a {boundary.kind} and raises no breaches")
+        return CompiledGeofence(boundary.id, boundary.name, boundary.updated_at, points, boundary.kind)
+
+    def _in_range(self, query):
+        if self.start:
+            query = query.where(AnimalLocation.timestamp >= self.start)
+        if self.end:
+            query = query.where(AnimalLocation.timestamp <= self.end)
+        return query
+
+    async def animal_ids(self, session: AsyncSession) -> List[str]:
+        """Animals of this partition with fixes in the range, in the database's sort order."""
+        result = await session.execute(
+            self._in_range(select(AnimalLocation.animal_id).distinct()).order_by(AnimalLocation.animal_id)
+        )
+        return [
+            animal_id for (animal_id,) in result
+            if animal_partition(animal_id, self.partitions) == self.partition
+        ]
+
+    def _query(self, animals: Sequence[str], position: Optional[Position]):
+        query = self._in_range(
+            select(
+                AnimalLocation.id,
+                AnimalLocation.animal_id,
+                AnimalLocation.latitude,
+                AnimalLocation.longitude,
+                AnimalLocation.timestamp,
+            ).where(AnimalLocation.animal_id.in_(animals))
+        )
+        if position is not None:
+            query = query.where(
+                tuple_(AnimalLocation.animal_id, AnimalLocation.timestamp, AnimalLocation.id) > position
+            )
+        return query.order_by(AnimalLocation.animal_id, AnimalLocation.timestamp, AnimalLocation.id)
+
+    async def _stream(self, animals: Sequence[str], position: Optional[Position]) -> AsyncIterator[List[Row]]:
+        async with self.session_factory() as session:
+            if session.bind.dialect.name != "sqlite":
+                result = await session.stream(
+                    self._query(animals, position).execution_options(yield_per=self.chunk_size)
+                )
+                async for rows in result.partitions(self.chunk_size):
+                    yield rows
+                return
+
+        while True:
+            async with self.session_factory() as session:
+                result = await session.execute(self._query(animals, position).limit(self.chunk_size))
+                rows = result.all()
+            if rows:
+                yield rows
+            if len(rows) < self.chunk_size:
+                return
+            position = (rows[-1].animal_id, rows[-1].timestamp, rows[-1].id)
+
+    async def _chunks(self, animals: List[str]) -> AsyncIterator[List[Row]]:
+        position = self._position
+        first = 0
+        if position is not None:
+            try:
+                first = animals.index(position[0])
+            except ValueError:
+                # Its fixes were deleted or aged out since the checkpoint. The
+                # list is in the database's collation, which Python's string
+                # order need not match, so let the position filter skip ahead.
+                logger.warning(
+                    "Checkpointed animal %s has no fixes left in the range; "
+                    "resuming after it in database order", position[0]
+                )
+        for offset in range(first, len(animals), ANIMAL_BATCH):
+            found = False
+            async for rows in self._stream(animals[offset:offset + ANIMAL_BATCH], position):
+                found = True
+                yield rows
+            # Later batches sort after any row found, so the filter is spent
+            if found:
+                position = None
+
+    def _alert(self, row: Row, alert_type: str) -> AlertCreate:
+        fence = f"geofence '{self.geofence.name}' (#{self.geofence.id})"
+        excluded = self.geofence.kind == EXCLUSION
+        if alert_type == BREACH_ALERT:
+            alert_type = REPLAY_BREACH_ALERT
+            where = "inside" if excluded else "outside"
+            message = f"Animal {row.animal_id} would have been {where} {fence} (replay)"
+        else:
+            alert_type = REPLAY_RETURN_ALERT
+            where = "back outside" if excluded else "back inside"
+            message = f"Animal {row.animal_id} would have been {where} {fence} (replay)"
+        return AlertCreate(
+            animal_id=row.animal_id,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            timestamp=row.timestamp,
+            alert_type=alert_type,
+            message=message
+        )
+
+    def evaluate(self, rows: Sequence[Row]) -> List[AlertCreate]:
+        """Check one chunk against the boundary and return the alerts it raises."""
+        inside = self.geofence.contains_many(*as_coordinate_arrays(rows))
+        if self.geofence.kind == EXCLUSION:
+            # In bounds means outside an exclusion fence
+            inside = ~inside
+        self.stats.fixes += len(rows)
+        self.stats.outside += len(rows) - int(np.count_nonzero(inside))
+
+        alerts = []
+        current = self._position[0] if self._position is not None else None
+        for row, is_inside in zip(rows, inside.tolist()):
+            if row.animal_id != current:
+                # Rows arrive grouped by animal, so the previous one is finished
+                if current is not None:
+                    self.tracker.forget(current)
+                current = row.animal_id
+            alert_type = self.tracker.observe(row.animal_id, is_inside, row.timestamp)
+            if alert_type is not None:
+                alerts.append(self._alert(row, alert_type))
+
+        last = rows[-1]
+        self._position = (last.animal_id, last.timestamp, last.id)
+        return alerts
+
+    def _job(self) -> Dict[str, Any]:
+        # A checkpoint only resumes a job with identical parameters and boundary geometry
+        return {
+            "boundary_id": self.geofence.id,
+            "boundary_updated_at": self.geofence.updated_at.isoformat() if self.geofence.updated_at else None,
+            "start": self.start.isoformat() if self.start else None,
+            "end": self.end.isoformat() if self.end else None,
+            "partition": self.partition,
+            "partitions": self.partitions,
+            "dry_run": self.dry_run,
+        }
+
+    def save_checkpoint(self) -> None:
+        """Atomically write the job's progress to ``checkpoint_path`` (no-op without one)."""
+        if not self.checkpoint_path:
+            return
+        position = self._position
+        checkpoint = {
+            "job": self._job(),
+            "position": [position[0], position[1].isoformat(), position[2]] if position else None,
+            "tracker": self.tracker.snapshot(),
+            "stats": self.stats.snapshot(),
+            "done": self._done,
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(checkpoint))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load_checkpoint(self) -> bool:
+        """Resume from ``checkpoint_path``; returns False if there is none."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+        with open(self.checkpoint_path, "rb") as f:
+            checkpoint = orjson.loads(f.read())
+        if checkpoint["job"] != self._job():
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to a different replay: {checkpoint['job']}"
+            )
+        position = checkpoint["position"]
+        if position is not None:
+            self._position = (position[0], datetime.fromisoformat(position[1]), position[2])
+        self.tracker.restore(checkpoint["tracker"])
+        self.stats.restore(checkpoint["stats"])
+        self._done = checkpoint["done"]
+        return True
+
+    def _report(self, animals: List[str], started: float, fixes_before: int) -> None:
+        if self._done:
+            animals_done = len(animals)
+        elif self._position is not None:
+            animals_done = animals.index(self._position[0])
+        else:
+            animals_done = 0
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Replay %s: %d/%d animals, %d fixes (%d outside), %d alerts, %.0f fixes/s",
+            self.label, animals_done, len(animals), self.stats.fixes, self.stats.outside,
+            self.stats.alerts, (self.stats.fixes - fixes_before) / elapsed if elapsed else 0.0
+        )
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run (or resume) the replay to completion.
+
+        Returns:
+            Counters of the whole job, including chunks done before a resume
+        """
+        async with self.session_factory() as session:
+            self.geofence = await self.load_boundary(session)
+            animals = await self.animal_ids(session)
+        if self.load_checkpoint():
+            logger.info("Replay %s: resuming from checkpoint %s", self.label, self.checkpoint_path)
+
+        started = last_report = time.perf_counter()
+        fixes_before = self.stats.fixes
+        if not self._done:
+            async for rows in self._chunks(animals):
+                alerts = self.evaluate(rows)
+                if alerts and not self.dry_run:
+                    async with self.session_factory() as session:
+                        await AlertService.create_alerts_bulk(session, alerts)
+                self.stats.alerts += len(alerts)
+                self.stats.chunks += 1
+                self.save_checkpoint()
+
+                now = time.perf_counter()
+                if now - last_report >= self.progress_interval:
+                    self._report(animals, started, fixes_before)
+                    last_report = now
+
+            self._done = True
+            self.save_checkpoint()
+        self._report(animals, started, fixes_before)
+
+        return {
+            "partition": self.partition,
+            "animals": len(animals),
+            "seconds": round(time.perf_counter() - started, 3),
+            **self.stats.snapshot(),
+        }
+
+
+async def latest_boundary_id(session: AsyncSession) -> int:
+    """Id of the most recently updated active containment boundary."""
+    boundary_id = await session.scalar(
+        select(GeofenceBoundary.id)
+        .where(GeofenceBoundary.is_active.is_(True), GeofenceBoundary.kind == CONTAINMENT)
+        .order_by(GeofenceBoundary.updated_at.desc())
+        .limit(1)
+    )
+    if boundary_id is None:
+        raise ValueError("No active geofence boundary to replay against")
+    return boundary_id
+
+
+async def replay(**options: Any) -> Dict[str, Any]:
+    _, session_factory = init_db()
+    return await GeofenceReplay(session_factory, **options).run()
+
+
+def _replay_in_process(options: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs in a spawned worker with its own event loop and connection pool
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(replay(**options))
+
+
+def _parse_partition(value: str) -> Tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected INDEX/COUNT, e.g. 0/4")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"index must be in 0..{count - 1}")
+    return index, count
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Replay stored fixes against a geofence boundary")
+    parser.add_argument("--boundary-id", type=int, default=None,
+                        help="Defaults to the most recently updated active boundary")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None, help="Resume from / save progress to this file")
+    parser.add_argument("--dry-run", action="store_true", help="Count the alerts without writing them")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Seconds between progress logs")
+    split = parser.add_mutually_exclusive_group()
+    split.add_argument("--partition", type=_parse_partition, default=None,
+                       help="Replay only partition INDEX/COUNT of the animals")
+    split.add_argument("--processes", type=int, default=1, help="Replay all partitions in this many processes")
+    args = parser.parse_args()
+
+    boundary_id = args.boundary_id
+    if boundary_id is None:
+        _, session_factory = init_db()
+        async with session_factory() as session:
+            boundary_id = await latest_boundary_id(session)
+
+    partition, partitions = args.partition or (0, args.processes)
+    options = [
+        {
+            "boundary_id": boundary_id,
+            "start": args.start,
+            "end": args.end,
+            "partition": index,
+            "partitions": partitions,
+            "chunk_size": args.chunk_size,
+            "checkpoint_path": partition_checkpoint(args.checkpoint, index, partitions),
+            "dry_run": args.dry_run,
+            "progress_interval": args.progress_interval,
+        }
+        for index in ([partition] if args.partition else range(partitions))
+    ]
+
+    if len(options) == 1:
+        results = [await replay(**options[0])]
+    else:
+        with ProcessPoolExecutor(len(options), mp_context=get_context("spawn")) as pool:
+            results = await asyncio.gather(*(
+                asyncio.get_running_loop().run_in_executor(pool, _replay_in_process, option)
+                for option in options
+            ))
+
+    for result in results:
+        print(
+            f"Partition {result['partition']}/{partitions}: {result['animals']} animals, "
+            f"{result['fixes']} fixes ({result['outside']} outside), {result['alerts']} alerts"
+            f"{' (dry run)' if args.dry_run else ''}"
+        )
+
+
+if __name__ == "__main__":
+    # e.g. after redrawing a paddock:
+    #   python -m app.services.geofence_replay --start 2026-09-01T00:00:00Z --processes 4 --checkpoint replay.ckpt
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
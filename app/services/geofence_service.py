@@ -1,10 +1,18 @@
 from shapely.geometry import Point, Polygon
-from typing import List, Tuple, Optional
+from typing import Any, List, Tuple, Optional
+import numpy as np
 from app.models import GeofenceBoundary
 from app.schemas import GeofencePoint
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import json
+from app.services.geofence_engine import (
+    CompiledGeofence,
+    FenceMembership,
+    as_coordinate_arrays,
+    geofence_engine,
+    parse_points,
+)
+from app.utils.metrics import timed
 
 
 class GeofenceService:
@@ -38,66 +46,111 @@ class GeofenceService:
         
         return polygon.contains(point)
     
+    @staticmethod
+    def is_inside_geofence_bulk(
+        lats: Any,
+        lons: Any,
+        boundary_points: List[Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+        Vectorized version of is_inside_geofence.
+        
+        Args:
+            lats: Array-like of latitudes
+            lons: Array-like of longitudes
+            boundary_points: List of (lat, lon) tuples forming the polygon
+            
+        Returns:
+            Boolean NumPy array, True where the point is inside the polygon
+        """
+        lat_array, lon_array = as_coordinate_arrays(lats, lons)
+        if len(boundary_points) < 3:
+            return np.zeros(lat_array.shape, dtype=bool)
+        
+        geofence = CompiledGeofence(None, "adhoc", None, boundary_points)
+        return geofence.contains_many(lat_array, lon_array)
+    
     @staticmethod
     async def get_current_boundary(session: AsyncSession) -> Optional[GeofenceBoundary]:
-        """Get the current geofence boundary from database."""
+        """Get the current (most recently updated active) geofence boundary."""
         result = await session.execute(
-            select(GeofenceBoundary).order_by(GeofenceBoundary.updated_at.desc()).limit(1)
+            select(GeofenceBoundary)
+            .where(GeofenceBoundary.is_active.is_(True))
+            .order_by(GeofenceBoundary.updated_at.desc())
+            .limit(1)
         )
         return result.scalar_one_or_none()
     
     @staticmethod
     def parse_boundary_points(boundary: GeofenceBoundary) -> List[Tuple[float, float]]:
         """Parse boundary points from database JSON string."""
-        try:
-            points_data = json.loads(boundary.boundary_points)
-            return [(point["latitude"], point["longitude"]) for point in points_data]
-        except (json.JSONDecodeError, KeyError, TypeError):
-            return []
+        return parse_points(boundary.boundary_points)
     
     @staticmethod
+    @timed("geofence_check_location")
     async def check_location(
         session: AsyncSession,
         latitude: float,
         longitude: float
-    ) -> Tuple[bool, Optional[List[Tuple[float, float]]]]:
+    ) -> Tuple[bool, List[Tuple[float, float]]]:
         """
-        Check if location is inside geofence.
+        Check if location is in bounds: inside a containment fence (when any
+        is active) and outside every exclusion fence.
+        
+        Fences are served from the cached STRtree index, so this only touches
+        the database when the index needs revalidating.
         
         Returns:
-            Tuple of (is_inside, boundary_points)
+            Tuple of (is_inside, boundary_points of the current boundary)
         """
-        boundary = await GeofenceService.get_current_boundary(session)
+        index = await geofence_engine.get_index(session)
+        current = await geofence_engine.get_current(session)
+        return index.in_bounds(index.containing(latitude, longitude)), current.points
+    
+    @staticmethod
+    @timed("geofence_check_locations_bulk")
+    async def check_locations_bulk(
+        session: AsyncSession,
+        lats: Any,
+        lons: Any = None
+    ) -> np.ndarray:
+        """
+        Check many locations against every active geofence in one call.
         
-        if not boundary:
-            # Default boundary if none exists
-            default_boundary = [
-                (12.9710, 77.5940),
-                (12.9720, 77.5945),
-                (12.9730, 77.5930),
-                (12.9715, 77.5920)
-            ]
-            is_inside = GeofenceService.is_inside_geofence(
-                latitude, longitude, default_boundary
-            )
-            return is_inside, default_boundary
+        Args:
+            lats: Array-like of latitudes, or a list of GPSData (omit lons)
+            lons: Array-like of longitudes
+            
+        Returns:
+            Boolean NumPy array, True where the location is in bounds
+        """
+        lat_array, lon_array = as_coordinate_arrays(lats, lons)
+        index = await geofence_engine.get_index(session)
+        return index.in_bounds_many(index.containing_many(lat_array, lon_array), len(lat_array))
+    
+    @staticmethod
+    async def check_location_all(
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        animal_id: Optional[str] = None
+    ) -> FenceMembership:
+        """
+        Check a location against every active geofence.
         
-        boundary_points = GeofenceService.parse_boundary_points(boundary)
-        if not boundary_points:
-            # Fallback to default if parsing fails
-            default_boundary = [
-                (12.9710, 77.5940),
-                (12.9720, 77.5945),
-                (12.9730, 77.5930),
-                (12.9715, 77.5920)
-            ]
-            is_inside = GeofenceService.is_inside_geofence(
-                latitude, longitude, default_boundary
-            )
-            return is_inside, default_boundary
+        Candidate fences come from an STRtree, so the cost grows with the
+        number of fences near the point rather than the total count. When
+        animal_id is given, the result also lists the fences entered and left
+        relative to the fences ingest last recorded for that animal; the
+        recorded membership itself is left untouched. Memberships live in
+        the memory of the process running ingest, so when ingest runs in
+        another process nothing is recorded here and nothing is reported.
         
-        is_inside = GeofenceService.is_inside_geofence(
-            latitude, longitude, boundary_points
-        )
-        return is_inside, boundary_points
-
+        Returns:
+            FenceMembership with inside, entered and left fences
+        """
+        index = await geofence_engine.get_index(session)
+        inside = index.containing(latitude, longitude)
+        if animal_id is None:
+            return FenceMembership(inside, [], {})
+        return geofence_engine.update_membership(animal_id, inside, record=False)
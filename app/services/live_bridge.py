@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import paho.mqtt.client as mqtt
+from typing import Callable, Dict, List, Optional
+from pydantic import TypeAdapter, ValidationError
+from app.config import settings
+from app.ingest.codec import BINARY_CONTENT_TYPE, decode_gps_payload
+from app.schemas import AlertCreate
+from app.services.live_broadcaster import LiveBroadcaster, live_broadcaster
+
+logger = logging.getLogger(__name__)
+
+AlertsCallback = Callable[[List[AlertCreate]], None]
+
+_alert_list = TypeAdapter(List[AlertCreate])
+
+
+class BridgeStats:
+    """Counters for LiveMQTTBridge."""
+
+    __slots__ = ("messages", "positions", "alerts", "rejected")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class LiveMQTTBridge:
+    """
+    Feed a LiveBroadcaster from MQTT, for ingest running in another process.
+
+    Subscribes to the GPS topics the ingest service reads and the alert
+    topic it publishes to. GPS payloads are decoded like the consumer does
+    (format chosen by topic) and alerts may be single objects or the JSON
+    arrays a batching publisher sends. The broadcaster drops positions that
+    are not newer than the last one per animal and alerts it has already
+    published, so raw replays and updates that also arrive in-process are
+    not shown twice. ``on_alerts`` is called with every batch of alerts
+    received, e.g. to invalidate cached alert pages.
+
+    Delivery is best effort (QoS 0): a dashboard only needs the newest state.
+    """
+
+    def __init__(
+        self,
+        broadcaster: Optional[LiveBroadcaster] = None,
+        gps_topic: Optional[str] = None,
+        binary_topic: Optional[str] = None,
+        alerts_topic: Optional[str] = None,
+        on_alerts: Optional[AlertsCallback] = None,
+        client_factory: Callable[[], mqtt.Client] = mqtt.Client,
+    ):
+        self.broadcaster = live_broadcaster if broadcaster is None else broadcaster
+        self.gps_topic = gps_topic or settings.MQTT_TOPIC_GPS
+        self.binary_topic = binary_topic or settings.MQTT_TOPIC_GPS_BINARY
+        self.alerts_topic = alerts_topic or settings.MQTT_TOPIC_ALERTS
+        self.on_alerts = on_alerts
+        self._client_factory = client_factory
+        self.client: Optional[mqtt.Client] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = BridgeStats()
+
+    @property
+    def running(self) -> bool:
+        return self.client is not None
+
+    async def start(self) -> None:
+        """Connect in the background and start relaying (idempotent)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+
+        client = self._client_factory()
+        if settings.MQTT_USERNAME and settings.MQTT_PASSWORD:
+            client.username_pw_set(settings.MQTT_USERNAME, settings.MQTT_PASSWORD)
+        client.reconnect_delay_set(settings.MQTT_RECONNECT_MIN_DELAY, settings.MQTT_RECONNECT_MAX_DELAY)
+        client.on_connect = self._on_connect
+        client.on_message = self._on_message
+        client.connect_async(settings.MQTT_BROKER_HOST, settings.MQTT_BROKER_PORT, settings.MQTT_KEEPALIVE)
+        client.loop_start()
+        self.client = client
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self.client.disconnect()
+        # loop_stop joins the network thread
+        await self._loop.run_in_executor(None, self.client.loop_stop)
+        self.client = None
+
+    def handle(self, topic: str, payload: bytes) -> None:
+        """Relay one MQTT message to the broadcaster (runs on the event loop)."""
+        self.stats.messages += 1
+        if topic == self.alerts_topic:
+            try:
+                if payload.lstrip()[:1] == b"[":
+                    alerts = _alert_list.validate_json(payload)
+                else:
+                    alerts = [AlertCreate.model_validate_json(payload)]
+            except ValidationError as e:
+                self.stats.rejected += 1
+                logger.warning("Ignoring malformed alert message: %s", e)
+                return
+            self.stats.alerts += len(alerts)
+            self.broadcaster.publish_alerts(alerts)
+            if self.on_alerts is not None:
+                self.on_alerts(alerts)
+            return
+
+        content_type = BINARY_CONTENT_TYPE if topic == self.binary_topic else None
+        fixes, errors = decode_gps_payload(payload, content_type)
+        self.stats.rejected += len(errors)
+        self.stats.positions += len(fixes)
+        if fixes:
+            self.broadcaster.publish_positions(fixes)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"running": self.running, **self.stats.snapshot()}
+
+    # paho callbacks run on the network thread; hop back onto the event loop
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            logger.warning("MQTT connection refused (rc=%s)", rc)
+            return
+        # (Re)subscribe on every connect so subscriptions survive reconnects
+        client.subscribe([(self.gps_topic, 0), (self.binary_topic, 0), (self.alerts_topic, 0)])
+
+    def _on_message(self, client, userdata, message):
+        self._loop.call_soon_threadsafe(self.handle, message.topic, message.payload)
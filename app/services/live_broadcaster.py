@@ -0,0 +1,175 @@
+import asyncio
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+from app.config import settings
+from app.schemas import AlertCreate, GPSData
+from app.services.spatial_index import BoundingBox
+
+# Alerts remembered to drop the copy that arrives over a second path
+RECENT_ALERT_KEYS = 10000
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Fixes without an offset are taken to be UTC
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class LiveFilter:
+    """Which updates a live client wants: an animal set, a bounding box, or both."""
+
+    __slots__ = ("animal_ids", "bbox")
+
+    def __init__(
+        self,
+        animal_ids: Optional[Iterable[str]] = None,
+        bbox: Optional[BoundingBox] = None
+    ):
+        self.animal_ids: Optional[FrozenSet[str]] = frozenset(animal_ids) if animal_ids else None
+        self.bbox = bbox
+
+    def matches(self, animal_id: str, latitude: float, longitude: float) -> bool:
+        if self.animal_ids is not None and animal_id not in self.animal_ids:
+            return False
+        if self.bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = self.bbox
+            return min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+        return True
+
+
+class LiveSubscriber:
+    """
+    Pending updates for one connected client.
+
+    Position updates are coalesced per animal: if the client has not picked
+    up an animal's previous position yet it is replaced, so a slow client
+    gets the latest state rather than a growing backlog. Alerts are never
+    coalesced. Both are bounded by ``max_pending``; beyond that new
+    positions for unseen animals and the oldest alerts are dropped.
+    """
+
+    def __init__(self, live_filter: LiveFilter, max_pending: int):
+        self.filter = live_filter
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._positions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._alerts: deque = deque()
+        self._ready = asyncio.Event()
+
+    def push_position(self, position: Dict[str, Any]) -> None:
+        animal_id = position["animal_id"]
+        if animal_id in self._positions:
+            self._positions[animal_id] = position
+        elif len(self._positions) < self.max_pending:
+            self._positions[animal_id] = position
+        else:
+            self.dropped += 1
+            return
+        self._ready.set()
+
+    def push_alert(self, alert: Dict[str, Any]) -> None:
+        if len(self._alerts) >= self.max_pending:
+            self._alerts.popleft()
+            self.dropped += 1
+        self._alerts.append(alert)
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Wait for pending updates and take all of them.
+
+        Returns:
+            List of (event type, payload); empty if ``timeout`` expired first
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        events = [("alert", alert) for alert in self._alerts]
+        events.extend(("position", position) for position in self._positions.values())
+        self._alerts.clear()
+        self._positions.clear()
+        return events
+
+
+class LiveBroadcaster:
+    """
+    Fan-out of ingested positions and alerts to live dashboard clients.
+
+    Publishing never blocks: each update is matched against every client's
+    filter and placed in that client's bounded buffer, so a client that
+    reads slowly only loses (coalesced) updates of its own.
+
+    Updates can reach it both from an in-process pipeline and over MQTT
+    (see ``LiveMQTTBridge``). A position no newer than the last one
+    published for its animal is dropped, and so is an alert already
+    published, so neither a second path nor a late fix shows up twice or
+    moves an animal back.
+    """
+
+    def __init__(self, max_pending: Optional[int] = None):
+        self.max_pending = max_pending or settings.LIVE_CLIENT_MAX_PENDING
+        self._subscribers: Set[LiveSubscriber] = set()
+        self._latest: Dict[str, datetime] = {}
+        self._recent_alerts: "OrderedDict[Tuple[str, str, datetime], None]" = OrderedDict()
+        self.positions_published = 0
+        self.alerts_published = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, live_filter: Optional[LiveFilter] = None) -> LiveSubscriber:
+        subscriber = LiveSubscriber(live_filter or LiveFilter(), self.max_pending)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish_positions(self, fixes: Sequence[GPSData]) -> None:
+        if not self._subscribers:
+            return
+        for fix in fixes:
+            timestamp = _utc(fix.timestamp)
+            latest = self._latest.get(fix.animal_id)
+            if latest is not None and timestamp <= latest:
+                continue
+            self._latest[fix.animal_id] = timestamp
+            self.positions_published += 1
+            position = None
+            for subscriber in self._subscribers:
+                if subscriber.filter.matches(fix.animal_id, fix.latitude, fix.longitude):
+                    if position is None:
+                        position = fix.model_dump(mode="json")
+                    subscriber.push_position(position)
+
+    def publish_alerts(self, alerts: Sequence[AlertCreate]) -> None:
+        if not self._subscribers:
+            return
+        recent = self._recent_alerts
+        for alert in alerts:
+            key = (alert.animal_id, alert.alert_type, _utc(alert.timestamp))
+            if key in recent:
+                continue
+            recent[key] = None
+            if len(recent) > RECENT_ALERT_KEYS:
+                recent.popitem(last=False)
+            self.alerts_published += 1
+            payload = None
+            for subscriber in self._subscribers:
+                if subscriber.filter.matches(alert.animal_id, alert.latitude, alert.longitude):
+                    if payload is None:
+                        payload = alert.model_dump(mode="json")
+                    subscriber.push_alert(payload)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self._subscribers),
+            "positions_published": self.positions_published,
+            "alerts_published": self.alerts_published,
+            "dropped": sum(subscriber.dropped for subscriber in self._subscribers),
+        }
+
+
+live_broadcaster = LiveBroadcaster()
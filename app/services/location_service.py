@@ -1,42 +1,163 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, and_
-from datetime import datetime
-from typing import Optional, List
+from sqlalchemy import select, desc, and_, or_, insert, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, List, Sequence, Tuple, Union
+import numpy as np
 from app.models import AnimalLocation
-from app.schemas import AnimalLocationCreate, AnimalLocationResponse
+from app.schemas import AnimalLocationCreate, AnimalLocationResponse, GPSData
+from app.services.position_cache import LatestPosition, position_cache
+from app.services.response_cache import response_cache
+from app.utils.metrics import timed
+from app.utils.pagination import Cursor
+from app.utils.trajectory import douglas_peucker, time_buckets
+
+# Unique index from migration 008
+FIX_KEY = ["animal_id", "timestamp"]
+
+
+def _insert_new_fixes(session: AsyncSession):
+    """INSERT into animal_locations that skips fixes already stored."""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(AnimalLocation).on_conflict_do_nothing(index_elements=FIX_KEY)
+    if dialect == "sqlite":
+        return sqlite.insert(AnimalLocation).on_conflict_do_nothing(index_elements=FIX_KEY)
+    # Elsewhere a replayed fix fails on the unique index instead
+    return insert(AnimalLocation)
 
 
 class LocationService:
     @staticmethod
+    @timed("location_create")
     async def create_location(
         session: AsyncSession,
         location_data: AnimalLocationCreate
     ) -> AnimalLocation:
-        """Create a new animal location record."""
-        location = AnimalLocation(
-            animal_id=location_data.animal_id,
-            latitude=location_data.latitude,
-            longitude=location_data.longitude,
-            timestamp=location_data.timestamp
+        """
+        Create a new animal location record.
+        
+        Idempotent: if the animal already has a fix at this timestamp the
+        stored record is returned unchanged.
+        """
+        result = await session.execute(
+            _insert_new_fixes(session).values(
+                animal_id=location_data.animal_id,
+                latitude=location_data.latitude,
+                longitude=location_data.longitude,
+                timestamp=location_data.timestamp
+            ).returning(AnimalLocation)
         )
-        session.add(location)
+        location = result.scalar_one_or_none()
+        if location is None:
+            location = (await session.execute(
+                select(AnimalLocation).where(
+                    AnimalLocation.animal_id == location_data.animal_id,
+                    AnimalLocation.timestamp == location_data.timestamp
+                )
+            )).scalar_one()
         await session.commit()
-        await session.refresh(location)
+        position_cache.update(location)
+        response_cache.invalidate(f"locations:{location.animal_id}")
         return location
-    
+
+    @staticmethod
+    @timed("location_create_bulk")
+    async def create_locations_bulk(
+        session: AsyncSession,
+        locations: Sequence[Union[AnimalLocationCreate, GPSData]]
+    ) -> int:
+        """
+        Insert many location records with a single multi-row INSERT.
+        
+        Fixes already stored for the same animal and timestamp are skipped.
+        
+        Returns:
+            Number of rows actually inserted
+        """
+        if not locations:
+            return 0
+
+        result = await session.execute(
+            _insert_new_fixes(session).values([
+                {
+                    "animal_id": location.animal_id,
+                    "latitude": location.latitude,
+                    "longitude": location.longitude,
+                    "timestamp": location.timestamp,
+                }
+                for location in locations
+            ]).returning(
+                AnimalLocation.id,
+                AnimalLocation.animal_id,
+                AnimalLocation.latitude,
+                AnimalLocation.longitude,
+                AnimalLocation.timestamp,
+            )
+        )
+        rows = result.all()
+        await session.commit()
+        position_cache.update_many(rows)
+        response_cache.invalidate(*{f"locations:{row.animal_id}" for row in rows})
+        return len(rows)
+
     @staticmethod
     async def get_latest_location(
         session: AsyncSession,
         animal_id: str
-    ) -> Optional[AnimalLocation]:
-        """Get the latest location for an animal."""
+    ) -> Optional[Union[LatestPosition, AnimalLocation]]:
+        """Get the latest location for an animal, from the position cache if possible."""
+        cached = position_cache.get(animal_id)
+        if cached is not None:
+            return cached
+        
         result = await session.execute(
             select(AnimalLocation)
             .where(AnimalLocation.animal_id == animal_id)
             .order_by(desc(AnimalLocation.timestamp))
             .limit(1)
         )
-        return result.scalar_one_or_none()
+        location = result.scalar_one_or_none()
+        if location is not None:
+            position_cache.update(location)
+        return location
+    
+    @staticmethod
+    async def get_latest_locations(
+        session: AsyncSession,
+        animal_ids: Sequence[str]
+    ) -> List[LatestPosition]:
+        """
+        Get the latest location for many animals.
+        
+        Cached positions are served from memory; all misses are resolved with
+        a single query.
+        """
+        found, missing = position_cache.get_many(animal_ids)
+        
+        if missing:
+            ranked = (
+                select(
+                    AnimalLocation.id,
+                    AnimalLocation.animal_id,
+                    AnimalLocation.latitude,
+                    AnimalLocation.longitude,
+                    AnimalLocation.timestamp,
+                    func.row_number().over(
+                        partition_by=AnimalLocation.animal_id,
+                        order_by=desc(AnimalLocation.timestamp)
+                    ).label("rank")
+                )
+                .where(AnimalLocation.animal_id.in_(missing))
+                .subquery()
+            )
+            result = await session.execute(select(ranked).where(ranked.c.rank == 1))
+            for row in result:
+                position_cache.update(row)
+                found[row.animal_id] = LatestPosition.from_row(row)
+        
+        return [found[animal_id] for animal_id in animal_ids if animal_id in found]
     
     @staticmethod
     async def get_location_history(
@@ -57,4 +178,146 @@ class LocationService:
         
         result = await session.execute(query)
         return list(result.scalars().all())
-
+    
+    @staticmethod
+    async def get_location_history_page(
+        session: AsyncSession,
+        animal_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 1000,
+        cursor: Optional[Cursor] = None
+    ) -> Tuple[List[AnimalLocation], Optional[Cursor]]:
+        """
+        Get one page of location history, newest first.
+        
+        Pages are keyed on (timestamp, id), so fetching page N costs the same
+        as fetching page 1.
+        
+        Returns:
+            Tuple of (locations, cursor for the next page or None)
+        """
+        query = select(AnimalLocation).where(AnimalLocation.animal_id == animal_id)
+        
+        if start_date:
+            query = query.where(AnimalLocation.timestamp >= start_date)
+        if end_date:
+            query = query.where(AnimalLocation.timestamp <= end_date)
+        if cursor:
+            last_timestamp, last_id = cursor
+            # The plain timestamp bound lets the planner use the index range
+            query = query.where(
+                AnimalLocation.timestamp <= last_timestamp,
+                or_(
+                    AnimalLocation.timestamp < last_timestamp,
+                    AnimalLocation.id < last_id
+                )
+            )
+        
+        query = query.order_by(
+            desc(AnimalLocation.timestamp), desc(AnimalLocation.id)
+        ).limit(limit + 1)
+        
+        result = await session.execute(query)
+        locations = list(result.scalars().all())
+        
+        if len(locations) <= limit:
+            return locations, None
+        
+        locations = locations[:limit]
+        return locations, (locations[-1].timestamp, locations[-1].id)
+    
+    @staticmethod
+    async def stream_location_history(
+        session: AsyncSession,
+        animal_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        chunk_size: int = 5000
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Stream location history in chronological order, chunk by chunk.
+        
+        Uses a server-side cursor and plain column rows rather than ORM
+        objects, so memory use is bounded by chunk_size.
+        """
+        query = select(
+            AnimalLocation.id,
+            AnimalLocation.animal_id,
+            AnimalLocation.latitude,
+            AnimalLocation.longitude,
+            AnimalLocation.timestamp,
+        ).where(AnimalLocation.animal_id == animal_id)
+        
+        if start_date:
+            query = query.where(AnimalLocation.timestamp >= start_date)
+        if end_date:
+            query = query.where(AnimalLocation.timestamp <= end_date)
+        
+        query = query.order_by(AnimalLocation.timestamp, AnimalLocation.id)
+        
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions(chunk_size):
+            yield partition
+    
+    @staticmethod
+    async def get_simplified_history(
+        session: AsyncSession,
+        animal_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        tolerance: Optional[float] = None,
+        resolution: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a simplified track for an animal, newest first.
+        
+        Only the id/lat/lon/timestamp columns are fetched, in chunks, into
+        NumPy arrays. With ``resolution`` (seconds) fixes are averaged into
+        time buckets; with ``tolerance`` (meters) the track is reduced with
+        Ramer-Douglas-Peucker. When both are given bucketing runs first.
+        """
+        id_chunks, lat_chunks, lon_chunks, epoch_chunks = [], [], [], []
+        async for rows in LocationService.stream_location_history(
+            session, animal_id, start_date, end_date
+        ):
+            id_chunks.append(np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows)))
+            lat_chunks.append(np.fromiter((row.latitude for row in rows), dtype=np.float64, count=len(rows)))
+            lon_chunks.append(np.fromiter((row.longitude for row in rows), dtype=np.float64, count=len(rows)))
+            epoch_chunks.append(np.fromiter(
+                (
+                    (row.timestamp if row.timestamp.tzinfo else row.timestamp.replace(tzinfo=timezone.utc)).timestamp()
+                    for row in rows
+                ),
+                dtype=np.float64,
+                count=len(rows)
+            ))
+        
+        if not id_chunks:
+            return []
+        
+        ids = np.concatenate(id_chunks)
+        lats = np.concatenate(lat_chunks)
+        lons = np.concatenate(lon_chunks)
+        epochs = np.concatenate(epoch_chunks)
+        
+        if resolution:
+            first_index, epochs, lats, lons = time_buckets(epochs, lats, lons, resolution)
+            ids = ids[first_index]
+        
+        if tolerance:
+            keep = douglas_peucker(lats, lons, tolerance)
+            ids, lats, lons, epochs = ids[keep], lats[keep], lons[keep], epochs[keep]
+        
+        return [
+            {
+                "id": int(row_id),
+                "animal_id": animal_id,
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "timestamp": datetime.fromtimestamp(epoch, tz=timezone.utc),
+            }
+            for row_id, lat, lon, epoch in zip(
+                ids[::-1].tolist(), lats[::-1].tolist(), lons[::-1].tolist(), epochs[::-1].tolist()
+            )
+        ]
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import init_db
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "animal_locations"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+# Stored columns. Rows are moved straight into a partition, so the
+# latest_positions trigger on the parent (migration 009) does not fire for them
+COLUMNS = "id, animal_id, latitude, longitude, timestamp"
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift the first day of a month by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionService:
+    """
+    Maintenance of the monthly partitions of ``animal_locations``.
+
+    Partitions are named ``animal_locations_yYYYYmMM`` and cover
+    ``[first of month, first of next month)``. Rows outside every monthly
+    partition land in ``animal_locations_default``.
+
+    Each maintenance step runs in one transaction under an advisory lock, so
+    concurrent runs (several hosts on the same cron schedule) take turns.
+    """
+
+    @staticmethod
+    async def _lock_maintenance(session: AsyncSession) -> None:
+        # Released when the transaction commits or rolls back
+        await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:parent))"), {"parent": PARENT_TABLE})
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+    @staticmethod
+    async def list_partitions(session: AsyncSession) -> List[Tuple[str, date]]:
+        """Get the monthly partitions as (name, first day of month), oldest first."""
+        result = await session.execute(text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            """
+        ), {"parent": PARENT_TABLE})
+
+        partitions = []
+        for (name,) in result:
+            match = _PARTITION_RE.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @staticmethod
+    async def ensure_partitions(
+        session: AsyncSession,
+        months_ahead: Optional[int] = None,
+        today: Optional[date] = None
+    ) -> List[str]:
+        """
+        Create partitions for the current month and the next ``months_ahead``.
+
+        Rows that already landed in the default partition for a new month are
+        moved into it.
+
+        Returns:
+            Names of the partitions created
+        """
+        months_ahead = settings.LOCATION_PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+        today = today or date.today()
+        await PartitionService._lock_maintenance(session)
+        existing = {name for name, _ in await PartitionService.list_partitions(session)}
+
+        created = []
+        current = date(today.year, today.month, 1)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = PartitionService.partition_name(month)
+            if name in existing:
+                continue
+            await PartitionService._create_partition(session, name, month, add_months(month, 1))
+            created.append(name)
+
+        await session.commit()
+        for name in created:
+            logger.info("Created partition %s", name)
+        return created
+
+    @staticmethod
+    async def _create_partition(
+        session: AsyncSession,
+        name: str,
+        lower: date,
+        upper: date
+    ) -> None:
+        bounds = {"lower": lower, "upper": upper}
+        # Both paths check the default partition for rows in the new range.
+        # Lock it for the rest of the transaction (attaching would take this
+        # lock anyway) so no insert can land there between that check, moving
+        # the rows and the attach; inserts for other months wait briefly too.
+        await session.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+        stray = await session.execute(text(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE timestamp >= :lower AND timestamp < :upper LIMIT 1"
+        ), bounds)
+
+        if stray.first() is None:
+            await session.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            return
+
+        # Attaching a range the default partition already holds rows for would
+        # fail, so build the table standalone, move the rows, then attach it.
+        await session.execute(text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+        ))
+        await session.execute(text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE timestamp >= :lower AND timestamp < :upper
+                RETURNING {COLUMNS}
+            )
+            INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved
+            """
+        ), bounds)
+        await session.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+
+    @staticmethod
+    async def drop_expired_partitions(
+        session: AsyncSession,
+        retention_months: Optional[int] = None,
+        archive_schema: Optional[str] = None,
+        today: Optional[date] = None
+    ) -> List[str]:
+        """
+        Remove partitions that lie entirely before the retention window.
+
+        With an archive schema the partitions are detached and moved there
+        instead of being dropped. Rows of the default partition older than the
+        window are deleted (or moved to ``animal_locations_default`` in the
+        archive schema) as well. A retention of 0 keeps everything.
+
+        Returns:
+            Names of the partitions dropped or archived
+        """
+        retention_months = settings.LOCATION_RETENTION_MONTHS if retention_months is None else retention_months
+        archive_schema = archive_schema or settings.LOCATION_ARCHIVE_SCHEMA
+        if retention_months <= 0:
+            return []
+
+        today = today or date.today()
+        cutoff = add_months(date(today.year, today.month, 1), -retention_months)
+        await PartitionService._lock_maintenance(session)
+
+        expired = [
+            name for name, month in await PartitionService.list_partitions(session)
+            if add_months(month, 1) <= cutoff
+        ]
+        if archive_schema and expired:
+            await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        for name in expired:
+            if archive_schema:
+                await session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                await session.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+            else:
+                await session.execute(text(f"DROP TABLE {name}"))
+        stray = await PartitionService._expire_default_rows(session, cutoff, archive_schema)
+
+        await session.commit()
+        for name in expired:
+            logger.info("%s partition %s", "Archived" if archive_schema else "Dropped", name)
+        if stray:
+            logger.info(
+                "%s %d rows before %s from %s", "Archived" if archive_schema else "Deleted",
+                stray, cutoff, DEFAULT_PARTITION
+            )
+        return expired
+
+    @staticmethod
+    async def _expire_default_rows(
+        session: AsyncSession,
+        cutoff: date,
+        archive_schema: Optional[str]
+    ) -> int:
+        """Remove default-partition rows before ``cutoff``, which no monthly partition expiry reaches."""
+        if not archive_schema:
+            result = await session.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"), {"cutoff": cutoff}
+            )
+            return result.rowcount
+
+        stray = await session.execute(
+            text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff LIMIT 1"), {"cutoff": cutoff}
+        )
+        if stray.first() is None:
+            return 0
+        archive = f"{archive_schema}.{DEFAULT_PARTITION}"
+        await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {archive} "
+            f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+        ))
+        result = await session.execute(text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE timestamp < :cutoff
+                RETURNING {COLUMNS}
+            )
+            INSERT INTO {archive} ({COLUMNS}) SELECT {COLUMNS} FROM moved
+            """
+        ), {"cutoff": cutoff})
+        return result.rowcount
+
+    @staticmethod
+    async def run_maintenance(session: AsyncSession) -> Tuple[List[str], List[str]]:
+        """Pre-create upcoming partitions and expire old ones."""
+        created = await PartitionService.ensure_partitions(session)
+        expired = await PartitionService.drop_expired_partitions(session)
+        return created, expired
+
+
+async def _main() -> None:
+    _, session_factory = init_db()
+    async with session_factory() as session:
+        created, expired = await PartitionService.run_maintenance(session)
+    print(f"Created partitions: {', '.join(created) or 'none'}")
+    print(f"Expired partitions: {', '.join(expired) or 'none'}")
+
+
+if __name__ == "__main__":
+    # Intended to be run daily, e.g. from cron:
+    #   python -m app.services.partition_service
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,134 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.services.spatial_index import BoundingBox, GridIndex
+
+
+class LatestPosition:
+    """Last known position of one animal."""
+
+    __slots__ = ("id", "animal_id", "latitude", "longitude", "timestamp", "cached_at")
+
+    def __init__(
+        self,
+        id: int,
+        animal_id: str,
+        latitude: float,
+        longitude: float,
+        timestamp: datetime,
+        cached_at: float = 0.0
+    ):
+        self.id = id
+        self.animal_id = animal_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timestamp = timestamp
+        self.cached_at = cached_at
+
+    @classmethod
+    def from_row(cls, row: Any) -> "LatestPosition":
+        """Build from an AnimalLocation or any row with the same attributes."""
+        return cls(row.id, row.animal_id, row.latitude, row.longitude, row.timestamp)
+
+
+class PositionCache:
+    """
+    Write-through store of the latest position per animal.
+
+    The ingestion path calls ``update`` after every committed insert; entries
+    only move forward in time, so a late (out-of-order) fix never replaces a
+    newer one. Entries older than ``ttl`` seconds are treated as misses so a
+    process that does not ingest itself (API next to a separate listener)
+    goes back to the database periodically. A ``ttl`` of 0 disables expiry.
+
+    Positions are also kept in a GridIndex for the nearby/within queries;
+    those ignore ``ttl``, and ``loaded_at`` records when the whole set was
+    last reloaded from the database.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, cell_size: Optional[float] = None):
+        self.ttl = settings.LATEST_POSITION_CACHE_TTL if ttl is None else ttl
+        self._positions: Dict[str, LatestPosition] = {}
+        self.grid = GridIndex(cell_size or settings.SPATIAL_GRID_CELL_SIZE)
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _fresh(self, position: LatestPosition, now: float) -> bool:
+        return self.ttl <= 0 or now - position.cached_at < self.ttl
+
+    def get(self, animal_id: str) -> Optional[LatestPosition]:
+        position = self._positions.get(animal_id)
+        if position is None or not self._fresh(position, time.monotonic()):
+            return None
+        return position
+
+    def get_many(
+        self,
+        animal_ids: Iterable[str]
+    ) -> Tuple[Dict[str, LatestPosition], List[str]]:
+        """Split animal ids into cached positions and ids that missed."""
+        now = time.monotonic()
+        found: Dict[str, LatestPosition] = {}
+        missing: List[str] = []
+        for animal_id in animal_ids:
+            position = self._positions.get(animal_id)
+            if position is not None and self._fresh(position, now):
+                found[animal_id] = position
+            else:
+                missing.append(animal_id)
+        return found, missing
+
+    def update(self, row: Any) -> bool:
+        """
+        Store a position if it is at least as new as the cached one.
+
+        Returns:
+            True if the cache now holds this position
+        """
+        current = self._positions.get(row.animal_id)
+        if current is not None and current.timestamp > row.timestamp:
+            return False
+
+        position = row if isinstance(row, LatestPosition) else LatestPosition.from_row(row)
+        position.cached_at = time.monotonic()
+        self._positions[row.animal_id] = position
+        self.grid.update(row.animal_id, position.latitude, position.longitude)
+        return True
+
+    def update_many(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self.update(row)
+
+    def positions(self) -> List[LatestPosition]:
+        return list(self._positions.values())
+
+    def within(self, bbox: BoundingBox) -> List[LatestPosition]:
+        """Cached positions inside a bounding box."""
+        return [self._positions[animal_id] for animal_id in self.grid.within(bbox)]
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float
+    ) -> List[Tuple[LatestPosition, float]]:
+        """Cached positions within ``radius_m`` meters, closest first, with distances."""
+        return [
+            (self._positions[animal_id], distance)
+            for animal_id, distance in self.grid.nearby(latitude, longitude, radius_m)
+        ]
+
+    def invalidate(self, animal_id: Optional[str] = None) -> None:
+        if animal_id is None:
+            self._positions.clear()
+            self.grid.clear()
+            self.loaded_at = None
+        else:
+            self._positions.pop(animal_id, None)
+            self.grid.remove(animal_id)
+
+
+position_cache = PositionCache()
@@ -0,0 +1,183 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from app.config import settings
+
+# Produces (JSON body, extra response headers) on a cache miss
+Producer = Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def encode_json(adapter: TypeAdapter, data: Any) -> bytes:
+    """Serialise ORM objects or dicts through a response-model adapter."""
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+class CachedResponse:
+    """A rendered JSON response body with its ETag."""
+
+    __slots__ = ("body", "etag", "headers", "tags", "expires_at")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], tags: frozenset, expires_at: float):
+        self.body = body
+        self.etag = make_etag(body)
+        self.headers = headers
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class CacheStats:
+    """Counters for ResponseCache."""
+
+    __slots__ = ("hits", "misses", "not_modified", "evictions", "invalidations", "discarded")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ResponseCache:
+    """
+    In-memory cache of rendered GET responses with TTL and LRU eviction.
+
+    Entries carry tags naming the data they were built from (``geofence``,
+    ``alerts``, ``locations:<animal_id>``). Write paths call ``invalidate``
+    with the tags they touch, so a cached response is dropped as soon as
+    this process changes its data; the TTL bounds staleness for writes
+    made by other processes. Every invalidation also bumps the tag's
+    generation, so a response rendered while its data changed can be
+    recognised and left out of the cache.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = settings.RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        headers: Dict[str, str],
+        tags: Iterable[str],
+        ttl: Optional[float] = None
+    ) -> CachedResponse:
+        self._remove(key)
+        entry = CachedResponse(
+            body, headers, frozenset(tags), time.monotonic() + (self.ttl if ttl is None else ttl)
+        )
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+        return entry
+
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """How often each tag has been invalidated; compare before and after rendering."""
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of the tags."""
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in self._keys_by_tag.pop(tag, ()):
+                if self._remove(key):
+                    self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+        return True
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, **self.stats.snapshot()}
+
+
+response_cache = ResponseCache()
+
+
+def _request_key(request: Request) -> str:
+    return request.url.path + "?" + urlencode(sorted(request.query_params.multi_items()))
+
+
+async def cached_response(
+    request: Request,
+    tags: Iterable[str],
+    produce: Producer,
+    ttl: Optional[float] = None
+) -> Response:
+    """
+    Serve a GET from the response cache, rendering it with ``produce`` on a miss.
+
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
+    Exceptions from ``produce`` (e.g. a 404) propagate and nothing is cached.
+    A body rendered while one of its tags was invalidated may predate the
+    write, so it is served but not cached.
+    """
+    key = _request_key(request)
+    tags = tuple(tags)
+    entry = response_cache.get(key)
+    if entry is None:
+        response_cache.stats.misses += 1
+        generations = response_cache.generations(tags)
+        body, headers = await produce()
+        if response_cache.generations(tags) == generations:
+            entry = response_cache.put(key, body, headers, tags, ttl)
+        else:
+            response_cache.stats.discarded += 1
+            entry = CachedResponse(body, headers, frozenset(tags), 0.0)
+    else:
+        response_cache.stats.hits += 1
+
+    headers = {**entry.headers, "ETag": entry.etag}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.stats.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
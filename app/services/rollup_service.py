@@ -0,0 +1,493 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from sqlalchemy import case, desc, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import AnimalLocation, AnimalRollup
+from app.schemas import GPSData
+from app.services.geofence_engine import as_coordinate_arrays, geofence_engine
+from app.utils.trajectory import haversine_m
+
+logger = logging.getLogger(__name__)
+
+# Rollup period name -> bucket width in seconds
+PERIODS = {"hour": 3600, "day": 86400}
+
+# Rows per upsert statement; keeps SQLite under its bound-parameter limit
+UPSERT_CHUNK_SIZE = 1000
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Columns an upsert sets besides the (animal_id, period, bucket_start) key
+ROLLUP_VALUES = (
+    "fix_count", "distance_m", "active_seconds", "inside_seconds", "outside_seconds",
+    "first_timestamp", "last_timestamp",
+)
+
+
+class RollupsUnsupported(RuntimeError):
+    """Raised when the database dialect has no INSERT ... ON CONFLICT DO UPDATE."""
+
+
+def _epoch(timestamp: datetime) -> float:
+    # Fixes without an offset are taken to be UTC
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def _datetime(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def _intervals(
+    prev_epochs: np.ndarray,
+    prev_lats: np.ndarray,
+    prev_lons: np.ndarray,
+    prev_inside: np.ndarray,
+    epochs: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    max_gap: float,
+    active_speed: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distance, active, inside and outside time of the interval ending at each
+    fix. ``prev_epochs`` is NaN where a fix has no previous fix.
+    """
+    has_prev = ~np.isnan(prev_epochs)
+    distance = np.where(has_prev, haversine_m(prev_lats, prev_lons, lats, lons), 0.0)
+    elapsed = np.where(has_prev, epochs - prev_epochs, 0.0)
+    elapsed[elapsed > max_gap] = 0.0
+    active = np.where(distance > active_speed * elapsed, elapsed, 0.0)
+    inside_time = np.where(prev_inside, elapsed, 0.0)
+    return distance, active, inside_time, elapsed - inside_time
+
+
+class RollupService:
+    @staticmethod
+    async def upsert_rollups(
+        session: AsyncSession,
+        rows: Sequence[Dict[str, Any]],
+        replace: bool = False
+    ) -> int:
+        """
+        Add rollup deltas to the stored rows, creating missing ones.
+
+        Counters and durations are summed; first/last timestamps are widened.
+        With ``replace`` the rows overwrite the stored ones instead.
+        Uses INSERT ... ON CONFLICT DO UPDATE (PostgreSQL and SQLite).
+        """
+        if not rows:
+            return 0
+
+        dialect = session.bind.dialect.name
+        dialect_insert = UPSERT_INSERTS.get(dialect)
+        if dialect_insert is None:
+            raise RollupsUnsupported(f"Rollup upserts are not supported on {dialect}")
+
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = dialect_insert(AnimalRollup).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            new = stmt.excluded
+            if replace:
+                values = {name: new[name] for name in ROLLUP_VALUES}
+            else:
+                values = {
+                    "fix_count": AnimalRollup.fix_count + new.fix_count,
+                    "distance_m": AnimalRollup.distance_m + new.distance_m,
+                    "active_seconds": AnimalRollup.active_seconds + new.active_seconds,
+                    "inside_seconds": AnimalRollup.inside_seconds + new.inside_seconds,
+                    "outside_seconds": AnimalRollup.outside_seconds + new.outside_seconds,
+                    "first_timestamp": case(
+                        (new.first_timestamp < AnimalRollup.first_timestamp, new.first_timestamp),
+                        else_=AnimalRollup.first_timestamp
+                    ),
+                    "last_timestamp": case(
+                        (new.last_timestamp > AnimalRollup.last_timestamp, new.last_timestamp),
+                        else_=AnimalRollup.last_timestamp
+                    ),
+                }
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AnimalRollup.animal_id, AnimalRollup.period, AnimalRollup.bucket_start],
+                set_=values
+            )
+            await session.execute(stmt)
+        await session.commit()
+        return len(rows)
+
+    @staticmethod
+    async def get_rollups(
+        session: AsyncSession,
+        animal_id: str,
+        period: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 168
+    ) -> List[AnimalRollup]:
+        """
+        Get hourly or daily rollups for an animal, newest bucket first.
+
+        Args:
+            period: "hour" or "day"
+            start_date: Earliest bucket start to include
+            end_date: Latest bucket start to include
+        """
+        query = select(AnimalRollup).where(
+            AnimalRollup.animal_id == animal_id,
+            AnimalRollup.period == period
+        )
+        if start_date:
+            query = query.where(AnimalRollup.bucket_start >= start_date)
+        if end_date:
+            query = query.where(AnimalRollup.bucket_start <= end_date)
+
+        result = await session.execute(
+            query.order_by(desc(AnimalRollup.bucket_start)).limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+class RollupDelta:
+    """Not yet persisted increments for one (animal, period, bucket) row."""
+
+    __slots__ = (
+        "fix_count", "distance_m", "active_seconds", "inside_seconds", "outside_seconds",
+        "first_epoch", "last_epoch",
+    )
+
+    def __init__(self, fix_count, distance_m, active_seconds, inside_seconds, outside_seconds,
+                 first_epoch, last_epoch):
+        self.fix_count = fix_count
+        self.distance_m = distance_m
+        self.active_seconds = active_seconds
+        self.inside_seconds = inside_seconds
+        self.outside_seconds = outside_seconds
+        self.first_epoch = first_epoch
+        self.last_epoch = last_epoch
+
+    def merge(self, other: "RollupDelta") -> None:
+        self.fix_count += other.fix_count
+        self.distance_m += other.distance_m
+        self.active_seconds += other.active_seconds
+        self.inside_seconds += other.inside_seconds
+        self.outside_seconds += other.outside_seconds
+        self.first_epoch = min(self.first_epoch, other.first_epoch)
+        self.last_epoch = max(self.last_epoch, other.last_epoch)
+
+
+class RollupStats:
+    """Counters for RollupAggregator."""
+
+    __slots__ = ("fixes", "late", "recomputed", "flushes", "rows_upserted", "failed_flushes")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RollupAggregator:
+    """
+    Incremental hourly/daily rollups per animal, fed by the ingest pipeline
+    with fixes once they are stored.
+
+    Each batch is sorted by (animal, timestamp) and every fix is paired with
+    the animal's previous fix (from the batch or from the last batch), so
+    distance (haversine), time inside/outside the fence and active time
+    (speed above ``active_speed``) are computed for all intervals at once.
+    Per-bucket sums come from ``np.add.reduceat`` over the sorted arrays and
+    accumulate in memory until ``flush`` adds them to the stored rows.
+
+    An interval is counted in the bucket of its later fix; its time goes to
+    inside or outside according to the earlier fix. Intervals longer than
+    ``max_gap`` add distance but no time. The previous fix per animal is
+    only kept in memory, so the first interval after a restart is not counted.
+
+    A late fix (no newer than the animal's last counted fix, e.g. replayed
+    after a coverage gap) cannot be folded in incrementally, since it splits
+    an interval already counted. Its hour and day buckets, and the ones after
+    them, are marked dirty instead; the next ``flush`` recomputes those from
+    the stored fixes (geofenced against the fences active at that time) and
+    overwrites the stored rows.
+    """
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        max_gap: Optional[float] = None,
+        active_speed: Optional[float] = None
+    ):
+        self.flush_interval = flush_interval or settings.ROLLUP_FLUSH_INTERVAL
+        self.max_gap = settings.ROLLUP_MAX_GAP if max_gap is None else max_gap
+        self.active_speed = settings.ROLLUP_ACTIVE_SPEED if active_speed is None else active_speed
+        self.stats = RollupStats()
+        # animal_id -> (epoch, latitude, longitude, inside) of the last counted fix
+        self._last: Dict[str, Tuple[float, float, float, bool]] = {}
+        self._pending: Dict[Tuple[str, str, float], RollupDelta] = {}
+        # (animal_id, period, bucket start epoch) to recompute from stored fixes
+        self._dirty: Set[Tuple[str, str, float]] = set()
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def dirty(self) -> int:
+        return len(self._dirty)
+
+    def add(self, fixes: Sequence[GPSData], inside: Sequence[bool]) -> int:
+        """
+        Fold a batch of stored, geofenced fixes into the pending rollups.
+
+        Returns:
+            Number of fixes counted incrementally (late fixes are not)
+        """
+        if not fixes:
+            return 0
+        names, codes = np.unique([fix.animal_id for fix in fixes], return_inverse=True)
+        epochs = np.fromiter((_epoch(fix.timestamp) for fix in fixes), dtype=float, count=len(fixes))
+        lats, lons = as_coordinate_arrays(fixes)
+        inside = np.asarray(inside, dtype=bool)
+
+        order = np.lexsort((epochs, codes))
+        codes, epochs, lats, lons, inside = (a[order] for a in (codes, epochs, lats, lons, inside))
+
+        # Late fixes go to a recompute of their buckets; duplicates are dropped
+        last_epochs = np.array([self._last.get(name, (-np.inf,))[0] for name in names])
+        late = epochs <= last_epochs[codes]
+        if late.any():
+            self.stats.late += int(late.sum())
+            self._mark_dirty(names[codes[late]], epochs[late])
+        keep = ~late
+        keep[1:] &= (codes[1:] != codes[:-1]) | (epochs[1:] != epochs[:-1])
+        if not keep.all():
+            codes, epochs, lats, lons, inside = (a[keep] for a in (codes, epochs, lats, lons, inside))
+        n = len(codes)
+        if n == 0:
+            return 0
+        self.stats.fixes += n
+
+        # Previous fix of the same animal for every fix
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = codes[1:] != codes[:-1]
+        prev_epochs, prev_lats, prev_lons = (np.roll(a, 1) for a in (epochs, lats, lons))
+        prev_inside = np.roll(inside, 1)
+        for i in np.flatnonzero(group_start):
+            prev = self._last.get(names[codes[i]])
+            if prev is None:
+                prev_epochs[i] = np.nan
+            else:
+                prev_epochs[i], prev_lats[i], prev_lons[i], prev_inside[i] = prev
+
+        distance, active, inside_time, outside_time = _intervals(
+            prev_epochs, prev_lats, prev_lons, prev_inside, epochs, lats, lons,
+            self.max_gap, self.active_speed
+        )
+
+        for period, width in PERIODS.items():
+            buckets = epochs // width * width
+            starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (buckets[1:] != buckets[:-1])])
+            ends = np.r_[starts[1:], n] - 1
+            sums = [np.add.reduceat(a, starts).tolist() for a in (distance, active, inside_time, outside_time)]
+            for j, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+                delta = RollupDelta(
+                    end - start + 1, sums[0][j], sums[1][j], sums[2][j], sums[3][j],
+                    epochs[start], epochs[end]
+                )
+                key = (str(names[codes[start]]), period, float(buckets[start]))
+                existing = self._pending.get(key)
+                if existing is None:
+                    self._pending[key] = delta
+                else:
+                    existing.merge(delta)
+
+        for i in np.flatnonzero(np.r_[group_start[1:], True]).tolist():
+            self._last[str(names[codes[i]])] = (
+                float(epochs[i]), float(lats[i]), float(lons[i]), bool(inside[i])
+            )
+        return n
+
+    def _mark_dirty(self, animal_ids: np.ndarray, epochs: np.ndarray) -> None:
+        for animal_id, epoch in zip(animal_ids.tolist(), epochs.tolist()):
+            for period, width in PERIODS.items():
+                bucket = epoch // width * width
+                # The next stored fix may lie in the following bucket
+                self._dirty.add((animal_id, period, bucket))
+                self._dirty.add((animal_id, period, bucket + width))
+
+    async def _recompute(
+        self,
+        session: AsyncSession,
+        animal_id: str,
+        period: str,
+        bucket: float
+    ) -> Optional[Dict[str, Any]]:
+        """A bucket's rollup row rebuilt from the stored fixes, or None if it has none."""
+        start, end = _datetime(bucket), _datetime(bucket + PERIODS[period])
+        columns = (AnimalLocation.timestamp, AnimalLocation.latitude, AnimalLocation.longitude)
+        result = await session.execute(
+            select(*columns)
+            .where(
+                AnimalLocation.animal_id == animal_id,
+                AnimalLocation.timestamp >= start,
+                AnimalLocation.timestamp < end
+            )
+            .order_by(AnimalLocation.timestamp)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+        previous = (await session.execute(
+            select(*columns)
+            .where(AnimalLocation.animal_id == animal_id, AnimalLocation.timestamp < start)
+            .order_by(AnimalLocation.timestamp.desc())
+            .limit(1)
+        )).first()
+
+        fixes = ([previous] if previous is not None else []) + rows
+        epochs = np.array([_epoch(row.timestamp) for row in fixes])
+        lats, lons = as_coordinate_arrays(fixes)
+        index = await geofence_engine.get_index(session)
+        inside = index.containing_each(lats, lons)[0]
+
+        if previous is None:
+            prev_epochs = np.r_[np.nan, epochs[:-1]]
+            prev = slice(None)
+            prev_lats, prev_lons, prev_inside = (np.roll(a, 1) for a in (lats, lons, inside))
+        else:
+            prev = slice(1, None)
+            prev_epochs, prev_lats, prev_lons, prev_inside = (
+                a[:-1] for a in (epochs, lats, lons, inside)
+            )
+        distance, active, inside_time, outside_time = _intervals(
+            prev_epochs, prev_lats, prev_lons, prev_inside,
+            epochs[prev], lats[prev], lons[prev], self.max_gap, self.active_speed
+        )
+        return {
+            "animal_id": animal_id,
+            "period": period,
+            "bucket_start": start,
+            "fix_count": len(rows),
+            "distance_m": float(distance.sum()),
+            "active_seconds": float(active.sum()),
+            "inside_seconds": float(inside_time.sum()),
+            "outside_seconds": float(outside_time.sum()),
+            "first_timestamp": _datetime(epochs[prev][0]),
+            "last_timestamp": _datetime(epochs[-1]),
+        }
+
+    async def _flush_dirty(self) -> int:
+        """Recompute dirty buckets from stored fixes; they stay dirty on failure."""
+        dirty, self._dirty = self._dirty, set()
+        # The recompute covers everything stored, including pending increments
+        for key in dirty:
+            self._pending.pop(key, None)
+        try:
+            async with self._session_factory() as session:
+                rows = []
+                for animal_id, period, bucket in sorted(dirty):
+                    row = await self._recompute(session, animal_id, period, bucket)
+                    if row is not None:
+                        rows.append(row)
+                await RollupService.upsert_rollups(session, rows, replace=True)
+        except Exception:
+            logger.exception("Failed to recompute %d rollup buckets", len(dirty))
+            self.stats.failed_flushes += 1
+            self._dirty |= dirty
+            return 0
+
+        # Fixes stored while the recompute ran may or may not be in it
+        for key in dirty:
+            if self._pending.pop(key, None) is not None:
+                self._dirty.add(key)
+        self.stats.recomputed += len(rows)
+        self.stats.rows_upserted += len(rows)
+        return len(rows)
+
+    async def flush(self) -> int:
+        """
+        Recompute dirty buckets, then upsert the pending rollups. Both are
+        kept for the next flush on failure.
+        """
+        recomputed = await self._flush_dirty() if self._dirty else 0
+        if not self._pending:
+            return recomputed
+        pending, self._pending = self._pending, {}
+        rows = [
+            {
+                "animal_id": animal_id,
+                "period": period,
+                "bucket_start": _datetime(bucket),
+                "fix_count": delta.fix_count,
+                "distance_m": delta.distance_m,
+                "active_seconds": delta.active_seconds,
+                "inside_seconds": delta.inside_seconds,
+                "outside_seconds": delta.outside_seconds,
+                "first_timestamp": _datetime(delta.first_epoch),
+                "last_timestamp": _datetime(delta.last_epoch),
+            }
+            for (animal_id, period, bucket), delta in pending.items()
+        ]
+        try:
+            async with self._session_factory() as session:
+                await RollupService.upsert_rollups(session, rows)
+        except Exception:
+            logger.exception("Failed to upsert %d rollup rows", len(rows))
+            self.stats.failed_flushes += 1
+            for key, delta in pending.items():
+                existing = self._pending.get(key)
+                if existing is None:
+                    self._pending[key] = delta
+                else:
+                    existing.merge(delta)
+            return 0
+
+        self.stats.flushes += 1
+        self.stats.rows_upserted += len(rows)
+        return recomputed + len(rows)
+
+    async def start(self, session_factory: Callable[[], AsyncSession]) -> bool:
+        """
+        Start periodic flushing (idempotent).
+
+        Returns:
+            False, without starting, if the database cannot upsert rollups
+        """
+        async with session_factory() as session:
+            dialect = session.bind.dialect.name
+        if dialect not in UPSERT_INSERTS:
+            logger.warning("Rollups disabled: upserts are not supported on %s", dialect)
+            return False
+        self._session_factory = session_factory
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="rollup-flusher")
+        return True
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and flush what is pending."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+rollup_aggregator = RollupAggregator()
@@ -0,0 +1,132 @@
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.utils.trajectory import EARTH_RADIUS_M
+
+# (min_latitude, min_longitude, max_latitude, max_longitude)
+BoundingBox = Tuple[float, float, float, float]
+
+Cell = Tuple[int, int]
+
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def parse_bbox(raw: str) -> BoundingBox:
+    """
+    Parse "min_lat,min_lon,max_lat,max_lon".
+
+    Raises:
+        ValueError: If the box is malformed or inverted
+    """
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(v) for v in raw.split(","))
+    except ValueError:
+        raise ValueError("bbox must be four comma-separated numbers: min_lat,min_lon,max_lat,max_lon")
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid over one point per key.
+
+    Range queries only visit the cells overlapping the search area, so their
+    cost depends on the number of points near the query rather than the
+    total. When the area spans more cells than there are points, the points
+    are scanned directly instead.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self._points: Dict[str, Tuple[float, float, Cell]] = {}
+        self._cells: Dict[Cell, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        return math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size)
+
+    def update(self, key: str, latitude: float, longitude: float) -> None:
+        cell = self._cell(latitude, longitude)
+        current = self._points.get(key)
+        if current is not None and current[2] != cell:
+            self._discard(key, current[2])
+        self._points[key] = (latitude, longitude, cell)
+        self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        current = self._points.pop(key, None)
+        if current is not None:
+            self._discard(key, current[2])
+
+    def clear(self) -> None:
+        self._points.clear()
+        self._cells.clear()
+
+    def _discard(self, key: str, cell: Cell) -> None:
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def _candidates(self, bbox: BoundingBox) -> Iterator[Tuple[str, float, float]]:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        low_row, low_col = self._cell(min_lat, min_lon)
+        high_row, high_col = self._cell(max_lat, max_lon)
+        cells = (high_row - low_row + 1) * (high_col - low_col + 1)
+
+        if cells > len(self._points):
+            keys = self._points.keys()
+        else:
+            keys = (
+                key
+                for row in range(low_row, high_row + 1)
+                for col in range(low_col, high_col + 1)
+                for key in self._cells.get((row, col), ())
+            )
+        for key in keys:
+            latitude, longitude, _ = self._points[key]
+            if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon:
+                yield key, latitude, longitude
+
+    def within(self, bbox: BoundingBox) -> List[str]:
+        """Keys whose point lies inside the bounding box."""
+        return [key for key, _, _ in self._candidates(bbox)]
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Keys within ``radius_m`` meters of a point, closest first.
+
+        Returns:
+            List of (key, distance in meters)
+        """
+        lat_delta = radius_m / METERS_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(abs(latitude) + lat_delta, 90.0)))
+        lon_delta = 180.0 if cos_lat < 1e-6 else min(radius_m / (METERS_PER_DEGREE * cos_lat), 180.0)
+        bbox = (latitude - lat_delta, longitude - lon_delta, latitude + lat_delta, longitude + lon_delta)
+
+        matches = []
+        for key, lat, lon in self._candidates(bbox):
+            distance = haversine(latitude, longitude, lat, lon)
+            if distance <= radius_m:
+                matches.append((key, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches[:limit] if limit else matches
@@ -0,0 +1,148 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from sqlalchemy import desc, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import AnimalLocation
+from app.services.position_cache import LatestPosition, position_cache
+from app.services.spatial_index import BoundingBox
+
+# latest_positions (migration 009) holds one row per animal, kept current by
+# an insert trigger, so the GiST index on its geog column only ever covers
+# latest positions and the cost follows the number of animals in the area,
+# not the history stored there.
+_LATEST_POSITIONS = """
+    SELECT location_id AS id, animal_id, latitude, longitude, timestamp,
+           ST_Distance(geog, ST_MakePoint(:longitude, :latitude)::geography) AS distance_m
+    FROM latest_positions
+    WHERE timestamp >= :since AND {match}
+    ORDER BY distance_m
+    LIMIT :limit
+"""
+
+_NEARBY_SQL = _LATEST_POSITIONS.format(
+    match="ST_DWithin(geog, ST_MakePoint(:longitude, :latitude)::geography, :radius)",
+)
+
+_WITHIN_SQL = _LATEST_POSITIONS.format(
+    match=(
+        "geog && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)::geography "
+        "AND latitude BETWEEN :min_lat AND :max_lat "
+        "AND longitude BETWEEN :min_lon AND :max_lon"
+    ),
+)
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # SQLite returns naive datetimes; they are stored as UTC
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class SpatialService:
+    @staticmethod
+    def _use_postgis(session: AsyncSession) -> bool:
+        backend = settings.SPATIAL_BACKEND
+        if backend == "auto":
+            return session.bind.dialect.name == "postgresql"
+        return backend == "postgis"
+
+    @staticmethod
+    def _since() -> datetime:
+        return datetime.now(timezone.utc) - timedelta(hours=settings.SPATIAL_RECENT_HOURS)
+
+    @staticmethod
+    async def _refresh_positions(session: AsyncSession) -> None:
+        """Reload every recently seen animal's latest position into the grid index."""
+        loaded_at = position_cache.loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < settings.SPATIAL_REFRESH_INTERVAL:
+            return
+
+        ranked = (
+            select(
+                AnimalLocation.id,
+                AnimalLocation.animal_id,
+                AnimalLocation.latitude,
+                AnimalLocation.longitude,
+                AnimalLocation.timestamp,
+                func.row_number().over(
+                    partition_by=AnimalLocation.animal_id,
+                    order_by=desc(AnimalLocation.timestamp)
+                ).label("rank")
+            )
+            .where(AnimalLocation.timestamp >= SpatialService._since())
+            .subquery()
+        )
+        result = await session.execute(select(ranked).where(ranked.c.rank == 1))
+        position_cache.update_many(result)
+        position_cache.loaded_at = time.monotonic()
+
+    @staticmethod
+    async def find_nearby(
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: int = 1000
+    ) -> List[Tuple[LatestPosition, float]]:
+        """
+        Find animals whose latest position is within ``radius_m`` of a point.
+
+        Uses the PostGIS index over the latest_positions table, or the
+        in-memory grid over the latest positions elsewhere. Animals without a fix in the last
+        SPATIAL_RECENT_HOURS are left out.
+
+        Returns:
+            List of (latest position, distance in meters), closest first
+        """
+        if SpatialService._use_postgis(session):
+            result = await session.execute(text(_NEARBY_SQL), {
+                "latitude": latitude,
+                "longitude": longitude,
+                "radius": radius_m,
+                "since": SpatialService._since(),
+                "limit": limit,
+            })
+            return [(LatestPosition.from_row(row), row.distance_m) for row in result]
+
+        await SpatialService._refresh_positions(session)
+        since = SpatialService._since()
+        matches = [
+            (position, distance)
+            for position, distance in position_cache.nearby(latitude, longitude, radius_m)
+            if _utc(position.timestamp) >= since
+        ]
+        return matches[:limit]
+
+    @staticmethod
+    async def find_within(
+        session: AsyncSession,
+        bbox: BoundingBox,
+        limit: int = 1000
+    ) -> List[LatestPosition]:
+        """
+        Find animals whose latest position is inside a bounding box.
+
+        Uses the same backends and recency rule as find_nearby.
+        """
+        min_lat, min_lon, max_lat, max_lon = bbox
+        if SpatialService._use_postgis(session):
+            result = await session.execute(text(_WITHIN_SQL), {
+                "latitude": (min_lat + max_lat) / 2,
+                "longitude": (min_lon + max_lon) / 2,
+                "min_lat": min_lat,
+                "min_lon": min_lon,
+                "max_lat": max_lat,
+                "max_lon": max_lon,
+                "since": SpatialService._since(),
+                "limit": limit,
+            })
+            return [LatestPosition.from_row(row) for row in result]
+
+        await SpatialService._refresh_positions(session)
+        since = SpatialService._since()
+        matches = [
+            position for position in position_cache.within(bbox)
+            if _utc(position.timestamp) >= since
+        ]
+        return matches[:limit]
@@ -1,7 +1,20 @@
+import asyncio
 import json
+import logging
+import time
+import orjson
 import paho.mqtt.client as mqtt
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from app.config import settings
+from app.utils.metrics import MQTT_ALERTS, timed
+
+logger = logging.getLogger(__name__)
+
+_ENQUEUED = MQTT_ALERTS.labels("enqueued")
+_DROPPED = MQTT_ALERTS.labels("dropped")
+_SENT = MQTT_ALERTS.labels("sent")
+_FAILED = MQTT_ALERTS.labels("failed")
+_DELIVERED = MQTT_ALERTS.labels("delivered")
 
 
 class MQTTPublisher:
@@ -10,18 +23,247 @@ class MQTTPublisher:
         if settings.MQTT_USERNAME and settings.MQTT_PASSWORD:
             self.client.username_pw_set(settings.MQTT_USERNAME, settings.MQTT_PASSWORD)
         self.client.connect(settings.MQTT_BROKER_HOST, settings.MQTT_BROKER_PORT, 60)
-    
+        self.client.loop_start()
+
+    @timed("mqtt_publish_alert")
     def publish_alert(self, alert_data: Dict[str, Any]) -> bool:
         """Publish an alert to the MQTT alerts topic."""
         try:
             payload = json.dumps(alert_data)
             result = self.client.publish(settings.MQTT_TOPIC_ALERTS, payload)
-            return result.rc == mqtt.MQTT_ERR_SUCCESS
         except Exception as e:
             print(f"Error publishing alert: {e}")
+            _FAILED.inc()
             return False
-    
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            _FAILED.inc()
+            return False
+        _SENT.inc()
+        return True
+
     def disconnect(self):
         """Disconnect from MQTT broker."""
         self.client.disconnect()
+        self.client.loop_stop()
+
+
+class PublisherStats:
+    """Delivery and latency counters for AsyncMQTTPublisher."""
+
+    __slots__ = (
+        "enqueued", "dropped", "messages_sent", "alerts_sent", "alerts_delivered",
+        "unacknowledged", "failed", "retried", "reconnects", "total_latency", "max_latency",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats["avg_latency_ms"] = (
+            round(self.total_latency * 1000 / self.alerts_delivered, 3)
+            if self.alerts_delivered else 0.0
+        )
+        return stats
+
+
+class AsyncMQTTPublisher:
+    """
+    Non-blocking alert publisher for use inside an asyncio event loop.
+
+    ``publish_alert`` only enqueues; a background task serialises and hands
+    messages to paho, whose network loop runs in its own thread
+    (``loop_start``). paho reconnects with exponential backoff between
+    ``MQTT_RECONNECT_MIN_DELAY`` and ``MQTT_RECONNECT_MAX_DELAY``; while
+    disconnected alerts wait in the bounded queue and new ones are dropped
+    (and counted) once it is full. A batch paho rejects because the
+    connection just dropped is held and sent again after reconnecting.
+    Messages still unacknowledged at a disconnect stop being tracked for
+    delivery and are counted as ``unacknowledged``. With
+    ``MQTT_ALERT_BATCH_SIZE`` > 1 up to that many queued alerts are sent as
+    one JSON array message.
+    """
+
+    def __init__(
+        self,
+        topic: Optional[str] = None,
+        qos: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        client_factory: Callable[[], mqtt.Client] = mqtt.Client,
+    ):
+        self.topic = topic or settings.MQTT_TOPIC_ALERTS
+        self.qos = settings.MQTT_ALERT_QOS if qos is None else qos
+        self.batch_size = batch_size or settings.MQTT_ALERT_BATCH_SIZE
+        self.max_queue_size = max_queue_size or settings.MQTT_PUBLISH_QUEUE_MAXSIZE
+        self._client_factory = client_factory
+        self.client: Optional[mqtt.Client] = None
+        self.stats = PublisherStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # mid -> (enqueue time of the oldest alert, number of alerts in the message)
+        self._inflight: Dict[int, Tuple[float, int]] = {}
+        self._ever_connected = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected is not None and self._connected.is_set()
+
+    async def start(self) -> None:
+        """Connect in the background and start the sender task (idempotent)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._connected = asyncio.Event()
+
+        client = self._client_factory()
+        if settings.MQTT_USERNAME and settings.MQTT_PASSWORD:
+            client.username_pw_set(settings.MQTT_USERNAME, settings.MQTT_PASSWORD)
+        client.reconnect_delay_set(settings.MQTT_RECONNECT_MIN_DELAY, settings.MQTT_RECONNECT_MAX_DELAY)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_publish = self._on_publish
+        client.connect_async(settings.MQTT_BROKER_HOST, settings.MQTT_BROKER_PORT, settings.MQTT_KEEPALIVE)
+        client.loop_start()
+        self.client = client
+
+        self._task = asyncio.create_task(self._run(), name="mqtt-alert-publisher")
+
+    def publish_alert(self, alert_data: Dict[str, Any]) -> bool:
+        """
+        Queue an alert for publishing without blocking.
+
+        Returns:
+            False if the outbound queue is full and the alert was dropped
+        """
+        if not self.running:
+            raise RuntimeError("AsyncMQTTPublisher.start() must be awaited first")
+        try:
+            self._queue.put_nowait((time.perf_counter(), alert_data))
+        except asyncio.QueueFull:
+            self.stats.dropped += 1
+            _DROPPED.inc()
+            return False
+        self.stats.enqueued += 1
+        _ENQUEUED.inc()
+        return True
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Give queued alerts up to ``timeout`` seconds to go out, then disconnect."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping MQTT publisher with %d alerts unsent", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.client.disconnect()
+        self.client.loop_stop()
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch: List[Tuple[float, Dict[str, Any]]] = [await queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                await self._connected.wait()
+                while not self._send(batch):
+                    # paho saw the disconnect before its callback reached us
+                    self._connected.clear()
+                    self.stats.retried += len(batch)
+                    await self._connected.wait()
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    @timed("mqtt_publish_batch")
+    def _send(self, batch: List[Tuple[float, Dict[str, Any]]]) -> bool:
+        """
+        Hand a batch to paho.
+
+        Returns:
+            False if it was rejected for lack of a connection and should be
+            sent again after reconnecting; True once it was sent or dropped
+        """
+        alerts = [alert for _, alert in batch]
+        payload = orjson.dumps(alerts[0] if self.batch_size == 1 else alerts, default=str)
+        try:
+            info = self.client.publish(self.topic, payload, qos=self.qos)
+        except Exception:
+            logger.exception("Error publishing %d alerts", len(batch))
+            self.stats.failed += len(batch)
+            _FAILED.inc(len(batch))
+            return True
+
+        if info.rc == mqtt.MQTT_ERR_NO_CONN:
+            logger.info("MQTT not connected; holding %d alerts until it reconnects", len(batch))
+            return False
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.warning("MQTT publish returned rc=%s for %d alerts", info.rc, len(batch))
+            self.stats.failed += len(batch)
+            _FAILED.inc(len(batch))
+            return True
+
+        self.stats.messages_sent += 1
+        self.stats.alerts_sent += len(batch)
+        _SENT.inc(len(batch))
+        self._inflight[info.mid] = (batch[0][0], len(batch))
+        return True
+
+    # paho callbacks run on the network thread; hop back onto the event loop
+
+    def _on_connect(self, client, userdata, flags, rc):
+        self._loop.call_soon_threadsafe(self._handle_connect, rc)
+
+    def _on_disconnect(self, client, userdata, rc):
+        self._loop.call_soon_threadsafe(self._handle_disconnect)
+
+    def _on_publish(self, client, userdata, mid):
+        self._loop.call_soon_threadsafe(self._handle_delivered, mid, time.perf_counter())
+
+    def _handle_connect(self, rc: int) -> None:
+        if rc != 0:
+            logger.warning("MQTT connection refused (rc=%s)", rc)
+            return
+        if self._ever_connected:
+            self.stats.reconnects += 1
+        self._ever_connected = True
+        self._connected.set()
+
+    def _handle_disconnect(self) -> None:
+        self._connected.clear()
+        # Acks for these may never come (e.g. clean session), so stop waiting
+        self.stats.unacknowledged += sum(count for _, count in self._inflight.values())
+        self._inflight.clear()
 
+    def _handle_delivered(self, mid: int, delivered_at: float) -> None:
+        inflight = self._inflight.pop(mid, None)
+        if inflight is None:
+            return
+        enqueued_at, count = inflight
+        latency = delivered_at - enqueued_at
+        self.stats.alerts_delivered += count
+        _DELIVERED.inc(count)
+        self.stats.total_latency += latency * count
+        if latency > self.stats.max_latency:
+            self.stats.max_latency = latency
@@ -0,0 +1,101 @@
+from typing import Tuple
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def to_local_meters(lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Project coordinates to an equirectangular plane in meters around their mean."""
+    lat0 = np.radians(lats.mean()) if len(lats) else 0.0
+    x = np.radians(lons) * EARTH_RADIUS_M * np.cos(lat0)
+    y = np.radians(lats) * EARTH_RADIUS_M
+    return x, y
+
+
+def douglas_peucker(lats: np.ndarray, lons: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """
+    Ramer-Douglas-Peucker simplification of a track.
+
+    Distances from each segment are computed with NumPy over all interior
+    points at once; recursion is replaced by an explicit stack.
+
+    Returns:
+        Boolean mask of the points to keep (endpoints are always kept)
+    """
+    n = len(lats)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if n < 3:
+        return keep
+
+    x, y = to_local_meters(lats, lons)
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        px = x[start + 1:end] - x[start]
+        py = y[start + 1:end] - y[start]
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        length_sq = dx * dx + dy * dy
+
+        if length_sq == 0.0:
+            distances = np.hypot(px, py)
+        else:
+            # Distance to the segment, not the infinite line, so tracks that
+            # double back on themselves are not collapsed
+            t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+            distances = np.hypot(px - t * dx, py - t * dy)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return keep
+
+
+def time_buckets(
+    epochs: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    resolution_s: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Average positions over fixed time buckets.
+
+    ``epochs`` must be sorted ascending.
+
+    Returns:
+        Tuple of (index of the first fix in each bucket, bucket start epochs,
+        mean latitudes, mean longitudes)
+    """
+    buckets = np.floor(epochs / resolution_s).astype(np.int64)
+    _, first_index, inverse, counts = np.unique(
+        buckets, return_index=True, return_inverse=True, return_counts=True
+    )
+    mean_lats = np.bincount(inverse, weights=lats) / counts
+    mean_lons = np.bincount(inverse, weights=lons) / counts
+    starts = buckets[first_index] * resolution_s
+    return first_index, starts, mean_lats, mean_lons
+
+
+def haversine_m(
+    lats1: np.ndarray,
+    lons1: np.ndarray,
+    lats2: np.ndarray,
+    lons2: np.ndarray
+) -> np.ndarray:
+    """Great-circle distance in meters between paired points, element-wise."""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lats1, lons1, lats2, lons2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,99 @@
+"""
+Compare the stdlib json + GPSData validation path with the fast codec and
+the binary wire format.
+
+Usage:
+    python -m benchmarks.bench_decode [--fixes 100000] [--batch 100]
+
+Times decoding of ``--fixes`` fixes delivered one per message and in
+arrays (or binary frames) of ``--batch`` fixes, and reports the payload
+bytes per fix of each format. Results are printed as JSON.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+from app.ingest.binary import decode_gps_binary, encode_gps_frame, encode_gps_record
+from app.ingest.codec import decode_gps_json
+from app.schemas import GPSData
+
+
+def make_fixes(n: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "animal_id": f"A{rng.randrange(1000):04d}",
+            "latitude": 12.97 + rng.uniform(-0.01, 0.01),
+            "longitude": 77.59 + rng.uniform(-0.01, 0.01),
+            "timestamp": (start + timedelta(seconds=i)).isoformat().replace("+00:00", "Z"),
+        }
+        for i in range(n)
+    ]
+
+
+def stdlib_decode(payload: bytes) -> List[GPSData]:
+    data = json.loads(payload)
+    items = data if isinstance(data, list) else [data]
+    return [GPSData.model_validate(item) for item in items]
+
+
+def fast_decode(payload: bytes) -> List[GPSData]:
+    return decode_gps_json(payload)[0]
+
+
+def binary_decode(payload: bytes) -> List[GPSData]:
+    return decode_gps_binary(payload)[0]
+
+
+def time_decoder(decoder, payloads: List[bytes]) -> float:
+    started = time.perf_counter()
+    for payload in payloads:
+        decoder(payload)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixes", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    fixes = make_fixes(args.fixes)
+    models = [GPSData.model_validate(fix) for fix in fixes]
+    batches = range(0, len(fixes), args.batch)
+    shapes = {
+        "single": (
+            [json.dumps(fix).encode() for fix in fixes],
+            [encode_gps_record(fix) for fix in models],
+        ),
+        f"array_{args.batch}": (
+            [json.dumps(fixes[i:i + args.batch]).encode() for i in batches],
+            [encode_gps_frame(models[i:i + args.batch]) for i in batches],
+        ),
+    }
+
+    results = []
+    for shape, (payloads, binary_payloads) in shapes.items():
+        stdlib_seconds = time_decoder(stdlib_decode, payloads)
+        fast_seconds = time_decoder(fast_decode, payloads)
+        binary_seconds = time_decoder(binary_decode, binary_payloads)
+        results.append({
+            "shape": shape,
+            "fixes": args.fixes,
+            "stdlib_fixes_per_second": round(args.fixes / stdlib_seconds),
+            "fast_fixes_per_second": round(args.fixes / fast_seconds),
+            "binary_fixes_per_second": round(args.fixes / binary_seconds),
+            "speedup": round(stdlib_seconds / fast_seconds, 2),
+            "binary_speedup": round(stdlib_seconds / binary_seconds, 2),
+            "json_bytes_per_fix": round(sum(map(len, payloads)) / args.fixes, 1),
+            "binary_bytes_per_fix": round(sum(map(len, binary_payloads)) / args.fixes, 1),
+        })
+
+    print(json.dumps({"benchmark": "decode", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
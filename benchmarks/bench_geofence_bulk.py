@@ -0,0 +1,67 @@
+"""
+Compare the scalar geofence check with the vectorized bulk check.
+
+Usage:
+    python -m benchmarks.bench_geofence_bulk [--sizes 10000 100000 1000000]
+
+The scalar path is timed on at most ``--scalar-limit`` points and
+extrapolated linearly beyond that, since timing it on a million points
+takes minutes. Results are printed as JSON.
+"""
+import argparse
+import json
+import time
+import numpy as np
+from app.services.geofence_engine import DEFAULT_BOUNDARY, CompiledGeofence
+from app.services.geofence_service import GeofenceService
+
+
+def random_points(n: int, seed: int = 0):
+    """Uniform points over a box slightly larger than the default boundary."""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(12.9700, 12.9740, n)
+    lons = rng.uniform(77.5910, 77.5955, n)
+    return lats, lons
+
+
+def time_scalar(lats, lons, limit: int):
+    n = min(len(lats), limit)
+    started = time.perf_counter()
+    for lat, lon in zip(lats[:n].tolist(), lons[:n].tolist()):
+        GeofenceService.is_inside_geofence(lat, lon, DEFAULT_BOUNDARY)
+    elapsed = time.perf_counter() - started
+    return elapsed * len(lats) / n, n < len(lats)
+
+
+def time_bulk(lats, lons, geofence: CompiledGeofence):
+    started = time.perf_counter()
+    mask = geofence.contains_many(lats, lons)
+    return time.perf_counter() - started, mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--scalar-limit", type=int, default=100_000)
+    args = parser.parse_args()
+
+    geofence = CompiledGeofence(None, "default", None, DEFAULT_BOUNDARY)
+    results = []
+    for size in args.sizes:
+        lats, lons = random_points(size)
+        scalar_seconds, extrapolated = time_scalar(lats, lons, args.scalar_limit)
+        bulk_seconds, mask = time_bulk(lats, lons, geofence)
+        results.append({
+            "points": size,
+            "inside": int(mask.sum()),
+            "scalar_seconds": round(scalar_seconds, 6),
+            "scalar_extrapolated": extrapolated,
+            "bulk_seconds": round(bulk_seconds, 6),
+            "speedup": round(scalar_seconds / bulk_seconds, 1) if bulk_seconds else None,
+        })
+
+    print(json.dumps({"benchmark": "geofence_bulk", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
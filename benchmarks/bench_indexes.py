@@ -0,0 +1,150 @@
+"""
+Compare insert and query cost of the legacy and composite location indexes.
+
+Usage:
+    python -m benchmarks.bench_indexes [--rows 200000] [--animals 500]
+                                       [--database-url URL]
+
+Two scratch tables are created in the target database (DATABASE_URL by
+default): one with the five single-column indexes from migration 001 and
+one with the (animal_id, timestamp DESC) + BRIN(timestamp) layout from
+migration 004. The same seeded rows are inserted into both, then the
+latest-position and history-range queries are timed against each. The
+scratch tables are dropped afterwards. Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table, desc, select,
+)
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config import settings
+
+metadata = MetaData()
+
+
+def _columns():
+    return [
+        Column("id", Integer, primary_key=True),
+        Column("animal_id", String, nullable=False),
+        Column("latitude", Float, nullable=False),
+        Column("longitude", Float, nullable=False),
+        Column("timestamp", DateTime(timezone=True), nullable=False),
+    ]
+
+
+legacy = Table("bench_locations_legacy", metadata, *_columns())
+Index("bench_legacy_idx_animal_id", legacy.c.animal_id)
+Index("bench_legacy_idx_timestamp", legacy.c.timestamp)
+Index("bench_legacy_ix_id", legacy.c.id)
+Index("bench_legacy_ix_animal_id", legacy.c.animal_id)
+Index("bench_legacy_ix_timestamp", legacy.c.timestamp)
+
+composite = Table("bench_locations_composite", metadata, *_columns())
+Index("bench_composite_animal_id_timestamp", composite.c.animal_id, composite.c.timestamp.desc())
+Index("bench_composite_brin_timestamp", composite.c.timestamp, postgresql_using="brin")
+
+
+def seed_rows(rows: int, animals: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "animal_id": f"A{i % animals:05d}",
+            "latitude": 12.97 + rng.uniform(-0.01, 0.01),
+            "longitude": 77.59 + rng.uniform(-0.01, 0.01),
+            "timestamp": start + timedelta(seconds=10 * (i // animals)),
+        }
+        for i in range(rows)
+    ]
+
+
+async def time_inserts(engine, table, rows, batch_size: int) -> float:
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        for offset in range(0, len(rows), batch_size):
+            await conn.execute(table.insert(), rows[offset:offset + batch_size])
+    return time.perf_counter() - started
+
+
+async def time_queries(engine, table, animal_ids, range_start, range_end) -> dict:
+    async with engine.connect() as conn:
+        started = time.perf_counter()
+        for animal_id in animal_ids:
+            await conn.execute(
+                select(table)
+                .where(table.c.animal_id == animal_id)
+                .order_by(desc(table.c.timestamp))
+                .limit(1)
+            )
+        latest_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for animal_id in animal_ids:
+            await conn.execute(
+                select(table)
+                .where(
+                    table.c.animal_id == animal_id,
+                    table.c.timestamp >= range_start,
+                    table.c.timestamp <= range_end,
+                )
+                .order_by(desc(table.c.timestamp))
+            )
+        history_seconds = time.perf_counter() - started
+    return {
+        "latest_ms_per_query": round(latest_seconds * 1000 / len(animal_ids), 4),
+        "history_ms_per_query": round(history_seconds * 1000 / len(animal_ids), 4),
+    }
+
+
+async def run(args) -> dict:
+    engine = create_async_engine(args.database_url)
+    rows = seed_rows(args.rows, args.animals)
+    range_start = rows[len(rows) // 2]["timestamp"]
+    range_end = range_start + timedelta(hours=1)
+    animal_ids = random.Random(1).sample(sorted({row["animal_id"] for row in rows}), min(args.queries, args.animals))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+
+    results = {}
+    try:
+        for name, table in (("legacy", legacy), ("composite", composite)):
+            insert_seconds = await time_inserts(engine, table, rows, args.batch_size)
+            results[name] = {
+                "insert_seconds": round(insert_seconds, 4),
+                "insert_rows_per_second": round(len(rows) / insert_seconds),
+                **await time_queries(engine, table, animal_ids, range_start, range_end),
+            }
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+        await engine.dispose()
+
+    return {
+        "benchmark": "indexes",
+        "dialect": engine.dialect.name,
+        "rows": args.rows,
+        "animals": args.animals,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--animals", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+End-to-end ingest throughput through IngestPipeline into a real database.
+
+Usage:
+    python -m benchmarks.bench_ingest [--fixes 100000] [--animals 1000]
+                                      [--workers 4] [--database-url URL]
+                                      [--no-rollups] [--no-decode]
+
+Creates the schema in the target database (a scratch SQLite file by
+default; pass a PostgreSQL URL to measure the production path), then feeds
+fixes from the synthetic collar fleet through the pipeline exactly as the
+MQTT consumer does: decoded from JSON payloads of ``--batch`` fixes, or
+submitted as already validated models with ``--no-decode``. The clock
+stops once every fix has been written, so the MQTT alert publisher (which
+has no broker to talk to here) does not count. Existing rows in the target
+database are left alone; only the rows written by the run are counted.
+Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.ingest.pipeline import IngestPipeline
+from app.models import Alert, AnimalLocation
+from app.services.breach_tracker import BreachTracker
+from app.services.rollup_service import RollupAggregator
+from benchmarks.fleet import CollarFleet
+
+
+async def count_rows(session_factory, model) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(model))
+
+
+async def wait_until_written(pipeline: IngestPipeline, total: int, poll: float = 0.01) -> None:
+    # Fixes dropped as duplicates never reach a writer
+    while pipeline.stats.duplicates + sum(
+        writer.metrics.rows + writer.metrics.failed_rows for writer in pipeline.location_writers
+    ) < total:
+        await asyncio.sleep(poll)
+
+
+async def run(args) -> dict:
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    fleet = CollarFleet(args.animals, interval=args.interval)
+    fixes = fleet.fixes(args.fixes)[:args.fixes]
+    batches = [fixes[i:i + args.batch] for i in range(0, len(fixes), args.batch)]
+    payloads = [
+        json.dumps([fix.model_dump(mode="json") for fix in batch]).encode()
+        for batch in batches
+    ]
+
+    locations_before = await count_rows(session_factory, AnimalLocation)
+    alerts_before = await count_rows(session_factory, Alert)
+
+    pipeline = IngestPipeline(
+        workers=args.workers,
+        session_factory=session_factory,
+        tracker=BreachTracker(),
+        rollups=None if args.no_rollups else RollupAggregator(),
+    )
+    await pipeline.start()
+    try:
+        started = time.perf_counter()
+        if args.no_decode:
+            for batch in batches:
+                await pipeline.submit_many(batch)
+        else:
+            for payload in payloads:
+                await pipeline.submit_payload(payload, "application/json")
+        submitted_seconds = time.perf_counter() - started
+        await wait_until_written(pipeline, len(fixes))
+        written_seconds = time.perf_counter() - started
+    finally:
+        await pipeline.stop()
+
+    snapshot = pipeline.snapshot()
+    locations_written = await count_rows(session_factory, AnimalLocation) - locations_before
+    alerts_written = await count_rows(session_factory, Alert) - alerts_before
+    await engine.dispose()
+
+    writers = snapshot["location_writers"]
+    flushes = sum(writer["batches"] for writer in writers)
+    return {
+        "benchmark": "ingest",
+        "dialect": engine.dialect.name,
+        "fixes": len(fixes),
+        "animals": args.animals,
+        "workers": args.workers,
+        "decode": not args.no_decode,
+        "rollups": not args.no_rollups,
+        "submit_seconds": round(submitted_seconds, 4),
+        "end_to_end_seconds": round(written_seconds, 4),
+        "fixes_per_second": round(len(fixes) / written_seconds),
+        "locations_written": locations_written,
+        "alerts_written": alerts_written,
+        "location_flushes": flushes,
+        "mean_flush_ms": round(
+            sum(writer["total_flush_seconds"] for writer in writers) * 1000 / max(flushes, 1), 3
+        ),
+        "failed_rows": sum(writer["failed_rows"] for writer in writers),
+        "rollup_stats": snapshot["rollups"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixes", type=int, default=100_000)
+    parser.add_argument("--animals", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between fixes of one animal")
+    parser.add_argument("--batch", type=int, default=100, help="Fixes per JSON payload")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--database-url", default=None, help="Defaults to a scratch SQLite file")
+    parser.add_argument("--no-rollups", action="store_true")
+    parser.add_argument("--no-decode", action="store_true", help="Submit validated models instead of JSON payloads")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        args.database_url = f"sqlite+aiosqlite:///{scratch}"
+    try:
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+    finally:
+        if scratch is not None:
+            os.remove(scratch)
+
+
+if __name__ == "__main__":
+    main()
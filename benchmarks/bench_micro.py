@@ -0,0 +1,108 @@
+"""
+Microbenchmarks of the per-fix hot spots in the geofence and schema code.
+
+Usage:
+    python -m benchmarks.bench_micro [--fixes 20000] [--repeat 5]
+
+Times GeofenceService.is_inside_geofence (scalar and bulk),
+GeofenceService.parse_boundary_points and pydantic validation of GPS fixes
+on fixes from the synthetic collar fleet. Each case is run ``--repeat``
+times and the best run is reported. Results are printed as JSON.
+"""
+import argparse
+import json
+import time
+from typing import Callable, List
+from pydantic import TypeAdapter
+from app.models import GeofenceBoundary
+from app.schemas import AnimalLocationCreate, GPSData
+from app.services.geofence_engine import DEFAULT_BOUNDARY, CompiledGeofence, as_coordinate_arrays
+from app.services.geofence_service import GeofenceService
+from benchmarks.fleet import CollarFleet
+
+_gps_list = TypeAdapter(List[GPSData])
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def result(name: str, operations: int, seconds: float) -> dict:
+    return {
+        "case": name,
+        "operations": operations,
+        "seconds": round(seconds, 6),
+        "us_per_op": round(seconds * 1e6 / operations, 4),
+        "ops_per_second": round(operations / seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixes", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--boundary-points", type=int, nargs="+", default=[4, 64, 1024])
+    args = parser.parse_args()
+
+    fixes = CollarFleet(1000).fixes(args.fixes)[:args.fixes]
+    n = len(fixes)
+    points = [(fix.latitude, fix.longitude) for fix in fixes]
+    raw = [
+        {"animal_id": fix.animal_id, "latitude": fix.latitude, "longitude": fix.longitude,
+         "timestamp": fix.timestamp.isoformat().replace("+00:00", "Z")}
+        for fix in fixes
+    ]
+    geofence = CompiledGeofence(None, "default", None, DEFAULT_BOUNDARY)
+
+    def scalar():
+        for lat, lon in points:
+            GeofenceService.is_inside_geofence(lat, lon, DEFAULT_BOUNDARY)
+
+    def bulk():
+        geofence.contains_many(*as_coordinate_arrays(fixes))
+
+    results = [
+        result("is_inside_geofence", n, best_of(args.repeat, scalar)),
+        result("is_inside_geofence_bulk", n, best_of(args.repeat, bulk)),
+    ]
+
+    # Boundaries of increasing size, parsed from their stored JSON form
+    for size in args.boundary_points:
+        boundary = GeofenceBoundary(
+            name=f"bench_{size}",
+            boundary_points=json.dumps([
+                {"latitude": 12.97 + i * 1e-6, "longitude": 77.59 + (i % 2) * 1e-3}
+                for i in range(size)
+            ])
+        )
+        loops = max(1, 200_000 // size)
+        seconds = best_of(args.repeat, lambda: [
+            GeofenceService.parse_boundary_points(boundary) for _ in range(loops)
+        ])
+        results.append(result(f"parse_boundary_points[{size}]", loops, seconds))
+
+    results.extend([
+        result("GPSData.model_validate", n, best_of(
+            args.repeat, lambda: [GPSData.model_validate(item) for item in raw]
+        )),
+        result("GPSData list validate_python", n, best_of(
+            args.repeat, lambda: _gps_list.validate_python(raw)
+        )),
+        result("AnimalLocationCreate.model_validate", n, best_of(
+            args.repeat, lambda: [AnimalLocationCreate.model_validate(item) for item in raw]
+        )),
+        result("GPSData.model_dump", n, best_of(
+            args.repeat, lambda: [fix.model_dump(mode="json") for fix in fixes]
+        )),
+    ])
+
+    print(json.dumps({"benchmark": "micro", "fixes": n, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Concurrent read load against the latest-position, history and alert routes.
+
+Usage:
+    python -m benchmarks.bench_read_load [--base-url http://localhost:8000]
+                                         [--in-process] [--seed]
+                                         [--concurrency 16] [--duration 10]
+                                         [--scenarios latest bulk_latest ...]
+
+Each scenario runs ``--concurrency`` httpx clients in a closed loop for
+``--duration`` seconds, each request for a random animal of the synthetic
+collar fleet, and reports throughput, status codes and latency
+percentiles. By default requests go to a running server at ``--base-url``;
+``--in-process`` calls the app through httpx's ASGI transport instead, so
+no server is needed (and the numbers exclude HTTP parsing and the network).
+
+``--seed`` first writes ``--ticks`` reporting intervals of the fleet, and
+the breach alerts they produce, into the configured DATABASE_URL, which
+must be the database the server (or the in-process app) reads. Results are
+printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+import httpx
+import numpy as np
+from app.config import settings
+from benchmarks.fleet import CollarFleet
+
+# Builds the request path of one call from (rng, animal ids, fleet)
+Scenario = Callable[[random.Random, List[str], CollarFleet], str]
+
+
+def _iso(fleet: CollarFleet, ticks_back: int) -> str:
+    moment = fleet.timestamp - fleet.interval * ticks_back
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "latest": lambda rng, ids, fleet: f"/animals/{rng.choice(ids)}/latest",
+    "bulk_latest": lambda rng, ids, fleet: "/animals/latest?ids=" + ",".join(rng.sample(ids, min(100, len(ids)))),
+    "history": lambda rng, ids, fleet: f"/animals/{rng.choice(ids)}/history?limit=100",
+    # Ends in the past, so it is served from the response cache after the first call
+    "history_closed": lambda rng, ids, fleet: (
+        f"/animals/{rng.choice(ids)}/history?limit=100&end_date={_iso(fleet, 0)}"
+    ),
+    "history_simplified": lambda rng, ids, fleet: (
+        f"/animals/{rng.choice(ids)}/history?tolerance=5&start_date={_iso(fleet, 360)}"
+    ),
+    "alerts": lambda rng, ids, fleet: "/alerts?limit=100",
+    "alerts_by_animal": lambda rng, ids, fleet: f"/alerts/animal/{rng.choice(ids)}?limit=100",
+}
+
+
+async def seed(fleet: CollarFleet, ticks: int) -> Dict[str, int]:
+    """Write the fleet's fixes and the alerts a BreachTracker derives from them."""
+    from app.database import Base, init_db
+    from app.services.alert_service import AlertService
+    from app.services.breach_tracker import BreachTracker
+    from app.services.geofence_engine import DEFAULT_BOUNDARY, CompiledGeofence, as_coordinate_arrays
+    from app.services.location_service import LocationService
+
+    engine, session_factory = init_db()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    geofence = CompiledGeofence(None, "default", None, DEFAULT_BOUNDARY)
+    tracker = BreachTracker()
+    locations = alerts = 0
+    async with session_factory() as session:
+        for _ in range(ticks):
+            fixes = fleet.tick_models()
+            inside = geofence.contains_many(*as_coordinate_arrays(fixes)).tolist()
+            locations += await LocationService.create_locations_bulk(session, fixes)
+            alerts += await AlertService.create_alerts_bulk(session, tracker.observe_many(fixes, inside))
+    return {"locations": locations, "alerts": alerts}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    build: Scenario,
+    animal_ids: List[str],
+    fleet: CollarFleet,
+    concurrency: int,
+    duration: float
+) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            path = build(rng, animal_ids, fleet)
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 3),
+            "p50": round(float(np.percentile(ms, 50)), 3),
+            "p90": round(float(np.percentile(ms, 90)), 3),
+            "p99": round(float(np.percentile(ms, 99)), 3),
+            "max": round(float(ms.max()), 3),
+        } if len(ms) else None,
+    }
+
+
+async def run(args) -> dict:
+    fleet = CollarFleet(args.animals, interval=args.interval)
+    seeded = await seed(fleet, args.ticks) if args.seed else None
+    if not args.seed:
+        # Move the clock to where a seeded run would have left it
+        fleet.timestamp += fleet.interval * args.ticks
+
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+    else:
+        transport = None
+        base_url = args.base_url
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], fleet.animal_ids, fleet, args.concurrency, args.duration
+            )
+
+    return {
+        "benchmark": "read_load",
+        "target": "in-process" if args.in_process else args.base_url,
+        "database": settings.DATABASE_URL.split("://", 1)[0],
+        "animals": args.animals,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "seeded": seeded,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Call the app through the ASGI transport")
+    parser.add_argument("--seed", action="store_true", help="Write fleet data to DATABASE_URL first")
+    parser.add_argument("--animals", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=720, help="Reporting intervals to seed per animal")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between fixes of one animal")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
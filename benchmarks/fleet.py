@@ -0,0 +1,112 @@
+"""
+Synthetic collar fleet shared by the benchmarks.
+
+Each animal does a random walk that starts at a random point around the
+default geofence boundary and is pulled gently back towards its centre, so
+a long run keeps producing a mix of inside and outside fixes (and therefore
+breach/return alerts) instead of drifting away.
+
+Usage:
+    python -m benchmarks.fleet [--animals 100] [--ticks 10] > fixes.jsonl
+
+prints one fix per line as JSON, in the format accepted by the MQTT topic
+and ``POST /ingest``.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from pydantic import TypeAdapter
+from app.schemas import GPSData
+from app.services.geofence_engine import DEFAULT_BOUNDARY
+
+_LATS, _LONS = zip(*DEFAULT_BOUNDARY)
+CENTER = (sum(_LATS) / len(_LATS), sum(_LONS) / len(_LONS))
+# Half the boundary's extent on each axis
+SPREAD = ((max(_LATS) - min(_LATS)) / 2, (max(_LONS) - min(_LONS)) / 2)
+
+METERS_PER_DEGREE = 111_320.0
+
+_gps_list = TypeAdapter(List[GPSData])
+
+
+class CollarFleet:
+    """
+    ``animals`` collars reporting every ``interval`` seconds.
+
+    Positions are advanced for the whole fleet at once with NumPy; each
+    tick moves every animal by a normally distributed step of ``step_m``
+    meters (standard deviation) plus a pull of ``pull`` times its offset
+    back towards the boundary centre.
+    """
+
+    def __init__(
+        self,
+        animals: int,
+        seed: int = 0,
+        interval: float = 10.0,
+        step_m: float = 5.0,
+        pull: float = 0.001,
+        start: Optional[datetime] = None
+    ):
+        self.animal_ids = [f"A{i:05d}" for i in range(animals)]
+        self.interval = timedelta(seconds=interval)
+        self.step = step_m / METERS_PER_DEGREE
+        self.pull = pull
+        self.timestamp = start or datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self._rng = np.random.default_rng(seed)
+        # Start within twice the boundary's extent, so some begin outside
+        self.lats = CENTER[0] + self._rng.uniform(-2, 2, animals) * SPREAD[0]
+        self.lons = CENTER[1] + self._rng.uniform(-2, 2, animals) * SPREAD[1]
+
+    def __len__(self) -> int:
+        return len(self.animal_ids)
+
+    def advance(self) -> None:
+        n = len(self.animal_ids)
+        self.lats += self._rng.normal(0, self.step, n) + self.pull * (CENTER[0] - self.lats)
+        self.lons += self._rng.normal(0, self.step, n) + self.pull * (CENTER[1] - self.lons)
+        self.timestamp += self.interval
+
+    def tick(self) -> List[Dict]:
+        """Advance one reporting interval and return every animal's fix as a dict."""
+        self.advance()
+        return [
+            {"animal_id": animal_id, "latitude": lat, "longitude": lon, "timestamp": self.timestamp}
+            for animal_id, lat, lon in zip(self.animal_ids, self.lats.tolist(), self.lons.tolist())
+        ]
+
+    def tick_models(self) -> List[GPSData]:
+        return _gps_list.validate_python(self.tick())
+
+    def ticks(self, count: int) -> Iterator[List[Dict]]:
+        for _ in range(count):
+            yield self.tick()
+
+    def fixes(self, count: int) -> List[GPSData]:
+        """At least ``count`` fixes, whole ticks at a time, oldest first."""
+        fixes: List[GPSData] = []
+        while len(fixes) < count:
+            fixes.extend(self.tick_models())
+        return fixes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--animals", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fleet = CollarFleet(args.animals, seed=args.seed, interval=args.interval)
+    for fixes in fleet.ticks(args.ticks):
+        for fix in fixes:
+            fix["timestamp"] = fix["timestamp"].isoformat().replace("+00:00", "Z")
+            sys.stdout.write(json.dumps(fix) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from app.schemas import GPSData
+from app.services.batch_writer import BatchWriter
+from app.services.fix_deduplicator import FixDeduplicator
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+class FlakyFlush:
+    """``flush_func`` that raises for the first ``failures`` calls."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+        self.stored = []
+
+    async def __call__(self, session, batch):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("database unavailable")
+        self.stored.extend(batch)
+        return len(batch)
+
+
+def make_writer(flush: FlakyFlush, **kwargs) -> BatchWriter:
+    kwargs.setdefault("batch_size", 10)
+    kwargs.setdefault("flush_interval", 0.01)
+    kwargs.setdefault("retry_delay", 0.001)
+    return BatchWriter(flush, name="test", session_factory=fake_session, **kwargs)
+
+
+def write(writer: BatchWriter, items) -> None:
+    async def scenario():
+        await writer.start()
+        await writer.submit_many(items)
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+
+def fix(animal_id: str, minute: int) -> GPSData:
+    return GPSData(
+        animal_id=animal_id,
+        latitude=12.972,
+        longitude=77.594,
+        timestamp=datetime(2026, 10, 1, tzinfo=timezone.utc) + timedelta(minutes=minute),
+    )
+
+
+def test_failed_flush_is_retried_until_it_succeeds():
+    flush = FlakyFlush(failures=2)
+    flushed, failed = [], []
+    writer = make_writer(flush, retries=3, on_flushed=flushed.append, on_failed=failed.append)
+
+    write(writer, [1, 2, 3])
+
+    assert flush.calls == 3
+    assert flush.stored == [1, 2, 3]
+    assert flushed == [[1, 2, 3]] and failed == []
+    assert writer.metrics.retries == 2
+    assert writer.metrics.rows == 3 and writer.metrics.failed_rows == 0
+
+
+def test_batch_is_dropped_after_the_last_retry():
+    flush = FlakyFlush(failures=10)
+    flushed, failed = [], []
+    writer = make_writer(flush, retries=2, on_flushed=flushed.append, on_failed=failed.append)
+
+    write(writer, [1, 2, 3])
+
+    assert flush.calls == 3
+    assert flushed == [] and failed == [[1, 2, 3]]
+    assert writer.metrics.failed_batches == 1 and writer.metrics.failed_rows == 3
+
+
+def test_replayed_fix_is_accepted_after_its_write_failed():
+    deduplicator = FixDeduplicator(window=8)
+    writer = make_writer(
+        FlakyFlush(failures=10),
+        retries=0,
+        on_flushed=deduplicator.record,
+        on_failed=deduplicator.forget,
+    )
+
+    fresh, _ = deduplicator.filter([fix("A1", 0), fix("A1", 1)])
+    # Still in flight, so a copy is dropped
+    assert deduplicator.filter([fix("A1", 0)])[0] == []
+    write(writer, fresh)
+
+    replayed, _ = deduplicator.filter([fix("A1", 0), fix("A1", 1)])
+    assert len(replayed) == 2
+
+
+def test_fix_is_seen_once_its_write_succeeded():
+    deduplicator = FixDeduplicator(window=8)
+    writer = make_writer(FlakyFlush(failures=0), on_flushed=deduplicator.record)
+
+    fresh, _ = deduplicator.filter([fix("A1", 0)])
+    write(writer, fresh)
+
+    assert deduplicator.filter([fix("A1", 0)])[0] == []
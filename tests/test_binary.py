@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.ingest.binary import (
+    COORD_SCALE, HEADER, MAGIC, RECORD, decode_gps_binary, encode_gps_frame, encode_gps_record,
+    is_binary_frame,
+)
+from app.ingest.codec import BINARY_CONTENT_TYPE, decode_gps_payload
+from app.schemas import GPSData
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def fix(animal_id: str = "A1", second: int = 0, **kwargs) -> GPSData:
+    kwargs.setdefault("timestamp", START + timedelta(seconds=second))
+    return GPSData(animal_id=animal_id, latitude=12.9721234, longitude=-77.5935678, **kwargs)
+
+
+def assert_same(decoded: GPSData, original: GPSData):
+    assert decoded.animal_id == original.animal_id
+    assert decoded.latitude == pytest.approx(original.latitude, abs=1 / COORD_SCALE)
+    assert decoded.longitude == pytest.approx(original.longitude, abs=1 / COORD_SCALE)
+    assert decoded.timestamp == original.timestamp
+
+
+def test_single_record_round_trip():
+    original = fix()
+    payload = encode_gps_record(original)
+
+    assert len(payload) == RECORD.size
+    fixes, errors = decode_gps_binary(payload)
+    assert errors == []
+    assert_same(fixes[0], original)
+    assert fixes[0].timestamp.tzinfo is not None
+
+
+def test_frame_round_trip():
+    originals = [fix(f"A{i}", i) for i in range(5)]
+    payload = encode_gps_frame(originals)
+
+    assert is_binary_frame(payload)
+    fixes, errors = decode_gps_binary(payload)
+    assert errors == []
+    assert len(fixes) == 5
+    for decoded, original in zip(fixes, originals):
+        assert_same(decoded, original)
+
+
+def test_empty_frame():
+    assert decode_gps_binary(encode_gps_frame([])) == ([], [])
+
+
+def test_naive_timestamps_are_encoded_as_utc():
+    naive = fix(timestamp=datetime(2026, 10, 1, 12, 0))
+    aware = fix(timestamp=datetime(2026, 10, 1, 14, 0, tzinfo=timezone(timedelta(hours=2))))
+
+    fixes, _ = decode_gps_binary(encode_gps_frame([naive, aware]))
+    assert [f.timestamp for f in fixes] == [datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)] * 2
+
+
+def test_record_whose_id_starts_with_the_magic_is_a_record():
+    payload = encode_gps_record(fix("LVGP-17"))
+
+    assert not is_binary_frame(payload)
+    fixes, errors = decode_gps_binary(payload)
+    assert [f.animal_id for f in fixes] == ["LVGP-17"]
+
+
+def test_long_animal_id_cannot_be_encoded():
+    with pytest.raises(ValueError):
+        encode_gps_record(fix("A" * 17))
+
+
+@pytest.mark.parametrize("payload, message", [
+    (MAGIC + b"\x01", "Truncated frame header"),
+    (encode_gps_frame([fix("A1"), fix("A2")])[:-5], "Frame of 2 records should be 64 bytes, got 59"),
+    (HEADER.pack(MAGIC, 2, 0, 0), "Unsupported frame version 2"),
+    (encode_gps_record(fix())[:20], "Bare record should be 28 bytes, got 20"),
+])
+def test_truncated_or_unknown_payloads_are_rejected(payload, message):
+    fixes, errors = decode_gps_binary(payload)
+
+    assert fixes == []
+    assert errors == [(payload, message)]
+
+
+def test_invalid_records_are_reported_and_valid_ones_kept():
+    bad = RECORD.pack(b"A2", 95 * COORD_SCALE, 0, int(START.timestamp()))
+    payload = HEADER.pack(MAGIC, 1, 0, 2) + encode_gps_record(fix("A1")) + bad
+
+    fixes, errors = decode_gps_binary(payload)
+    assert [f.animal_id for f in fixes] == ["A1"]
+    assert len(errors) == 1
+    assert errors[0][0]["animal_id"] == b"A2"
+    assert "latitude" in errors[0][1]
+
+
+def test_content_type_picks_the_decoder():
+    record = encode_gps_record(fix())
+    frame = encode_gps_frame([fix()])
+
+    # Parameters and case do not matter
+    assert len(decode_gps_payload(record, "Application/Octet-Stream; v=1")[0]) == 1
+    assert len(decode_gps_payload(record, BINARY_CONTENT_TYPE)[0]) == 1
+    # Without a content type only a frame is recognised as binary
+    assert len(decode_gps_payload(frame, None)[0]) == 1
+    fixes, errors = decode_gps_payload(record, None)
+    assert fixes == [] and errors[0][1].startswith("Invalid JSON")
+    # A declared JSON payload is never decoded as binary
+    fixes, errors = decode_gps_payload(frame, "application/json")
+    assert fixes == [] and errors[0][1].startswith("Invalid JSON")
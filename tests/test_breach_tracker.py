@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from app.schemas import GPSData
+from app.services.breach_tracker import BREACH_ALERT, INSIDE, OUTSIDE, RETURN_ALERT, BreachTracker
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def at(minute: int) -> datetime:
+    return START + timedelta(minutes=minute)
+
+
+def make_tracker(**kwargs) -> BreachTracker:
+    kwargs.setdefault("exit_fixes", 3)
+    kwargs.setdefault("return_fixes", 2)
+    kwargs.setdefault("cooldown", 0)
+    return BreachTracker(**kwargs)
+
+
+def feed(tracker: BreachTracker, pattern: str, start: int = 0, animal_id: str = "A1"):
+    """Observe one fix per minute: ``i`` inside, ``o`` outside; returns the alerts."""
+    return [
+        tracker.observe(animal_id, flag == "i", at(start + minute))
+        for minute, flag in enumerate(pattern)
+    ]
+
+
+def test_breach_after_exit_fixes_consecutive_outside():
+    tracker = make_tracker()
+
+    # Jitter across the fence resets the streak
+    assert feed(tracker, "ioioo") == [None] * 5
+    assert tracker.state("A1") == INSIDE
+    assert feed(tracker, "o", start=5) == [BREACH_ALERT]
+    assert tracker.state("A1") == OUTSIDE
+    # Staying out raises nothing more
+    assert feed(tracker, "ooo", start=6) == [None] * 3
+    assert tracker.stats.breaches == 1
+
+
+def test_return_after_return_fixes_consecutive_inside():
+    tracker = make_tracker()
+    feed(tracker, "ooo")
+
+    assert feed(tracker, "ioii", start=3) == [None, None, None, RETURN_ALERT]
+    assert tracker.state("A1") == INSIDE
+    assert tracker.stats.returns == 1
+
+
+def test_alerts_within_cooldown_are_suppressed():
+    tracker = make_tracker(cooldown=3600)
+
+    assert feed(tracker, "ooo") == [None, None, BREACH_ALERT]
+    assert feed(tracker, "ii", start=3) == [None, RETURN_ALERT]
+    # Out again ten minutes after the first breach: state changes, no alert
+    assert feed(tracker, "ooo", start=10) == [None] * 3
+    assert tracker.state("A1") == OUTSIDE
+    assert tracker.stats.suppressed == 1
+    # Once the cooldown has passed the next breach alerts again
+    feed(tracker, "ii", start=20)
+    assert feed(tracker, "ooo", start=70) == [None, None, BREACH_ALERT]
+
+
+def test_late_fixes_are_ignored():
+    tracker = make_tracker()
+    feed(tracker, "oo", start=10)
+
+    # Older than the newest fix seen: neither breaches nor resets the streak
+    assert tracker.observe("A1", False, at(5)) is None
+    assert tracker.observe("A1", True, at(11)) is None
+    assert tracker.stats.late == 2
+    assert feed(tracker, "o", start=12) == [BREACH_ALERT]
+
+
+def test_naive_timestamps_are_utc():
+    tracker = make_tracker()
+    tracker.observe("A1", False, at(5))
+
+    assert tracker.observe("A1", False, at(4).replace(tzinfo=None)) is None
+    assert tracker.stats.late == 1
+
+
+def test_observe_many_builds_alerts():
+    tracker = make_tracker()
+    fixes = [
+        GPSData(animal_id="A1", latitude=13.5, longitude=78.5, timestamp=at(minute))
+        for minute in range(3)
+    ]
+
+    alerts = tracker.observe_many(fixes, [False] * 3)
+    assert [(alert.alert_type, alert.timestamp) for alert in alerts] == [(BREACH_ALERT, at(2))]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "breaches.json")
+    tracker = make_tracker(cooldown=3600, snapshot_path=path)
+    feed(tracker, "ooo", animal_id="A1")
+    feed(tracker, "o", animal_id="A2")
+    tracker.save()
+
+    restored = make_tracker(cooldown=3600, snapshot_path=path)
+    assert restored.load()
+    assert restored.snapshot() == tracker.snapshot()
+    assert restored.state("A1") == OUTSIDE
+    # The restored streak and cooldown carry on where they were
+    assert feed(restored, "oo", start=1, animal_id="A2") == [None, BREACH_ALERT]
+    assert feed(restored, "ii", start=3, animal_id="A1") == [None, RETURN_ALERT]
+    feed(restored, "ooo", start=5, animal_id="A1")
+    assert restored.stats.suppressed == 1
+
+
+def test_start_and_stop_persist_state(tmp_path):
+    path = str(tmp_path / "breaches.json")
+
+    async def run(tracker, pattern):
+        await tracker.start(interval=3600)
+        feed(tracker, pattern)
+        await tracker.stop()
+
+    asyncio.run(run(make_tracker(snapshot_path=path), "ooo"))
+    restored = make_tracker(snapshot_path=path)
+    asyncio.run(run(restored, ""))
+    assert restored.state("A1") == OUTSIDE
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "breaches.json"
+    path.write_bytes(b"{not json")
+
+    tracker = make_tracker(snapshot_path=str(path))
+    assert not tracker.load()
+    assert len(tracker) == 0
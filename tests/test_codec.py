@@ -0,0 +1,78 @@
+import json
+from datetime import datetime, timedelta, timezone
+from app.ingest.codec import decode_gps_json, decode_gps_payload
+from app.schemas import GPSData
+
+
+def item(animal_id: str = "A1", timestamp: str = "2026-10-01T00:00:00Z", **kwargs) -> dict:
+    return {"animal_id": animal_id, "latitude": 12.972, "longitude": 77.594, "timestamp": timestamp, **kwargs}
+
+
+def encode(data) -> bytes:
+    return json.dumps(data).encode()
+
+
+def test_single_fix():
+    fixes, errors = decode_gps_json(encode(item()))
+
+    assert errors == []
+    assert fixes == [GPSData(**item())]
+
+
+def test_array_of_fixes():
+    payload = b"  \n" + encode([item("A1"), item("A2")])
+
+    fixes, errors = decode_gps_json(payload)
+    assert errors == []
+    assert [fix.animal_id for fix in fixes] == ["A1", "A2"]
+
+
+def test_empty_array():
+    assert decode_gps_json(b"[]") == ([], [])
+
+
+def test_timestamps_keep_their_offset_or_lack_of_one():
+    fixes, _ = decode_gps_json(encode([
+        item(timestamp="2026-10-01T02:00:00+02:00"),
+        item(timestamp="2026-10-01T00:00:00Z"),
+        item(timestamp="2026-10-01T00:00:00"),
+    ]))
+
+    aware, utc, naive = (fix.timestamp for fix in fixes)
+    assert aware.utcoffset() == timedelta(hours=2)
+    assert aware == utc == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert naive.tzinfo is None
+    assert naive == datetime(2026, 10, 1)
+
+
+def test_invalid_fixes_are_reported_and_valid_ones_kept():
+    bad_latitude = item("A2", latitude=91)
+    missing_id = {"latitude": 1.0, "longitude": 2.0, "timestamp": "2026-10-01T00:00:00Z"}
+
+    fixes, errors = decode_gps_json(encode([item("A1"), bad_latitude, missing_id, item("A3")]))
+    assert [fix.animal_id for fix in fixes] == ["A1", "A3"]
+    assert [raw for raw, _ in errors] == [bad_latitude, missing_id]
+    assert "latitude" in errors[0][1]
+    assert "animal_id" in errors[1][1]
+
+
+def test_invalid_single_fix():
+    fixes, errors = decode_gps_json(encode(item(timestamp="yesterday")))
+
+    assert fixes == []
+    assert len(errors) == 1 and "timestamp" in errors[0][1]
+
+
+def test_malformed_json():
+    fixes, errors = decode_gps_json(b'[{"animal_id": "A1",')
+
+    assert fixes == []
+    assert errors[0][0] == b'[{"animal_id": "A1",'
+    assert errors[0][1].startswith("Invalid JSON")
+
+
+def test_json_content_type_uses_the_json_decoder():
+    payload = encode(item())
+
+    assert decode_gps_payload(payload, "application/json") == decode_gps_json(payload)
+    assert decode_gps_payload(payload, None) == decode_gps_json(payload)
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import numpy as np
+from app.services.geofence_engine import CONTAINMENT, EXCLUSION, GeofenceEngine
+
+
+def boundary(boundary_id: int, points, kind: str = CONTAINMENT) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=boundary_id,
+        name=f"fence-{boundary_id}",
+        updated_at=datetime(2026, 10, 1, tzinfo=timezone.utc),
+        boundary_points=json.dumps([{"latitude": lat, "longitude": lon} for lat, lon in points]),
+        kind=kind,
+    )
+
+
+def rectangle(lat_low: float, lat_high: float, lon_low: float, lon_high: float):
+    return [(lat_low, lon_low), (lat_low, lon_high), (lat_high, lon_high), (lat_high, lon_low)]
+
+
+class FakeResult:
+    def __init__(self, boundaries):
+        self._boundaries = boundaries
+
+    def __iter__(self):
+        return iter(self._boundaries)
+
+    def scalars(self):
+        return iter(self._boundaries)
+
+
+class FakeSession:
+    """
+    Stand-in for an AsyncSession holding the active boundaries.
+
+    ``get_index`` first reads (id, updated_at) and then the missing rows; both
+    are served from the same list.
+    """
+
+    def __init__(self, boundaries):
+        self.boundaries = boundaries
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(self.boundaries)
+
+
+def in_bounds(engine: GeofenceEngine, session: FakeSession, lats, lons) -> list:
+    async def scenario():
+        index = await engine.get_index(session)
+        return index.containing_each(np.array(lats, dtype=float), np.array(lons, dtype=float))[0]
+
+    return asyncio.run(scenario()).tolist()
+
+
+def test_all_invalid_boundaries_fall_back_to_default():
+    engine = GeofenceEngine(ttl=0)
+    session = FakeSession([boundary(1, [(1.0, 1.0), (2.0, 2.0)]), boundary(2, [])])
+
+    # Far outside the default farm boundary, inside it
+    assert in_bounds(engine, session, [0.0, 12.9720], [0.0, 77.5935]) == [False, True]
+
+
+def test_invalid_boundaries_are_cached():
+    engine = GeofenceEngine(ttl=0)
+    session = FakeSession([boundary(1, [(1.0, 1.0)])])
+
+    in_bounds(engine, session, [0.0], [0.0])
+    engine._index = None
+    in_bounds(engine, session, [0.0], [0.0])
+    # The second build finds the row compiled and only re-reads the keys
+    assert session.queries == 3
+
+
+def test_exclusion_only_keeps_default_containment():
+    engine = GeofenceEngine(ttl=0)
+    session = FakeSession([boundary(1, rectangle(12.9718, 12.9722, 77.5932, 77.5938), EXCLUSION)])
+
+    # Outside everything, inside the exclusion fence, inside only the default
+    assert in_bounds(
+        engine, session, [0.0, 12.9720, 12.9716], [0.0, 77.5935, 77.5935]
+    ) == [False, False, True]
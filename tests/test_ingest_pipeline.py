@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.config import settings
+from app.ingest.pipeline import IngestPipeline
+from app.schemas import GPSData
+from app.services.batch_writer import BatchWriter
+from app.services.breach_tracker import BreachTracker
+from app.services.fix_deduplicator import FixDeduplicator
+from app.services.geofence_engine import GeofenceIndex, geofence_engine
+from app.services.location_service import LocationService
+from app.services.rollup_service import RollupAggregator
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+class StoredRows:
+    """``flush_func`` that keeps every flushed batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, session, batch):
+        self.batches.append(list(batch))
+        return len(batch)
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def fix(animal_id: str, minute: int) -> GPSData:
+    # Inside the default boundary
+    return GPSData(
+        animal_id=animal_id,
+        latitude=12.9720,
+        longitude=77.5935,
+        timestamp=datetime(2026, 10, 1, tzinfo=timezone.utc) + timedelta(minutes=minute),
+    )
+
+
+@pytest.fixture(autouse=True)
+def stored(monkeypatch):
+    monkeypatch.setattr(settings, "ROLLUP_ENABLED", False)
+    monkeypatch.setattr(settings, "GEOFENCE_TRANSITION_ALERTS", False)
+    monkeypatch.setattr(settings, "INGEST_FLUSH_INTERVAL", 0.01)
+
+    async def default_index(session):
+        return GeofenceIndex([geofence_engine.default])
+
+    monkeypatch.setattr(geofence_engine, "get_index", default_index)
+    rows = StoredRows()
+    monkeypatch.setattr(LocationService, "create_locations_bulk", rows)
+    return rows
+
+
+def make_pipeline(**kwargs) -> IngestPipeline:
+    kwargs.setdefault("session_factory", fake_session)
+    kwargs.setdefault("tracker", BreachTracker())
+    kwargs.setdefault("deduplicator", FixDeduplicator(window=8))
+    return IngestPipeline(**kwargs)
+
+
+async def process(pipeline: IngestPipeline, writer: BatchWriter, batch) -> None:
+    await writer.start()
+    try:
+        await pipeline._process(list(batch), writer)
+    finally:
+        await writer.stop()
+
+
+def test_replay_is_accepted_after_index_lookup_failed(monkeypatch, stored):
+    pipeline = make_pipeline()
+    writer = pipeline.create_location_writer("test")
+    batch = [fix("A1", 0), fix("A1", 1)]
+
+    async def unavailable(session):
+        raise ConnectionError("database unavailable")
+
+    async def scenario():
+        with monkeypatch.context() as patch:
+            patch.setattr(geofence_engine, "get_index", unavailable)
+            with pytest.raises(ConnectionError):
+                await process(pipeline, writer, batch)
+        await process(pipeline, writer, batch)
+
+    asyncio.run(scenario())
+    assert stored.rows == batch
+    assert pipeline.stats.duplicates == 0
+
+
+def test_replay_is_accepted_after_geofencing_failed(monkeypatch, stored):
+    pipeline = make_pipeline()
+    writer = pipeline.create_location_writer("test")
+    batch = [fix("A1", 0), fix("A1", 1)]
+
+    class BrokenIndex:
+        def containing_each(self, lats, lons):
+            raise RuntimeError("bad geometry")
+
+    async def broken(session):
+        return BrokenIndex()
+
+    async def scenario():
+        with monkeypatch.context() as patch:
+            patch.setattr(geofence_engine, "get_index", broken)
+            with pytest.raises(RuntimeError):
+                await process(pipeline, writer, batch)
+        await process(pipeline, writer, batch)
+
+    asyncio.run(scenario())
+    assert stored.rows == batch
+    assert pipeline.stats.duplicates == 0
+    # The failed attempt did not leave the animal's newest timestamp ahead
+    assert pipeline.deduplicator.stats.out_of_order == 0
+
+
+def test_rollups_count_only_stored_fixes(monkeypatch, stored):
+    monkeypatch.setattr(settings, "INGEST_FLUSH_RETRIES", 0)
+    rollups = RollupAggregator()
+    pipeline = make_pipeline(rollups=rollups)
+    writer = pipeline.create_location_writer("test")
+
+    async def unavailable(session, batch):
+        raise ConnectionError("database unavailable")
+
+    async def scenario():
+        with monkeypatch.context() as patch:
+            patch.setattr(LocationService, "create_locations_bulk", unavailable)
+            await process(pipeline, writer, [fix("A1", 0)])
+        await process(pipeline, writer, [fix("A1", 5), fix("A1", 6)])
+        # Older than the newest counted fix: its buckets are recomputed instead
+        await process(pipeline, writer, [fix("A1", 3)])
+
+    asyncio.run(scenario())
+    assert rollups.stats.fixes == 2
+    assert rollups.stats.late == 1
+    assert ("A1", "hour", datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp()) in rollups._dirty
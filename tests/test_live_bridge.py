@@ -0,0 +1,89 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+import orjson
+from app.ingest.binary import encode_gps_frame
+from app.schemas import AlertCreate, GPSData
+from app.services.live_bridge import LiveMQTTBridge
+from app.services.live_broadcaster import LiveBroadcaster
+
+GPS_TOPIC = "test/gps"
+BINARY_TOPIC = "test/gps/binary"
+ALERTS_TOPIC = "test/alerts"
+
+
+def make_bridge(**kwargs):
+    broadcaster = LiveBroadcaster(max_pending=100)
+    bridge = LiveMQTTBridge(
+        broadcaster,
+        gps_topic=GPS_TOPIC,
+        binary_topic=BINARY_TOPIC,
+        alerts_topic=ALERTS_TOPIC,
+        **kwargs,
+    )
+    return bridge, broadcaster
+
+
+def fix(animal_id: str, second: int) -> GPSData:
+    return GPSData(
+        animal_id=animal_id,
+        latitude=12.972,
+        longitude=77.594,
+        timestamp=datetime(2026, 10, 1, 0, 0, second, tzinfo=timezone.utc),
+    )
+
+
+def alert(animal_id: str) -> dict:
+    return AlertCreate(
+        animal_id=animal_id,
+        latitude=12.972,
+        longitude=77.594,
+        timestamp=datetime(2026, 10, 1, tzinfo=timezone.utc),
+        alert_type="geofence_breach",
+        message="outside",
+    ).model_dump(mode="json")
+
+
+def drain(subscriber):
+    return asyncio.run(subscriber.get(timeout=0.1))
+
+
+def test_relays_json_and_binary_positions_newest_first_only():
+    bridge, broadcaster = make_bridge()
+    subscriber = broadcaster.subscribe()
+
+    bridge.handle(GPS_TOPIC, fix("A1", 5).model_dump_json().encode())
+    # A late replay of an older fix does not move the animal back
+    bridge.handle(GPS_TOPIC, fix("A1", 1).model_dump_json().encode())
+    bridge.handle(BINARY_TOPIC, encode_gps_frame([fix("A2", 3)]))
+
+    events = drain(subscriber)
+    positions = {payload["animal_id"]: payload for event, payload in events if event == "position"}
+    assert set(positions) == {"A1", "A2"}
+    assert positions["A1"]["timestamp"].startswith("2026-10-01T00:00:05")
+    assert bridge.stats.positions == 3
+
+
+def test_relays_alerts_once_and_calls_hook():
+    received = []
+    bridge, broadcaster = make_bridge(on_alerts=received.extend)
+    subscriber = broadcaster.subscribe()
+
+    bridge.handle(ALERTS_TOPIC, orjson.dumps(alert("A1")))
+    # A batching publisher sends arrays; the repeated alert is streamed once
+    bridge.handle(ALERTS_TOPIC, orjson.dumps([alert("A1"), alert("A2")]))
+
+    events = drain(subscriber)
+    assert [payload["animal_id"] for event, payload in events if event == "alert"] == ["A1", "A2"]
+    assert [a.animal_id for a in received] == ["A1", "A1", "A2"]
+
+
+def test_malformed_messages_are_counted_and_skipped():
+    bridge, broadcaster = make_bridge()
+    subscriber = broadcaster.subscribe()
+
+    bridge.handle(ALERTS_TOPIC, b"{not json")
+    bridge.handle(GPS_TOPIC, json.dumps({"animal_id": "A1"}).encode())
+
+    assert drain(subscriber) == []
+    assert bridge.stats.rejected == 2
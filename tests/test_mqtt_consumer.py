@@ -0,0 +1,251 @@
+import asyncio
+import zlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from app.config import settings
+from app.ingest.binary import encode_gps_frame, encode_gps_record
+from app.ingest.mqtt_consumer import MQTTConsumer
+from app.ingest.pipeline import IngestPipeline
+from app.schemas import GPSData
+from app.services.breach_tracker import BreachTracker
+from app.services.fix_deduplicator import FixDeduplicator
+from app.services.geofence_engine import GeofenceIndex, geofence_engine
+from app.services.location_service import LocationService
+from app.utils.mqtt_publisher import AsyncMQTTPublisher
+
+GPS_TOPIC = "test/gps"
+BINARY_TOPIC = "test/gps/binary"
+
+
+class FakeClient:
+    """
+    Stand-in for ``paho.mqtt.client.Client``.
+
+    Connects as soon as its loop starts. ``deliver`` plays paho's network
+    thread, so call it off the event loop: the consumer blocks it until the
+    payload is queued.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self.published = []
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def reconnect_delay_set(self, min_delay=1, max_delay=120):
+        pass
+
+    def connect_async(self, host, port=1883, keepalive=60):
+        pass
+
+    def loop_start(self):
+        self.on_connect(self, None, {}, 0)
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def subscribe(self, topics):
+        self.subscriptions.extend(topics)
+
+    def publish(self, topic, payload=None, qos=0):
+        self.published.append((topic, payload, qos))
+        return SimpleNamespace(mid=len(self.published), rc=0)
+
+    # Broker side
+
+    def deliver(self, topic: str, payload: bytes):
+        self.on_message(self, None, SimpleNamespace(topic=topic, payload=payload))
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+class StoredRows:
+    """Stand-in for ``LocationService.create_locations_bulk``."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, session, batch):
+        self.batches.append(list(batch))
+        return len(batch)
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def fix(animal_id: str, minute: int) -> GPSData:
+    # Inside the default boundary
+    return GPSData(
+        animal_id=animal_id,
+        latitude=12.9720,
+        longitude=77.5935,
+        timestamp=datetime(2026, 10, 1, tzinfo=timezone.utc) + timedelta(minutes=minute),
+    )
+
+
+@pytest.fixture(autouse=True)
+def stored(monkeypatch):
+    monkeypatch.setattr(settings, "ROLLUP_ENABLED", False)
+    monkeypatch.setattr(settings, "GEOFENCE_TRANSITION_ALERTS", False)
+    monkeypatch.setattr(settings, "BREACH_SNAPSHOT_PATH", "")
+    monkeypatch.setattr(settings, "INGEST_FLUSH_INTERVAL", 0.01)
+
+    async def default_index(session):
+        return GeofenceIndex([geofence_engine.default])
+
+    monkeypatch.setattr(geofence_engine, "get_index", default_index)
+    rows = StoredRows()
+    monkeypatch.setattr(LocationService, "create_locations_bulk", rows)
+    return rows
+
+
+def make_pipeline(workers: int = 3) -> IngestPipeline:
+    return IngestPipeline(
+        workers=workers,
+        publisher=AsyncMQTTPublisher(client_factory=FakeClient),
+        session_factory=fake_session,
+        tracker=BreachTracker(),
+        deduplicator=FixDeduplicator(window=8),
+    )
+
+
+def make_consumer(pipeline: IngestPipeline):
+    client = FakeClient()
+    consumer = MQTTConsumer(
+        pipeline, topic=GPS_TOPIC, binary_topic=BINARY_TOPIC, client_factory=lambda: client
+    )
+    return consumer, client
+
+
+async def consume(pipeline: IngestPipeline, deliveries) -> FakeClient:
+    consumer, client = make_consumer(pipeline)
+    await pipeline.start()
+    await consumer.start()
+
+    def network_thread():
+        for topic, payload in deliveries:
+            client.deliver(topic, payload)
+
+    await asyncio.get_running_loop().run_in_executor(None, network_thread)
+    await consumer.stop()
+    await pipeline.stop()
+    return client
+
+
+def test_partition_is_crc32_of_the_animal_id():
+    pipeline = make_pipeline(workers=3)
+    for animal_id in ("A1", "cow-17", "collar/0042", "ünïcode"):
+        assert pipeline.partition(animal_id) == zlib.crc32(animal_id.encode()) % 3
+    # Stable across instances (and so across processes and restarts)
+    assert [make_pipeline(workers=3).partition(f"A{i}") for i in range(20)] == [
+        pipeline.partition(f"A{i}") for i in range(20)
+    ]
+
+
+def test_fixes_keep_per_animal_order_across_workers(stored):
+    pipeline = make_pipeline(workers=3)
+    animals = [f"A{i}" for i in range(8)]
+    deliveries = [
+        (GPS_TOPIC, fix(animal_id, minute).model_dump_json().encode())
+        for minute in range(10)
+        for animal_id in animals
+    ]
+
+    client = asyncio.run(consume(pipeline, deliveries))
+
+    assert client.subscriptions == [(GPS_TOPIC, 1), (BINARY_TOPIC, 1)]
+    for animal_id in animals:
+        assert [row for row in stored.rows if row.animal_id == animal_id] == [
+            fix(animal_id, minute) for minute in range(10)
+        ]
+    # Each batch comes from one worker's writer and holds only its animals
+    for batch in stored.batches:
+        assert len({pipeline.partition(row.animal_id) for row in batch}) == 1
+    assert [writer.metrics.rows for writer in pipeline.location_writers] == [
+        10 * sum(pipeline.partition(animal_id) == worker for animal_id in animals)
+        for worker in range(3)
+    ]
+    assert pipeline.stats.processed == len(deliveries)
+
+
+def test_binary_frame_is_written_in_batches(monkeypatch, stored):
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 4)
+    pipeline = make_pipeline(workers=2)
+    fixes = [fix("A1", minute) for minute in range(10)]
+
+    asyncio.run(consume(pipeline, [(BINARY_TOPIC, encode_gps_frame(fixes))]))
+
+    # Coordinates are fixed point on the wire, so compare what identifies a fix
+    assert [(row.animal_id, row.timestamp) for row in stored.rows] == [
+        (item.animal_id, item.timestamp) for item in fixes
+    ]
+    assert all(len(batch) <= 4 for batch in stored.batches)
+    assert len(stored.batches) >= 3
+    assert pipeline.stats.received == 10
+
+
+def test_saturated_pipeline_blocks_the_network_thread(monkeypatch, stored):
+    monkeypatch.setattr(settings, "INGEST_QUEUE_MAXSIZE", 1)
+    pipeline = make_pipeline(workers=1)
+    consumer, client = make_consumer(pipeline)
+    fixes = [fix("A1", minute) for minute in range(4)]
+    delivered = []
+
+    def network_thread():
+        for item in fixes:
+            client.deliver(GPS_TOPIC, item.model_dump_json().encode())
+            delivered.append(item)
+
+    async def scenario():
+        gate = asyncio.Event()
+        submit_payload = pipeline.submit_payload
+
+        async def blocked(payload, content_type=None):
+            await gate.wait()
+            return await submit_payload(payload, content_type)
+
+        monkeypatch.setattr(pipeline, "submit_payload", blocked)
+        await pipeline.start()
+        await consumer.start()
+
+        reading = asyncio.get_running_loop().run_in_executor(None, network_thread)
+        await asyncio.sleep(0.1)
+        # One payload is being ingested and one fills the queue; paho's
+        # thread waits to hand over the third instead of buffering it
+        assert len(delivered) == 2
+        assert not reading.done()
+
+        gate.set()
+        await reading
+        await consumer.stop()
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    assert consumer.messages == 4
+    assert stored.rows == fixes
+
+
+def test_format_is_chosen_by_topic(stored):
+    pipeline = make_pipeline(workers=1)
+    record = encode_gps_record(fix("A1", 0))
+
+    asyncio.run(consume(pipeline, [
+        # A bare record is only recognised on the binary topic
+        (BINARY_TOPIC, record),
+        (GPS_TOPIC, record),
+        (GPS_TOPIC, encode_gps_frame([fix("A1", 1)])),
+        (GPS_TOPIC, fix("A1", 2).model_dump_json().encode()),
+    ]))
+
+    assert [row.timestamp for row in stored.rows] == [fix("A1", minute).timestamp for minute in range(3)]
+    assert pipeline.stats.rejected == 1
@@ -0,0 +1,319 @@
+import asyncio
+import json
+import paho.mqtt.client as mqtt
+import pytest
+from app.config import settings
+from app.utils.mqtt_publisher import AsyncMQTTPublisher
+
+
+class FakeMessageInfo:
+    def __init__(self, mid: int, rc: int):
+        self.mid = mid
+        self.rc = rc
+
+
+class FakeClient:
+    """
+    Stand-in for ``paho.mqtt.client.Client``.
+
+    Records what the publisher hands to paho. Tests play the broker's side
+    by calling ``connect``/``disconnect``/``ack`` (paho's network thread
+    would invoke the same callbacks).
+    """
+
+    def __init__(self, auto_connect: bool = True):
+        self.auto_connect = auto_connect
+        self.published = []
+        self.rc = mqtt.MQTT_ERR_SUCCESS
+        self.reconnect_delay = None
+        self.loop_started = False
+        self.disconnected = False
+        self._mid = 0
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def reconnect_delay_set(self, min_delay=1, max_delay=120):
+        self.reconnect_delay = (min_delay, max_delay)
+
+    def connect_async(self, host, port=1883, keepalive=60):
+        pass
+
+    def loop_start(self):
+        self.loop_started = True
+        if self.auto_connect:
+            self.connect()
+
+    def loop_stop(self):
+        self.loop_started = False
+
+    def disconnect(self):
+        self.disconnected = True
+
+    def publish(self, topic, payload=None, qos=0):
+        self._mid += 1
+        if self.rc == mqtt.MQTT_ERR_SUCCESS:
+            self.published.append((topic, payload, qos, self._mid))
+        return FakeMessageInfo(self._mid, self.rc)
+
+    # Broker side
+
+    def connect(self, rc: int = 0):
+        self.on_connect(self, None, {}, rc)
+
+    def drop(self):
+        self.on_disconnect(self, None, mqtt.MQTT_ERR_CONN_LOST)
+
+    def ack(self, mid: int):
+        self.on_publish(self, None, mid)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle():
+    # Let callbacks hopped onto the loop and the sender task run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def make_publisher(client: FakeClient, **kwargs) -> AsyncMQTTPublisher:
+    kwargs.setdefault("topic", "test/alerts")
+    kwargs.setdefault("qos", 1)
+    kwargs.setdefault("batch_size", 1)
+    return AsyncMQTTPublisher(client_factory=lambda: client, **kwargs)
+
+
+def alert(n: int) -> dict:
+    return {"animal_id": f"A{n}", "alert_type": "geofence_breach"}
+
+
+def test_publishes_single_alert_with_configured_topic_and_qos():
+    async def scenario():
+        client = FakeClient()
+        publisher = make_publisher(client, qos=2)
+        await publisher.start()
+        assert publisher.publish_alert(alert(1))
+        await settle()
+        await publisher.stop()
+        return client, publisher
+
+    client, publisher = run(scenario())
+    [(topic, payload, qos, _)] = client.published
+    assert topic == "test/alerts"
+    assert qos == 2
+    assert json.loads(payload) == alert(1)
+    assert publisher.stats.messages_sent == 1
+    assert publisher.stats.alerts_sent == 1
+    assert client.disconnected and not client.loop_started
+
+
+def test_publish_before_start_raises():
+    publisher = make_publisher(FakeClient())
+    with pytest.raises(RuntimeError):
+        publisher.publish_alert(alert(1))
+
+
+def test_full_queue_drops_new_alerts():
+    async def scenario():
+        client = FakeClient(auto_connect=False)
+        publisher = make_publisher(client, max_queue_size=2)
+        await publisher.start()
+        # Nothing can go out while disconnected, so the queue fills up
+        results = [publisher.publish_alert(alert(n)) for n in range(5)]
+        await settle()
+        dropped_while_offline = publisher.stats.dropped
+        client.connect()
+        await settle()
+        await publisher.stop()
+        return client, publisher, results, dropped_while_offline
+
+    client, publisher, results, dropped_while_offline = run(scenario())
+    assert results == [True, True, False, False, False]
+    assert dropped_while_offline == 3
+    assert publisher.stats.enqueued == 2
+    assert [json.loads(payload)["animal_id"] for _, payload, _, _ in client.published] == ["A0", "A1"]
+
+
+def test_batches_queued_alerts_into_one_json_array():
+    async def scenario():
+        client = FakeClient(auto_connect=False)
+        publisher = make_publisher(client, batch_size=3)
+        await publisher.start()
+        for n in range(5):
+            publisher.publish_alert(alert(n))
+        await settle()
+        client.connect()
+        await settle()
+        await publisher.stop()
+        return client, publisher
+
+    client, publisher = run(scenario())
+    batches = [json.loads(payload) for _, payload, _, _ in client.published]
+    # The sender took the first alert before connecting, then drained up to batch_size
+    assert all(isinstance(batch, list) for batch in batches)
+    assert [a["animal_id"] for batch in batches for a in batch] == [f"A{n}" for n in range(5)]
+    assert max(len(batch) for batch in batches) == 3
+    assert publisher.stats.messages_sent == len(batches) < 5
+    assert publisher.stats.alerts_sent == 5
+
+
+def test_batch_size_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MQTT_ALERT_BATCH_SIZE", 4)
+    publisher = AsyncMQTTPublisher(client_factory=FakeClient)
+    assert publisher.batch_size == 4
+
+
+def test_counts_failures_when_publish_is_rejected():
+    async def scenario():
+        client = FakeClient()
+        publisher = make_publisher(client, batch_size=2)
+        await publisher.start()
+        client.rc = mqtt.MQTT_ERR_QUEUE_SIZE
+        publisher.publish_alert(alert(1))
+        publisher.publish_alert(alert(2))
+        await settle()
+        client.rc = mqtt.MQTT_ERR_SUCCESS
+        publisher.publish_alert(alert(3))
+        await settle()
+        await publisher.stop()
+        return client, publisher
+
+    client, publisher = run(scenario())
+    assert publisher.stats.failed == 2
+    assert publisher.stats.alerts_sent == 1
+    assert len(client.published) == 1
+
+
+def test_batch_rejected_without_connection_is_sent_after_reconnect():
+    async def scenario():
+        client = FakeClient()
+        publisher = make_publisher(client, batch_size=2)
+        await publisher.start()
+        # paho lost the connection but its disconnect callback has not run yet
+        client.rc = mqtt.MQTT_ERR_NO_CONN
+        publisher.publish_alert(alert(1))
+        publisher.publish_alert(alert(2))
+        await settle()
+        connected_after_reject = publisher.connected
+        client.rc = mqtt.MQTT_ERR_SUCCESS
+        client.connect()
+        await settle()
+        await publisher.stop()
+        return client, publisher, connected_after_reject
+
+    client, publisher, connected_after_reject = run(scenario())
+    assert not connected_after_reject
+    [(_, payload, _, _)] = client.published
+    assert [a["animal_id"] for a in json.loads(payload)] == ["A1", "A2"]
+    assert publisher.stats.retried == 2
+    assert publisher.stats.failed == 0
+    assert publisher.stats.alerts_sent == 2
+
+
+def test_disconnect_clears_unacknowledged_messages():
+    async def scenario():
+        client = FakeClient()
+        publisher = make_publisher(client)
+        await publisher.start()
+        publisher.publish_alert(alert(1))
+        publisher.publish_alert(alert(2))
+        await settle()
+        inflight_before_drop = len(publisher._inflight)
+
+        client.drop()
+        await settle()
+        inflight_after_drop = len(publisher._inflight)
+        # A late ack for a forgotten message is ignored
+        client.ack(client.published[0][3])
+        await settle()
+        await publisher.stop()
+        return publisher, inflight_before_drop, inflight_after_drop
+
+    publisher, inflight_before_drop, inflight_after_drop = run(scenario())
+    assert inflight_before_drop == 2
+    assert inflight_after_drop == 0
+    assert publisher.stats.unacknowledged == 2
+    assert publisher.stats.alerts_delivered == 0
+
+
+def test_counts_failures_when_publish_raises():
+    class BrokenClient(FakeClient):
+        def publish(self, topic, payload=None, qos=0):
+            raise ValueError("payload too large")
+
+    async def scenario():
+        publisher = make_publisher(BrokenClient())
+        await publisher.start()
+        publisher.publish_alert(alert(1))
+        await settle()
+        await publisher.stop()
+        return publisher
+
+    publisher = run(scenario())
+    assert publisher.stats.failed == 1
+    assert publisher.stats.alerts_sent == 0
+
+
+def test_holds_alerts_while_disconnected_and_resumes_on_reconnect(monkeypatch):
+    monkeypatch.setattr(settings, "MQTT_RECONNECT_MIN_DELAY", 2)
+    monkeypatch.setattr(settings, "MQTT_RECONNECT_MAX_DELAY", 30)
+
+    async def scenario():
+        client = FakeClient()
+        publisher = make_publisher(client)
+        await publisher.start()
+        publisher.publish_alert(alert(1))
+        await settle()
+
+        client.drop()
+        await settle()
+        connected_after_drop = publisher.connected
+        publisher.publish_alert(alert(2))
+        await settle()
+        sent_while_offline = len(client.published)
+
+        # A refused attempt does not count as a reconnect
+        client.connect(rc=5)
+        await settle()
+        client.connect()
+        await settle()
+        await publisher.stop()
+        return client, publisher, connected_after_drop, sent_while_offline
+
+    client, publisher, connected_after_drop, sent_while_offline = run(scenario())
+    assert client.reconnect_delay == (2, 30)
+    assert not connected_after_drop
+    assert sent_while_offline == 1
+    assert [json.loads(payload)["animal_id"] for _, payload, _, _ in client.published] == ["A1", "A2"]
+    assert publisher.stats.reconnects == 1
+
+
+def test_delivery_and_latency_counters_follow_on_publish():
+    async def scenario():
+        client = FakeClient()
+        publisher = make_publisher(client, batch_size=2)
+        await publisher.start()
+        publisher.publish_alert(alert(1))
+        publisher.publish_alert(alert(2))
+        await settle()
+        before_ack = publisher.stats.snapshot()
+
+        [(_, _, _, mid)] = client.published
+        await asyncio.sleep(0.01)
+        client.ack(mid)
+        client.ack(mid)  # duplicate acks are ignored
+        client.ack(mid + 100)  # and so are unknown ones
+        await settle()
+        await publisher.stop()
+        return publisher, before_ack
+
+    publisher, before_ack = run(scenario())
+    assert before_ack["alerts_delivered"] == 0
+    stats = publisher.stats.snapshot()
+    assert stats["alerts_sent"] == 2
+    assert stats["alerts_delivered"] == 2
+    assert stats["max_latency"] >= 0.01
+    assert stats["total_latency"] >= 2 * 0.01
+    assert stats["avg_latency_ms"] >= 10.0